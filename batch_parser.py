@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Batch DEF/LEF parsing
+
+Parses many designs in one run on a process pool, instead of one def_parser.py /
+lef_parser.py launch per design:
+
+    python batch_parser.py --manifest designs.txt --output_dir ./tmp/batch --jobs 8
+    python batch_parser.py --design_dir ./designs --lef ./lib/tech.lef --output_dir ./tmp/batch
+
+A manifest has one design per line, "<def_path> [<lef_path> ...]" ('#' starts a comment).
+With --design_dir every DEF of the directory is a design; its LEF is the file with the
+same stem (design.def -> design.lef), otherwise the --lef files.
+
+Every distinct set of LEF files is parsed once and shared by the designs using it.
+Designs are scheduled largest DEF first, so one big design does not start last and
+hold the whole batch. Each design gets <output_dir>/<name>/def_outputs.design (or .pkl)
+and lef_outputs.pkl; the throughput and the failures are summarized at the end and
+written to <output_dir>/batch_summary.json.
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+
+from loguru import logger
+
+from def_parser import parse_def_file
+from src.lef_parser import LEFParser, let2format
+from src._def.net_filter import NetFilter
+from src.parse_cache import ParseCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+
+DEF_SUFFIXES = ('.def', '.def.gz', '.def.bz2', '.def.xz', '.def.zst')
+LEF_SUFFIXES = ('.lef', '.lef.gz', '.lef.bz2', '.lef.xz', '.lef.zst')
+
+
+@dataclass
+class DesignJob:
+    name: str
+    def_path: str
+    lef_paths: List[str] = field(default_factory=list)
+
+
+@dataclass
+class JobResult:
+    name: str
+    kind: str               # 'def' or 'lef'
+    input_bytes: int
+    seconds: float
+    output_path: Optional[str] = None
+    n_instances: Optional[int] = None
+    n_nets: Optional[int] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+def _strip_suffix(path, suffixes):
+    base = os.path.basename(path)
+    for suffix in suffixes:
+        if base.endswith(suffix):
+            return base[:-len(suffix)]
+    return os.path.splitext(base)[0]
+
+
+def read_manifest(manifest_path):
+    jobs = []
+    with open(manifest_path) as f:
+        for line in f:
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            jobs.append(DesignJob(_strip_suffix(fields[0], DEF_SUFFIXES), fields[0], fields[1:]))
+    return jobs
+
+
+def scan_design_dir(design_dir, default_lef_paths):
+    jobs = []
+    names = sorted(os.listdir(design_dir))
+    lefs = {_strip_suffix(name, LEF_SUFFIXES): os.path.join(design_dir, name)
+            for name in names if name.endswith(LEF_SUFFIXES)}
+    for name in names:
+        if name.endswith(DEF_SUFFIXES):
+            stem = _strip_suffix(name, DEF_SUFFIXES)
+            lef_paths = [lefs[stem]] if stem in lefs else list(default_lef_paths)
+            jobs.append(DesignJob(stem, os.path.join(design_dir, name), lef_paths))
+    return jobs
+
+
+def _unique_names(jobs):
+    # Two designs with the same file name in different directories get distinct output directories
+    # ("a", "a", "a_1" gives "a", "a_2", "a_1": a suffix never takes a name used by another design)
+    taken = {job.name for job in jobs}
+    used = set()
+    for job in jobs:
+        name, count = job.name, 0
+        while name in used or (count and name in taken):
+            count += 1
+            name = f"{job.name}_{count}"
+        used.add(name)
+        job.name = name
+    return jobs
+
+
+def _cache(options):
+    if not options['cache']:
+        return None
+    return ParseCache(options['cache_dir'], options['cache_max_bytes'])
+
+
+def parse_lef_job(lef_paths, output_path):
+    """Worker: parse a set of LEF files into one lef_outputs.pkl"""
+    start = time.perf_counter()
+    result = JobResult('+'.join(lef_paths), 'lef', 0, 0.0, output_path)
+    try:
+        result.input_bytes = sum(os.path.getsize(path) for path in lef_paths)
+        cell_dict = {}
+        for lef_path in lef_paths:
+            cell_dict.update(let2format(LEFParser().parse_file(lef_path)))
+        with open(output_path, 'wb') as f:
+            pickle.dump({'cell_dict': cell_dict}, f)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=3)}"
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def parse_def_job(job, output_path, options):
+    """Worker: parse one DEF into output_path"""
+    start = time.perf_counter()
+    result = JobResult(job.name, 'def', 0, 0.0, output_path)
+    try:
+        result.input_bytes = os.path.getsize(job.def_path)
+        net_filter = NetFilter(options['min_degree'], options['max_degree'], options['drop_io_only'], options['drop_power_nets'])
+        counts = parse_def_file(job.def_path, output_path, options['output_format'], net_filter,
+                                progress='silent', cache=_cache(options))
+        if counts is None:
+            result.cached = True
+        else:
+            result.n_instances, result.n_nets = counts
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=3)}"
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _file_size(path):
+    # Missing files sort last and fail in their worker
+    return os.path.getsize(path) if os.path.exists(path) else -1
+
+
+def _link_or_copy(source, target):
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def run_batch(jobs, output_dir, n_jobs, options):
+    """Parse all jobs, return the list of JobResult (LEF sets first, then designs)"""
+    os.makedirs(output_dir, exist_ok=True)
+    lef_dir = os.path.join(output_dir, '_lef')
+    os.makedirs(lef_dir, exist_ok=True)
+    # One shared lef_outputs per distinct set of LEF files
+    lef_sets = {}
+    for job in jobs:
+        key = tuple(os.path.abspath(path) for path in job.lef_paths)
+        if key and key not in lef_sets:
+            lef_sets[key] = os.path.join(lef_dir, f"lef_{len(lef_sets)}.pkl")
+
+    def_name = 'def_outputs.pkl' if options['output_format'] == 'pickle' else 'def_outputs.design'
+    results = []
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        # Largest first: LEF sets, then designs, each by decreasing input size
+        lef_order = sorted(lef_sets, key=lambda key: -sum(_file_size(path) for path in key))
+        lef_futures = {executor.submit(parse_lef_job, list(key), lef_sets[key]): key for key in lef_order}
+        def_futures = {}
+        for job in sorted(jobs, key=lambda job: -_file_size(job.def_path)):
+            design_dir = os.path.join(output_dir, job.name)
+            os.makedirs(design_dir, exist_ok=True)
+            future = executor.submit(parse_def_job, job, os.path.join(design_dir, def_name), options)
+            def_futures[future] = job
+
+        lef_results = {}
+        for future in as_completed(lef_futures):
+            result = future.result()
+            lef_results[lef_futures[future]] = result
+            results.append(result)
+            _log_result(result)
+        for future in as_completed(def_futures):
+            result = future.result()
+            job = def_futures[future]
+            lef_key = tuple(os.path.abspath(path) for path in job.lef_paths)
+            if lef_key and result.error is None:
+                if lef_results[lef_key].error is not None:
+                    result.error = f"LEF failed: {lef_results[lef_key].error.splitlines()[0]}"
+                else:
+                    _link_or_copy(lef_sets[lef_key], os.path.join(output_dir, job.name, 'lef_outputs.pkl'))
+            results.append(result)
+            _log_result(result)
+    return results
+
+
+def _log_result(result):
+    if result.error is not None:
+        logger.error(f"[{result.kind}] {result.name} failed after {result.seconds:.2f}s: {result.error.splitlines()[0]}")
+    else:
+        state = "cache hit" if result.cached else f"{result.input_bytes / 1e6 / max(result.seconds, 1e-9):.1f} MB/s"
+        logger.info(f"[{result.kind}] {result.name} done in {result.seconds:.2f}s ({state})")
+
+
+def summarize(results, wall_seconds):
+    designs = [result for result in results if result.kind == 'def']
+    failed = [result for result in results if result.error is not None]
+    total_bytes = sum(result.input_bytes for result in results)
+    return {
+        'designs': len(designs),
+        'designs_ok': sum(1 for result in designs if result.error is None),
+        'cache_hits': sum(1 for result in designs if result.cached),
+        'lef_sets': len(results) - len(designs),
+        'failed': [{'name': result.name, 'kind': result.kind, 'error': result.error} for result in failed],
+        'input_mb': total_bytes / 1e6,
+        'wall_seconds': wall_seconds,
+        'cpu_seconds': sum(result.seconds for result in results),
+        'mb_per_second': total_bytes / 1e6 / wall_seconds if wall_seconds > 0 else 0.0,
+        'designs_per_minute': len(designs) * 60 / wall_seconds if wall_seconds > 0 else 0.0,
+        'results': [asdict(result) for result in results],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse many DEF/LEF designs on a process pool')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--manifest', type=str, help='File with one "<def_path> [<lef_path> ...]" line per design')
+    source.add_argument('--design_dir', type=str, help='Directory of DEF files (and LEF files with the same stem)')
+    parser.add_argument('--lef', type=str, nargs='*', default=[], help='LEF files of the --design_dir designs without their own LEF')
+    parser.add_argument('--output_dir', type=str, default='./tmp/batch', help='One sub-directory per design is written here')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Number of worker processes')
+    parser.add_argument('--output_format', type=str, default='design', choices=['design', 'pickle'], help='def_outputs.design (mmap store) or the legacy def_outputs.pkl')
+    parser.add_argument('--min_degree', type=int, default=2, help='Drop nets with fewer instance connections')
+    parser.add_argument('--max_degree', type=int, default=None, help='Drop nets with more instance connections')
+    parser.add_argument('--drop_io_only', action='store_true', help='Drop nets that connect no instance (IO pins only)')
+    parser.add_argument('--drop_power_nets', action='store_true', help='Drop power / ground nets (VDD, VSS, GND, ...)')
+    parser.add_argument('--cache_dir', type=str, default=DEFAULT_CACHE_DIR, help='Parse cache directory')
+    parser.add_argument('--cache_size_gb', type=float, default=DEFAULT_MAX_BYTES / (1 << 30), help='Disk budget of the parse cache')
+    parser.add_argument('--cache', action='store_true', help='Restore unchanged designs from the parse cache and store new results in it (off by default)')
+    parser.add_argument('--no_cache', action='store_true', help='Do not use the parse cache, even with --cache')
+    args = parser.parse_args()
+
+    jobs = read_manifest(args.manifest) if args.manifest else scan_design_dir(args.design_dir, args.lef)
+    jobs = _unique_names(jobs)
+    if not jobs:
+        logger.error("No design to parse")
+        sys.exit(1)
+    options = {
+        'output_format': args.output_format,
+        'min_degree': args.min_degree,
+        'max_degree': args.max_degree,
+        'drop_io_only': args.drop_io_only,
+        'drop_power_nets': args.drop_power_nets,
+        'cache': args.cache and not args.no_cache,
+        'cache_dir': args.cache_dir,
+        'cache_max_bytes': int(args.cache_size_gb * (1 << 30)),
+    }
+
+    logger.info(f"Parsing {len(jobs)} designs with {args.jobs} workers")
+    start = time.perf_counter()
+    results = run_batch(jobs, args.output_dir, args.jobs, options)
+    summary = summarize(results, time.perf_counter() - start)
+    with open(os.path.join(args.output_dir, 'batch_summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    logger.info(
+        f"{summary['designs_ok']}/{summary['designs']} designs ok ({summary['cache_hits']} from cache), "
+        f"{summary['lef_sets']} LEF sets, {summary['input_mb']:.1f} MB in {summary['wall_seconds']:.2f}s "
+        f"({summary['mb_per_second']:.1f} MB/s, {summary['designs_per_minute']:.1f} designs/min)"
+    )
+    for failure in summary['failed']:
+        logger.error(f"FAILED [{failure['kind']}] {failure['name']}: {failure['error'].splitlines()[0]}")
+    sys.exit(1 if summary['failed'] else 0)
+
+
+if __name__ == "__main__":
+    main()
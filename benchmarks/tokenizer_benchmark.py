@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tokenizer benchmark
+
+Compares CommonLineSeperator (character loop) with RegexLineSeperator (compiled
+regex scan, per line) and BulkLineSeperator (numpy passes over a batch of lines,
+used by the COMPONENTS/NETS transformers) on the entries of a DEF file, checks that
+all of them produce identical tokens, and reports tokens/sec for each.
+
+    python benchmarks/tokenizer_benchmark.py --def_path test_data/complete.5.8.def
+"""
+
+import gc
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.parser.section_indexer import DefSectionIndexer, SectionReader, open_mmap
+from src.parser.specifig_parser import MultiLineBlockParserWithEnd
+from src._def.transformer.specific import CommonLineSeperator, RegexLineSeperator, BulkLineSeperator
+
+
+def load_head_lines(def_path, sections=('COMPONENTS', 'NETS')):
+    """Return the joined "- name ... ;" entries of the given sections, as the transformers see them"""
+    mm = open_mmap(def_path)
+    index = DefSectionIndexer(set(), set(), set(sections)).index(mm)
+    block_parser = MultiLineBlockParserWithEnd()
+    lines = []
+    for prefix in sections:
+        for span in index.get(prefix, []):
+            f = SectionReader(mm, span.body_start, span.end)
+            lines.extend(raw['head_section'] for raw in block_parser.iter_parse(f, '', prefix))
+    mm.close()
+    return lines
+
+
+def run(seperator, lines, repeat):
+    """Best-of-repeat time of seperate_many over all lines, with gc disabled like timeit"""
+    best = None
+    for _ in range(repeat):
+        tokens = None
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            tokens = seperator.seperate_many(lines)
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return tokens, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DEF line tokenizers')
+    parser.add_argument('--def_path', type=str, default='test_data/complete.5.8.def', help='Path to the DEF file')
+    parser.add_argument('--min_lines', type=int, default=200000, help='Replicate entries up to this many lines')
+    parser.add_argument('--repeat', type=int, default=3, help='Best of N runs')
+    args = parser.parse_args()
+
+    lines = load_head_lines(args.def_path)
+    if not lines:
+        print(f"No COMPONENTS/NETS entries found in {args.def_path}")
+        return
+    if len(lines) < args.min_lines:
+        lines = lines * (args.min_lines // len(lines) + 1)
+
+    common_tokens, common_time = run(CommonLineSeperator(), lines, args.repeat)
+    n_tokens = sum(len(tokens) for tokens in common_tokens)
+    print(f"{len(lines)} lines, {n_tokens} tokens")
+    print(f"  {'CommonLineSeperator':20s}: {n_tokens / common_time:12.0f} tokens/sec ({common_time:.3f}s)")
+
+    for seperator in (RegexLineSeperator(), BulkLineSeperator()):
+        name = type(seperator).__name__
+        tokens, elapsed = run(seperator, lines, args.repeat)
+        assert tokens == common_tokens, f"{name} output differs from CommonLineSeperator"
+        del tokens
+        print(f"  {name:20s}: {n_tokens / elapsed:12.0f} tokens/sec ({elapsed:.3f}s, {common_time / elapsed:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -2,80 +2,433 @@ import os
 from src.parser.specifig_parser import HeaderParser
 from src.parser.specifig_parser import BlockParserNoEnd
 from src.parser.specifig_parser import BlockParserWithEnd, MultiLineBlockParserWithEnd
+from src.parser.section_indexer import DefSectionIndexer, SectionReader, open_mmap
+from src.parser.compression import DecompressedBuffer, decompressed_size, detect_compression, iter_decompressed, read_decompressed
+from src.parser.entry_lines import release_source, share_buffer
 
 from src._def.transformer.specific import component_block_transformer, enhanced_net_block_transformer
+from src._def.component_table import component_table_transformer
+from src._def.net_csr import net_csr_transformer
+from src._def.io_pins import io_pin_table_transformer
+from src._def.routing import parse_routing
+from src._def.floorplan import parse_floorplan
+from src._def.byte_engine import parse_component_table_bytes, parse_net_csr_bytes
+from src._def.incremental import update_component_table, update_section
+from src._def.def_writer import DefWriter
+from src._def.net_filter import NetFilter
+from src._def.hierarchy import HierarchyTrie, divider_char
+from src._def.design_db import DesignDB
+from src._def.name_table import DesignNames, NameTable
 from tqdm import tqdm
 from loguru import logger
+from src._def.parallel import ParallelSectionParser, SECTION_TRANSFORMERS, merge_component_columns, merge_net_columns
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from src.progress import make_progress, PROGRESS_REPORTERS
+from src.design_store import save_def_output
+from src.parse_cache import ParseCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
 import pickle
 import argparse
+
+# Bump when the parse output changes, so cached results of older versions are not reused
+PARSER_VERSION = 2
+
+
+def _fresh_stats(method):
+    # progress.section_stats describe the last top-level parse* call only; the calls
+    # nested in it (parse_design_db -> parse_component_table, ...) add to its stats
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self._calls:
+            self.progress.reset()
+        self._calls += 1
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._calls -= 1
+    return wrapper
+
+
 class DefParser:
-    def __init__(self, def_file_path, Header_list, NoEndBlockList, WithEndBlockList, used_prefix):
+    def __init__(self, def_file_path, Header_list, NoEndBlockList, WithEndBlockList, used_prefix, workers=1, progress='tqdm', engine='text'):
         self.def_file_path = def_file_path
+        # Entries keep byte ranges of this file instead of their lines (see src/parser/entry_lines.py)
+        self.source_path = os.path.abspath(def_file_path)
         self.Header_list = Header_list
         self.NoEndBlockList = NoEndBlockList
         self.WithEndBlockList = WithEndBlockList
         self.used_prefix = used_prefix
+        # workers > 1 parses COMPONENTS / NETS in worker processes
+        self.workers = workers
+        # 'tqdm', 'log', 'silent' or a reporter from src.progress; the per-section stats of the
+        # last parse* call end up in progress.section_stats
+        self.progress = make_progress(progress)
+        self._calls = 0
+        # 'bytes' builds the ComponentTable / NetPinCSR from the raw bytes (src/_def/byte_engine.py)
+        self.engine = engine
 
         self.header_parser = HeaderParser()
         self.block_parser_no_end = BlockParserNoEnd()
         self.block_parser_with_end = BlockParserWithEnd()
         # Enhanced parser for multi-line blocks like NETS
         self.multiline_block_parser = MultiLineBlockParserWithEnd()
+        # Byte-range index of the top-level sections, filled by parse()
+        self.section_indexer = DefSectionIndexer(Header_list, NoEndBlockList, WithEndBlockList)
+        self.section_index = {}
 
         self.block_collector = {}
         self.used_block_collector = {}
-        
+        # Sections already transformed by a worker process: {prefix: [formatted entries]}
+        self.transformed_collector = {}
+        # Decompressed content of a compressed DEF, kept for every later call (see _open)
+        self._buffer = None
+        self._buffer_key = None
+
+    def close(self):
+        '''Release the decompressed content of a compressed DEF (the next call decompresses it again)'''
+        self._buffer = None
+        self._buffer_key = None
+        release_source(self.source_path)
+
+    def _file_key(self):
+        stat = os.stat(self.def_file_path)
+        return stat.st_size, stat.st_mtime_ns
 
+    def _keep_buffer(self, buffer):
+        # Entries read their lines back from this buffer instead of decompressing the file again
+        self._buffer = buffer or None
+        self._buffer_key = self._file_key()
+        if self._buffer is not None:
+            share_buffer(self.source_path, self._buffer)
+
+    def _decompressed(self):
+        '''Content of a compressed DEF, decompressed on the first call only (again if the file changed)'''
+        if self._buffer_key != self._file_key():
+            self.progress.begin("Decompressing DEF file", os.path.getsize(self.def_file_path))
+            self.progress.begin_section('decompress')
+            buffer = read_decompressed(self.def_file_path, detect_compression(self.def_file_path),
+                                       progress=self.progress.advance)
+            self.progress.finish()
+            self._keep_buffer(buffer)
+            self.section_index = {}
+        return self._buffer
+
+    @contextmanager
+    def _open(self, reindex=False):
+        '''
+        Content of the DEF, with self.section_index filled: an mmap of a plain file (closed on exit),
+        the decompressed buffer of a compressed one (kept for the next calls). None for an empty file.
+        '''
+        if detect_compression(self.def_file_path) is None:
+            mm = open_mmap(self.def_file_path)
+            try:
+                if reindex or not self.section_index:
+                    self.section_index = self.section_indexer.index(mm) if mm is not None else {}
+                yield mm
+            finally:
+                if mm is not None:
+                    mm.close()
+        else:
+            buffer = self._decompressed()
+            if reindex or not self.section_index:
+                self.section_index = self.section_indexer.index(buffer) if buffer is not None else {}
+            yield buffer
+
+    def _used_spans(self, spans):
+        # Only the headers, the small no-end blocks and the used sections are parsed;
+        # everything else (VIAS, SPECIALNETS, FILLS, ...) is skipped by offset
+        return [span for span in spans if span.keyword not in self.WithEndBlockList or span.keyword in self.used_prefix]
+
+    @_fresh_stats
     def parse(self):
-        # Get file size for progress tracking
-        file_size = os.path.getsize(self.def_file_path)
-        
-        # Main parse loop: for each line, find the right parser and delegate
-        with open(self.def_file_path, "r", encoding='utf-8', errors='ignore') as f:
-            # Create progress bar
-            with tqdm(total=file_size, unit='B', unit_scale=True, desc="Parsing DEF file") as pbar:
-                while line := f.readline():
-                    # Update progress bar
-                    pbar.update(len(line.encode('utf-8')))
-                    
-                    try:
-                        prefix = line.split()[0]
-                    except:
-                        continue
-                    if prefix in self.Header_list:
-                        self.block_collector[prefix] = self.header_parser.parse(f, line, prefix)
-                    elif prefix in self.NoEndBlockList:
-                        if prefix not in self.block_collector:
-                            self.block_collector[prefix] = []
-                        self.block_collector[prefix].append(self.block_parser_no_end.parse(f, line, prefix))
-                    elif prefix in self.WithEndBlockList:
-                        # Use enhanced parser for NETS to handle multi-line entries
-                        if prefix == "NETS" or prefix == "COMPONENTS":
-                            self.block_collector[prefix] = self.multiline_block_parser.parse(f, line, prefix)
-                        else:
-                            self.block_collector[prefix] = self.block_parser_with_end.parse(f, line, prefix)
-                    else:
-                        print(f"Unknown prefix: {prefix}")
+        self.block_collector = {}
+        self.used_block_collector = {}
+        self.transformed_collector = {}
+
+        parallel = self.workers > 1
+        with ParallelSectionParser(self.def_file_path, self.workers) if parallel else nullcontext() as section_parser:
+            if detect_compression(self.def_file_path) is not None and self._buffer_key != self._file_key():
+                self._parse_stream(section_parser)
+            else:
+                # First pass: index the byte range of every top-level section.
+                with self._open(reindex=True) as mm:
+                    spans = self._used_spans(span for span_list in self.section_index.values() for span in span_list)
+                    spans.sort(key=lambda span: span.start)
+                    self.progress.begin("Parsing DEF file", sum(span.end - span.start for span in spans))
+                    section = None
+                    for span in spans:
+                        section = self._parse_or_submit(mm, span, section_parser, section)
+                    self.progress.finish()
+            if parallel:
+                self.transformed_collector.update(section_parser.results())
         
         for prefix in self.used_prefix:
             if prefix in self.block_collector:
                 self.used_block_collector[prefix] = self.block_collector[prefix]
         
 
-        component_list = component_block_transformer.transform(self.used_block_collector['COMPONENTS'])
-        # Use enhanced transformer for NETS
-        net_list = enhanced_net_block_transformer.transform(self.used_block_collector['NETS'])
+        if 'COMPONENTS' in self.transformed_collector:
+            component_list = self.transformed_collector['COMPONENTS']
+        else:
+            component_list = component_block_transformer.transform(self.used_block_collector['COMPONENTS'])
+        if 'NETS' in self.transformed_collector:
+            net_list = self.transformed_collector['NETS']
+        else:
+            # Use enhanced transformer for NETS
+            net_list = enhanced_net_block_transformer.transform(self.used_block_collector['NETS'])
         return {
             'components': component_list,
             'nets': net_list
         }
 
+    def _parse_stream(self, section_parser):
+        # Compressed DEF: every section is parsed (or submitted) as soon as the decompressed
+        # content holds all of it, so parsing keeps pace with decompression; the progress
+        # follows the decompressed bytes (against the decompressed size when the format records it)
+        # and every section counts its own byte range. The content is kept for the later calls.
+        buffer = DecompressedBuffer()
+        stream_index = self.section_indexer.stream()
+        compression = detect_compression(self.def_file_path)
+        self.progress.begin("Parsing DEF file", decompressed_size(self.def_file_path, compression))
+        section = None
+        for chunk in iter_decompressed(self.def_file_path, compression):
+            buffer += chunk
+            self.progress.advance(len(chunk), section_bytes=0)
+            for span in self._used_spans(stream_index.feed(buffer)):
+                section = self._parse_or_submit(buffer, span, section_parser, section, stream=True)
+        for span in self._used_spans(stream_index.feed(buffer, final=True)):
+            section = self._parse_or_submit(buffer, span, section_parser, section, stream=True)
+        self.progress.finish()
+        self.section_index = stream_index.sections
+        self._keep_buffer(buffer)
+
+    def _parse_or_submit(self, mm, span, section_parser, section, stream=False):
+        # Parse one span here, or hand it to a worker; return the section now being reported.
+        # While streaming, the overall progress is advanced by the decompression: only the
+        # section bytes and lines are counted here.
+        if section_parser is not None and span.keyword in SECTION_TRANSFORMERS:
+            # Large sections go to a worker; the rest is parsed here meanwhile
+            self.progress.begin_section(f"{span.keyword} (submitted)")
+            section_parser.submit(mm, span)
+            self.progress.advance(0 if stream else span.end - span.start, section_bytes=span.end - span.start)
+            return None
+        if span.keyword != section:
+            # Consecutive spans of the same keyword (ROW, TRACKS, ...) form one section
+            section = span.keyword
+            self.progress.begin_section(section)
+        f = self._parse_span(mm, span, progress=None if stream else self.progress)
+        if stream:
+            self.progress.advance(0, f.n_lines + 1, section_bytes=span.end - span.start)
+        else:
+            f.report_progress()
+            # Opening line and whatever the parser did not read
+            self.progress.advance(span.end - span.start - (f.pos - span.body_start), 1)
+        return section
+
+    @_fresh_stats
+    def parse_incremental(self, previous_state=None):
+        '''
+        Same result as parse() for COMPONENTS / NETS, but entries whose bytes did not change
+        since previous_state (returned by an earlier parse_incremental) are reused instead of
+        being tokenized again. Other sections are not parsed.
+        return (result, state); keep state for the next call (or save_state() it to disk).
+        '''
+        previous_state = previous_state or {}
+        result = {'components': [], 'nets': []}
+        state = {}
+        with self._open(reindex=True) as mm:
+            for prefix, key, block_transformer in (('COMPONENTS', 'components', component_block_transformer),
+                                                   ('NETS', 'nets', enhanced_net_block_transformer)):
+                spans = self.section_index.get(prefix, [])
+                if mm is None or not spans:
+                    continue
+                result[key], state[prefix], stats = update_section(
+                    mm, spans, prefix, block_transformer, previous_state.get(prefix), source=self.source_path)
+                self.progress.note(f"{prefix}: {stats.total} entries, {stats.reparsed} reparsed, {stats.reused} reused")
+        return result, state
+
+    @_fresh_stats
+    def parse_component_table_incremental(self, previous_state=None):
+        '''
+        Same result as parse_component_table(), but only the COMPONENTS entries that changed since
+        previous_state (returned by an earlier call) are tokenized again; when the instances did not
+        change, the ComponentTable of previous_state is patched in place and returned.
+        return (table, state, changed): changed are the row ids of the entries tokenized again.
+        '''
+        with self._open(reindex=True) as mm:
+            spans = self.section_index.get('COMPONENTS', []) if mm is not None else []
+            table, state, changed, stats = update_component_table(mm if mm is not None else b'', spans, previous_state)
+        self.progress.note(f"COMPONENTS: {stats.total} entries, {stats.reparsed} reparsed, {stats.reused} reused")
+        return table, state, changed
+
+    def iter_components(self):
+        '''
+        Yield formatted COMPONENTS entries one at a time, straight from the file.
+        Memory stays flat for a plain DEF only: a compressed DEF is decompressed and held in memory in full.
+        '''
+        yield from self._iter_section('COMPONENTS', component_block_transformer)
+
+    def iter_nets(self):
+        '''
+        Yield formatted NETS entries one at a time, straight from the file.
+        Memory stays flat for a plain DEF only: a compressed DEF is decompressed and held in memory in full.
+        '''
+        yield from self._iter_section('NETS', enhanced_net_block_transformer)
+
+    @_fresh_stats
+    def parse_component_table(self):
+        '''
+        Parse the COMPONENTS section straight into a columnar ComponentTable
+        (no per-instance dicts are built)
+        '''
+        if self.workers > 1:
+            return merge_component_columns(self._parse_columns('COMPONENTS'))
+        if self.engine == 'bytes':
+            return self._parse_bytes('COMPONENTS', parse_component_table_bytes)
+        return component_table_transformer.transform(self._iter_raw_sections('COMPONENTS'))
+
+    @_fresh_stats
+    def parse_net_csr(self, component_table=None):
+        '''
+        Parse the NETS section straight into a NetPinCSR. Instances are numbered as in
+        component_table (parsed from the file when not given).
+        '''
+        if component_table is None:
+            component_table = self.parse_component_table()
+        if self.workers > 1:
+            instances = (component_table.name_offsets, component_table.name_buffer, component_table.cell_ids)
+            return merge_net_columns(self._parse_columns('NETS', instances), component_table)
+        if self.engine == 'bytes':
+            return self._parse_bytes('NETS', parse_net_csr_bytes, component_table)
+        return net_csr_transformer.transform(self._iter_raw_sections('NETS'), component_table)
+
+    @_fresh_stats
+    def parse_io_pins(self, net_csr=None):
+        '''
+        Parse the PINS section straight into a columnar IOPinTable. With net_csr, the net ids
+        of the pins are the net ids of net_csr (and of the DesignDB built from it).
+        '''
+        names = None
+        if net_csr is not None:
+            names = net_csr.names
+            if names is None:
+                names = DesignNames()
+                names.nets = NameTable.from_buffer(net_csr.name_offsets, net_csr.name_buffer)
+        return io_pin_table_transformer.transform(self._iter_raw_sections('PINS'), names)
+
+    @_fresh_stats
+    def parse_routing(self, section='NETS', via_layers=None):
+        '''
+        RoutingGeometry of the wiring of section ('NETS' or 'SPECIALNETS'): segment, via and
+        rect arrays, read in chunks straight from the file. via_layers ({via: (layer, layer)})
+        lets paths change layer at vias.
+        '''
+        return self._parse_bytes(section, parse_routing, section, via_layers)
+
+    @_fresh_stats
+    def parse_floorplan(self):
+        '''Floorplan of the DIEAREA / ROW / TRACKS / GCELLGRID statements (die, rows, tracks, gcell grid arrays)'''
+        with self._open() as mm:
+            if mm is None:
+                return parse_floorplan(b'', {})
+            return parse_floorplan(mm, self.section_index)
+
+    @_fresh_stats
+    def parse_hierarchy(self, component_table=None):
+        '''
+        HierarchyTrie of the instance names (split on the DIVIDERCHAR of the header), with the
+        instance ids of component_table (parsed from the file when not given)
+        '''
+        if component_table is None:
+            component_table = self.parse_component_table()
+        return HierarchyTrie.build(component_table.instance_names(), divider_char(self._header_line('DIVIDERCHAR')))
+
+    @_fresh_stats
+    def parse_design_db(self):
+        '''
+        DesignDB of COMPONENTS / NETS: instance -> cell, cell -> instances, net -> pins and
+        instance -> nets indexes over the ComponentTable and NetPinCSR names
+        '''
+        component_table = self.parse_component_table()
+        return DesignDB.from_tables(component_table, self.parse_net_csr(component_table))
+
+    def _parse_bytes(self, prefix, parse, *args):
+        # Byte engine: parse(mm, spans of prefix, *args) on the undecoded file
+        with self._open() as mm:
+            if mm is None:
+                return parse(b'', [], *args)
+            return parse(mm, self.section_index.get(prefix, []), *args)
+
+    def _parse_columns(self, prefix, instances=None):
+        # Parallel columnar path: the chunk columns of the prefix sections, in file order
+        with self._open() as mm:
+            if mm is None:
+                return []
+            with ParallelSectionParser(self.def_file_path, self.workers, instances=instances) as section_parser:
+                for span in self.section_index.get(prefix, []):
+                    section_parser.submit_columns(mm, span, self.engine)
+                return section_parser.column_results(prefix)
+
+    def _header_line(self, keyword):
+        with self._open() as mm:
+            spans = self.section_index.get(keyword)
+            if mm is None or not spans:
+                return None
+            return mm[spans[0].start:spans[0].end].decode('utf-8', errors='ignore')
+
+    def writer(self):
+        '''DefWriter that writes this DEF back out with replaced / patched sections'''
+        # A compressed DEF is written from the content decompressed here, not decompressed again
+        buffer = self._decompressed() if detect_compression(self.def_file_path) is not None else None
+        return DefWriter(self.def_file_path, self.section_indexer, buffer=buffer)
+
+    def _iter_section(self, prefix, block_transformer):
+        yield from block_transformer.iter_transform(self._iter_raw_sections(prefix))
+
+    def _iter_raw_sections(self, prefix):
+        # Nothing is collected, but a compressed DEF is still held decompressed in memory (see _decompressed)
+        with self._open() as mm:
+            if mm is None:
+                return
+            for span in self.section_index.get(prefix, []):
+                f = SectionReader(mm, span.body_start, span.end, source=self.source_path)
+                line = mm[span.start:span.body_start].decode('utf-8', errors='ignore')
+                yield from self.multiline_block_parser.iter_parse(f, line, prefix)
+
+    def _parse_span(self, mm, span, progress=None):
+        # Delegate one indexed section to the right parser, return its reader
+        prefix = span.keyword
+        f = SectionReader(mm, span.body_start, span.end, progress=progress, source=self.source_path)
+        line = mm[span.start:span.body_start].decode('utf-8', errors='ignore')
+        if prefix in self.Header_list:
+            self.block_collector[prefix] = self.header_parser.parse(f, line, prefix)
+        elif prefix in self.NoEndBlockList:
+            if prefix not in self.block_collector:
+                self.block_collector[prefix] = []
+            self.block_collector[prefix].append(self.block_parser_no_end.parse(f, line, prefix))
+        else:
+            # Use enhanced parser for NETS to handle multi-line entries;
+            # the entries of a repeated section follow those of the earlier ones
+            if prefix == "NETS" or prefix == "COMPONENTS":
+                self.block_collector.setdefault(prefix, []).extend(self.multiline_block_parser.parse(f, line, prefix))
+            else:
+                self.block_collector.setdefault(prefix, []).extend(self.block_parser_with_end.parse(f, line, prefix))
+        return f
+
 parser = argparse.ArgumentParser()
 parser.add_argument('--def_path', type=str, default='test_data/complete.5.8.def', help='Path to the DEF file')
 parser.add_argument('--output_dir', type=str, default='./tmp', help='Path to the output file')
-args = parser.parse_args()
-def_path = args.def_path
-output_dir = args.output_dir
+parser.add_argument('--workers', type=int, default=1, help='Number of worker processes for COMPONENTS/NETS (1 = serial)')
+parser.add_argument('--output_format', type=str, default='design', choices=['design', 'pickle'], help='def_outputs.design (mmap store) or the legacy def_outputs.pkl')
+parser.add_argument('--cache_dir', type=str, default=DEFAULT_CACHE_DIR, help='Parse cache directory')
+parser.add_argument('--cache_size_gb', type=float, default=DEFAULT_MAX_BYTES / (1 << 30), help='Disk budget of the parse cache, least recently used entries are evicted')
+parser.add_argument('--cache', action='store_true', help='Restore unchanged DEFs from the parse cache and store new results in it (off by default)')
+parser.add_argument('--no_cache', action='store_true', help='Do not use the parse cache, even with --cache')
+parser.add_argument('--progress', type=str, default='tqdm', choices=sorted(PROGRESS_REPORTERS), help='Progress reporting: tqdm bar, log lines or silent')
+parser.add_argument('--min_degree', type=int, default=2, help='Drop nets with fewer instance connections (nets without any are kept unless --drop_io_only)')
+parser.add_argument('--max_degree', type=int, default=None, help='Drop nets with more instance connections')
+parser.add_argument('--drop_io_only', action='store_true', help='Drop nets that connect no instance (IO pins only)')
+parser.add_argument('--drop_power_nets', action='store_true', help='Drop power / ground nets (VDD, VSS, GND, ...)')
 
 Header_list = set([
     "VERSION",
@@ -117,15 +470,11 @@ NoEndBlockList = set([
 
 used_prefix = ['COMPONENTS', 'NETS']
 
-if __name__ == "__main__":
-    logger.info("Start parsing DEF file")
-    def_parser =  DefParser(def_path, Header_list, NoEndBlockList, WithEndBlockList, used_prefix) # DefParser("/home/lewis/1project/def_lef_py/test_data/complete.5.8.def", Header_list, NoEndBlockList, WithEndBlockList, used_prefix)
-    def_content = def_parser.parse()
-    logger.info("Finish parsing DEF file")
-
+def build_def_output(def_content, net_filter=None, show_progress=True):
+    '''Turn the parsed components / nets into the def_outputs dicts, keeping the nets that pass net_filter'''
     instance2id = { ins_dict['ins_name']: index for index , ins_dict in enumerate(def_content['components'])}
     id2instance_info = {}
-    for i, comp in tqdm(enumerate(def_content['components'])):
+    for i, comp in tqdm(enumerate(def_content['components']), disable=not show_progress):
         if 'placementInfo' in comp:
             id2instance_info[i] = {
                 'instance_name': comp['ins_name'],
@@ -139,27 +488,63 @@ if __name__ == "__main__":
             }
     
     
-    net2id = { net_dict['net_name']: index for index, net_dict in enumerate(def_content['nets'])}
+    # Drop the nets rejected by net_filter (single-pin nets by default) and renumber the others
+    if net_filter is None:
+        net_filter = NetFilter(min_degree=2)
+    kept, _ = net_filter.filter_nets(def_content['nets'])
+    nets = def_content['nets']
+    net2id = {}
     id2net_info = {}
-    for i, net in tqdm(enumerate(def_content['nets'])):
-        id2net_info[i] = {
+    for new_id, old_id in enumerate(tqdm(kept.tolist(), disable=not show_progress)):
+        net = nets[old_id]
+        net2id[net['net_name']] = new_id
+        id2net_info[new_id] = {
             'net_name': net['net_name'],
             'connections': [{'instance_name': ins_pin_dict['ins_name'] , 'pin_name': ins_pin_dict['pin_name'] }
                             for ins_pin_dict in net['connections'] if ins_pin_dict['ins_name'] != 'PIN']
         }
-    
-    # Delete all cell with only one instance
-    seen = set([])
-    current_keys = [ele for ele in id2net_info.keys()]
-    for key in current_keys:
-        if key not in seen:
-            seen.add(key)
-            if len(id2net_info[key]['connections']) == 1:
-                del id2net_info[key]
-                current_keys.remove(key)
-    
-    def_output = {'instance2id': instance2id, 'id2instanceInfo': id2instance_info, 'net2id': net2id, 'id2NetInfo': id2net_info}
-    with open(output_dir + '/def_outputs.pkl', 'wb') as f:
-        pickle.dump(def_output, f)
-    
-        
\ No newline at end of file
+
+    return {'instance2id': instance2id, 'id2instanceInfo': id2instance_info, 'net2id': net2id, 'id2NetInfo': id2net_info}
+
+def parse_def_file(def_path, output_path, output_format='design', net_filter=None, workers=1, progress='tqdm', cache=None):
+    '''
+    Parse def_path and write its def_outputs to output_path (design store or pickle), going through
+    the parse cache when one is given. return the number of (instances, nets) written, None on a cache hit
+    '''
+    if net_filter is None:
+        net_filter = NetFilter(min_degree=2)
+    # An unchanged DEF (same content, parser version and options) is restored from the cache
+    if cache is not None:
+        cache_key = cache.key(def_path, PARSER_VERSION, {
+            'used_prefix': sorted(used_prefix), 'output_format': output_format,
+            'net_filter': [net_filter.min_degree, net_filter.max_degree, net_filter.drop_io_only,
+                           net_filter.drop_power, net_filter.power_pattern.pattern],
+        })
+        if cache.fetch(cache_key, output_path):
+            logger.info(f"Parse cache hit, {output_path} restored from {cache.cache_dir}")
+            return None
+
+    logger.info("Start parsing DEF file")
+    def_parser =  DefParser(def_path, Header_list, NoEndBlockList, WithEndBlockList, used_prefix, workers=workers, progress=progress) # DefParser("/home/lewis/1project/def_lef_py/test_data/complete.5.8.def", Header_list, NoEndBlockList, WithEndBlockList, used_prefix)
+    def_content = def_parser.parse()
+    logger.info("Finish parsing DEF file")
+
+    def_output = build_def_output(def_content, net_filter, show_progress=progress != 'silent')
+    if output_format == 'pickle':
+        with open(output_path, 'wb') as f:
+            pickle.dump(def_output, f)
+    else:
+        save_def_output(output_path, def_output)
+    if cache is not None:
+        cache.store(cache_key, output_path)
+    return len(def_output['id2instanceInfo']), len(def_output['id2NetInfo'])
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    def_path = args.def_path
+    output_dir = args.output_dir
+    output_path = os.path.join(output_dir, 'def_outputs.pkl' if args.output_format == 'pickle' else 'def_outputs.design')
+
+    cache = None if args.no_cache or not args.cache else ParseCache(args.cache_dir, int(args.cache_size_gb * (1 << 30)))
+    net_filter = NetFilter(args.min_degree, args.max_degree, args.drop_io_only, args.drop_power_nets)
+    parse_def_file(def_path, output_path, args.output_format, net_filter, args.workers, args.progress, cache)
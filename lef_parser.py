@@ -15,6 +15,10 @@ import argparse
 parser = argparse.ArgumentParser(description='Parse LEF file and extract cell information')
 parser.add_argument('--lef_path', type=str, default='test_data/complete.5.8.lef', help='Path to the LEF file')
 parser.add_argument('--output_dir', type=str, default='cell_dict.json', help='Path to the output JSON file')
+parser.add_argument('--cache_dir', type=str, default=None, help='Parse cache directory')
+parser.add_argument('--cache_size_gb', type=float, default=None, help='Disk budget of the parse cache, least recently used entries are evicted')
+parser.add_argument('--cache', action='store_true', help='Restore unchanged LEFs from the parse cache and store new results in it (off by default)')
+parser.add_argument('--no_cache', action='store_true', help='Do not use the parse cache, even with --cache')
 args = parser.parse_args()
 
 lef_path = args.lef_path
@@ -23,38 +27,11 @@ output_dir = args.output_dir
 # Add the src directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.lef_parser import LEFParser, parse_lef_file
+from src.lef_parser import LEFParser, parse_lef_file, let2format
+from src.parse_cache import ParseCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
 
-def let2format(result):
-    cell_dict = {}
-    for block_name, block_list in result['blocks'].items():
-        block = block_list[0]
-
-        if block_name.startswith('MACRO_'):
-            cell_name = block_name.split('_')[1]
-            cell_dict[cell_name] = {'pins': {}}
-            if 'sub_blocks' not in block:
-                continue
-            if 'PIN' not in block['sub_blocks']:
-                continue
-
-            for pin_info in block['sub_blocks']['PIN']:
-                pin_name = pin_info['name']
-                if 'direction' in pin_info['attributes']:
-                    direction = pin_info['attributes']['direction']
-
-                    if direction == 'INPUT':
-                        cell_dict[cell_name]['pins'][pin_name] = { 'direction': -1}
-                    elif direction == 'OUTPUT':
-                        cell_dict[cell_name]['pins'][pin_name] = { 'direction': 1}
-                    else:
-                        cell_dict[cell_name]['pins'][pin_name] = {}
-                else:
-                    continue
-            
-    return cell_dict
-
-            
+# Bump when the output of get_cell_dict changes, so cached results of older versions are not reused
+PARSER_VERSION = 1
 
 def get_cell_dict(lef_path):
     """Test the LEF parser with the complete.5.8.lef file"""
@@ -247,17 +224,31 @@ def save_parsed_structure(result, output_file="parsed_lef_structure.json"):
     print(f"\nSimplified structure saved to {output_file}")
 
 if __name__ == "__main__":
+    output_path = output_dir + '/lef_outputs.pkl'
+
+    # An unchanged LEF (same content and parser version) is restored from the cache
+    cache = None
+    if args.cache and not args.no_cache:
+        cache = ParseCache(args.cache_dir or DEFAULT_CACHE_DIR,
+                           int(args.cache_size_gb * (1 << 30)) if args.cache_size_gb else DEFAULT_MAX_BYTES)
+        cache_key = cache.key(lef_path, PARSER_VERSION)
+    if cache is not None and cache.fetch(cache_key, output_path):
+        print(f"Parse cache hit, {output_path} restored from {cache.cache_dir}")
+        sys.exit(0)
+
     # Test the parser
     cell_dict = get_cell_dict(lef_path)
     lef_output = {'cell_dict': cell_dict}
     
     try:
-        with open(output_dir + '/lef_outputs.pkl', 'wb') as f:
+        with open(output_path, 'wb') as f:
             pickle.dump(lef_output, f)
     except Exception as e:
-        fb = open(output_dir + '/lef_outputs.pkl', 'wb')
+        fb = open(output_path, 'wb')
         pickle.dump(lef_output, fb)
         fb.close()
+    if cache is not None:
+        cache.store(cache_key, output_path)
     # if result:
     #     # Show detailed hierarchy for INV macro
     #     extract_macro_hierarchy(result)
@@ -1,8 +1,11 @@
+import os
 import subprocess
 import argparse
 import pickle
 import pandas as pd
 from tqdm import tqdm
+from src.design_store import open_design
+from src._def.design_db import DesignDB
 parser = argparse.ArgumentParser(description='given def path, return instance/net dict to -o ')
 parser.add_argument('--def_lef_folder', type = str, default="../tmp" )
 parser.add_argument('--net_cell_mat_path', type = str, default="./tmp/net_cell_mat.pkl" )
@@ -14,32 +17,36 @@ net_cell_mat_path = args.net_cell_mat_path
 net_2_block_path = args.net_2_block_path
 output_dir = args.def_lef_folder
 
-with open(output_dir + '/def_outputs.pkl', 'rb') as file:
-    def_output = pickle.load( file)
+# def_outputs.design is mmapped and read lazily; def_outputs.pkl is the legacy format
+if os.path.exists(output_dir + '/def_outputs.design'):
+    def_output = open_design(output_dir + '/def_outputs.design')
+else:
+    with open(output_dir + '/def_outputs.pkl', 'rb') as file:
+        def_output = pickle.load( file)
 with open(output_dir + '/lef_outputs.pkl', 'rb') as file:
     lef_output = pickle.load( file)
 
-id2instanceInfo = def_output['id2instanceInfo']
-instance2id = def_output['instance2id']
-net2id = def_output['net2id']
-id2NetInfo = def_output['id2NetInfo']
+# Instance -> cell and net -> pins indexes, built once
+design_db = DesignDB.from_def_output(def_output)
 
 cell_dict = lef_output['cell_dict']
 
 def net_cell_mat_gen():
     net_2_block = {}
     mat_collector = []
-    for index in tqdm(id2NetInfo.keys()):
-        piece = id2NetInfo[index]
-        if len(piece['connections']) == 1:
+    for index in tqdm(design_db.net_ids.tolist()):
+        net_name = design_db.nets[index]
+        inst_ids, pin_ids = design_db.net_pins(index)
+        if len(inst_ids) == 1:
             continue
         
         net_block = []
 
-        for connect in piece['connections']:
-            assert connect['instance_name'] == id2instanceInfo[instance2id[connect['instance_name']]]['instance_name']
-            cell_name = id2instanceInfo[instance2id[connect['instance_name']]]['cell_name']
-            pin_name = connect['pin_name']
+        for inst_id, pin_id in zip(inst_ids.tolist(), pin_ids.tolist()):
+            assert design_db.is_component(inst_id)
+            instance_name = design_db.instances[inst_id]
+            cell_name = design_db.cell_name(inst_id)
+            pin_name = design_db.pins[pin_id]
             
             if 'direction' not in cell_dict[cell_name]['pins'][pin_name]:
                 print('direction not in ', cell_name, pin_name)
@@ -54,9 +61,9 @@ def net_cell_mat_gen():
             
             row = {
                 'i': index,
-                'j': instance2id[connect['instance_name']],
-                'instance_name': connect['instance_name'],
-                'net_name_set': set([piece['net_name']]),
+                'j': inst_id,
+                'instance_name': instance_name,
+                'net_name_set': set([net_name]),
                 'pin_name': pin_name,
                 'cell_name': cell_name,
                 'DS': cell_dict[cell_name]['pins'][pin_name]['direction'],
@@ -64,30 +71,30 @@ def net_cell_mat_gen():
             }
             mat_collector.append(row)
             net_block.append(row)
-        net_2_block[piece['net_name']] = pd.DataFrame(net_block)
+        net_2_block[net_name] = pd.DataFrame(net_block)
     net_cell_mat = pd.DataFrame(mat_collector)
     return net_cell_mat, net_2_block
 
 def net_instance_dict_gen():
     net_instance_dict = {}
-    for index in tqdm(id2NetInfo.keys()):
+    for index in tqdm(design_db.net_ids.tolist()):
         
-        piece = id2NetInfo[index]
+        net_name = design_db.nets[index]
+        inst_ids, pin_ids = design_db.net_pins(index)
         
-        if len(piece['connections']) == 1:
-            print(piece['net_name'], len(piece['connections']))
+        if len(inst_ids) == 1:
+            print(net_name, len(inst_ids))
             # breakpoint()
             continue
         driver_collect = []
         sin_collect = []
         
-        for connect in piece['connections']:
-            try:
-                assert connect['instance_name'] == id2instanceInfo[instance2id[connect['instance_name']]]['instance_name']
-            except:
+        for inst_id, pin_id in zip(inst_ids.tolist(), pin_ids.tolist()):
+            if not design_db.is_component(inst_id):
                 breakpoint()
-            cell_name = id2instanceInfo[instance2id[connect['instance_name']]]['cell_name']
-            pin_name = connect['pin_name']
+            instance_name = design_db.instances[inst_id]
+            cell_name = design_db.cell_name(inst_id)
+            pin_name = design_db.pins[pin_id]
             
             if cell_name not in cell_dict:
                 breakpoint()
@@ -99,14 +106,14 @@ def net_instance_dict_gen():
             #     breakpoint()
             
             if cell_dict[cell_name]['pins'][pin_name]['direction'] == 1:
-                driver_collect.append(connect['instance_name'])
+                driver_collect.append(instance_name)
                 
             elif cell_dict[cell_name]['pins'][pin_name]['direction'] == -1:
-                sin_collect.append(connect['instance_name'])
+                sin_collect.append(instance_name)
                 
             else:
                 assert NotImplementedError
-        net_instance_dict[piece['net_name']] = (tuple(driver_collect), tuple(sin_collect) )
+        net_instance_dict[net_name] = (tuple(driver_collect), tuple(sin_collect) )
     return net_instance_dict
 
 net_instance_dict = net_instance_dict_gen()
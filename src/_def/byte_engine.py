@@ -0,0 +1,69 @@
+'''
+Byte-oriented parsing of COMPONENTS / NETS.
+
+The text path decodes every line of a section to str, tokenizes it and builds the
+columns from str tokens. Here the entries are matched by bytes regexes directly on
+the mmap of the file: nothing is decoded, the instance and net names are appended
+to the name buffers as they are, and only cell and pin names are decoded, once each
+when they are first seen (they are interned by their raw bytes).
+
+    table = parse_component_table_bytes(mm, section_index['COMPONENTS'])
+    csr = parse_net_csr_bytes(mm, section_index['NETS'], table)
+
+The result is the same ComponentTable / NetPinCSR as the text path for files written
+the usual way (ASCII names, "- name" entries starting a line, ";" closing an entry).
+'''
+import re
+
+from .component_table import ComponentTableBuilder, ComponentTable, ORIENT_CODE, ORIENT_UNKNOWN, STATUS_CODE
+from .net_csr import NetPinCSRBuilder, NetPinCSR
+
+# "- compName modelName ... ;" (a missing model name is an UNKNOWN entry, as in the text path)
+_COMPONENT = re.compile(rb'^[ \t]*-[ \t\r\n]+([^\s;]+)(?:\s+([^\s;]+))?([^;]*);', re.M)
+# "+ PLACED ( x y ) orient" and the other placement statuses
+_PLACEMENT = re.compile(rb'(?<!\S)\+\s*(UNPLACED|PLACED|FIXED|COVER)(?!\S)(?:\s*\(\s*(-?\d+)\s+(-?\d+)\s*\)\s*([^\s;+]+))?')
+# "- netName ... ;"
+_NET = re.compile(rb'^[ \t]*-[ \t\r\n]+([^\s;]+)([^;]*);', re.M)
+# A "( ins pin ... )" connection, or the first "+" after the connections
+_CONNECTION = re.compile(rb'\(\s*([^\s()]+)\s+([^\s()]+)[^()]*\)|(?<!\S)\+')
+
+_STATUS_BYTES = {status.encode(): code for status, code in STATUS_CODE.items()}
+_ORIENT_BYTES = {orient.encode(): code for orient, code in ORIENT_CODE.items()}
+
+
+def parse_component_table_bytes(mm, spans) -> ComponentTable:
+    '''ComponentTable of the COMPONENTS spans of the mmap / buffer mm'''
+    builder = ComponentTableBuilder()
+    for span in spans:
+        for match in _COMPONENT.finditer(mm, span.body_start, span.end):
+            ins_name, cell_name = match.group(1, 2)
+            if cell_name is None:
+                builder.add('UNKNOWN', 'UNKNOWN')
+                continue
+            x = y = 0
+            orient = ORIENT_UNKNOWN
+            status = 0
+            # The last placement statement wins, as in ComponentTableBuilder.add_tokens
+            if b'+' in match.group(3):
+                for placement in _PLACEMENT.finditer(mm, match.start(3), match.end(3)):
+                    status = _STATUS_BYTES[placement.group(1)]
+                    if placement.group(2) is not None:
+                        x, y = int(placement.group(2)), int(placement.group(3))
+                        orient = _ORIENT_BYTES.get(placement.group(4), ORIENT_UNKNOWN)
+            builder.add_raw(ins_name, cell_name, x, y, orient, status)
+    return builder.build()
+
+
+def parse_net_csr_bytes(mm, spans, component_table) -> NetPinCSR:
+    '''NetPinCSR of the NETS spans of the mmap / buffer mm, instances numbered as in component_table'''
+    builder = NetPinCSRBuilder(component_table)
+    for span in spans:
+        for match in _NET.finditer(mm, span.body_start, span.end):
+            connections = []
+            # The connections come first; the wiring after the first "+" is not scanned
+            for connection in _CONNECTION.finditer(mm, match.start(2), match.end(2)):
+                if connection.group(1) is None:
+                    break
+                connections.append(connection.group(1, 2))
+            builder.add_raw(match.group(1), connections)
+    return builder.build()
@@ -0,0 +1,188 @@
+'''
+Columnar storage of the COMPONENTS section.
+
+ComponentHeadFormatter builds one dict per instance (plus a features dict and a
+placementInfo tuple); ComponentTable keeps the same information in a handful of
+NumPy arrays instead:
+
+    name_offsets  int64 [n + 1]  instance i is name_buffer[name_offsets[i]:name_offsets[i + 1]]
+    name_buffer   bytes          all instance names, utf-8, back to back
+    cell_ids      int32 [n]      index into cell_names (interned cell names)
+    x, y          int64 [n]      placement location, 0 when the instance has none
+    orient        int8  [n]      index into ORIENTATIONS, -1 when unknown
+    status        int8  [n]      index into PLACEMENT_STATUS
+
+ComponentTableTransformer fills the columns straight from the raw COMPONENTS
+entries, without going through the dict representation. The instance and cell
+names are interned in the DesignNames of the table (names): name_offsets /
+name_buffer are those of names.instances, cell_names is names.cells.
+'''
+from array import array
+from itertools import islice
+
+import numpy as np
+
+from .transformer.base import BlockTransformer
+from .transformer.specific import BulkLineSeperator
+from .name_table import DesignNames
+
+ORIENTATIONS = ('N', 'S', 'E', 'W', 'FN', 'FS', 'FE', 'FW')
+ORIENT_CODE = {orient: code for code, orient in enumerate(ORIENTATIONS)}
+ORIENT_UNKNOWN = -1
+
+PLACEMENT_STATUS = ('UNPLACED', 'PLACED', 'FIXED', 'COVER')
+STATUS_CODE = {status: code for code, status in enumerate(PLACEMENT_STATUS)}
+# Head line token -> status code
+_STATUS_TOKENS = {f'+ {status}': code for status, code in STATUS_CODE.items()}
+
+
+class ComponentTable:
+    '''
+    Columnar table of the instances of a design, see the module docstring for the columns.
+    '''
+    def __init__(self, name_offsets, name_buffer, cell_ids, cell_names, x, y, orient, status, names=None):
+        self.name_offsets = name_offsets
+        self.name_buffer = name_buffer
+        self.cell_ids = cell_ids
+        self.cell_names = cell_names
+        self.x = x
+        self.y = y
+        self.orient = orient
+        self.status = status
+        # DesignNames the names were interned in (None for a table built from plain arrays)
+        self.names = names
+
+    def __len__(self):
+        return len(self.cell_ids)
+
+    def instance_name(self, i):
+        return self.name_buffer[self.name_offsets[i]:self.name_offsets[i + 1]].decode('utf-8')
+
+    def instance_names(self):
+        '''All instance names, in table order'''
+        offsets = self.name_offsets.tolist()
+        buffer = self.name_buffer
+        return [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def cell_name(self, i):
+        return self.cell_names[self.cell_ids[i]]
+
+    def is_placed(self):
+        '''Boolean mask of the instances that have a location (PLACED, FIXED or COVER)'''
+        return self.status > STATUS_CODE['UNPLACED']
+
+    def row(self, i):
+        '''
+        Instance i in the id2instanceInfo layout of def_parser.py:
+        {'instance_name', 'cell_name'[, 'placementInfo': (x, y, orientation)]}
+        As there, placementInfo is only given for PLACED instances.
+        '''
+        info = {
+            'instance_name': self.instance_name(i),
+            'cell_name': self.cell_name(i),
+        }
+        if self.status[i] == STATUS_CODE['PLACED'] and self.orient[i] != ORIENT_UNKNOWN:
+            info['placementInfo'] = (int(self.x[i]), int(self.y[i]), ORIENTATIONS[self.orient[i]])
+        return info
+
+
+class ComponentTableBuilder:
+    '''
+    Append instances one at a time, then build() the ComponentTable.
+    Columns are accumulated in compact arrays, not in per-instance Python objects;
+    names go to names (a new DesignNames when not given), instance i being name i.
+    '''
+    def __init__(self, names=None):
+        self.names = names if names is not None else DesignNames()
+        if len(self.names.instances):
+            # Instance ids are rows: the instances of another table are not shared
+            self.names = self.names.fork('instances')
+        self.names = self.names.writable('instances', 'cells')
+        self.cell_ids = array('i')
+        self.x = array('q')
+        self.y = array('q')
+        self.orient = array('b')
+        self.status = array('b')
+
+    def add(self, ins_name, cell_name, x=0, y=0, orient=ORIENT_UNKNOWN, status=0):
+        self.names.instances.append(ins_name)
+        self.cell_ids.append(self.names.cells.intern(cell_name))
+        self.x.append(x)
+        self.y.append(y)
+        self.orient.append(orient)
+        self.status.append(status)
+
+    def add_raw(self, ins_name, cell_name, x=0, y=0, orient=ORIENT_UNKNOWN, status=0):
+        '''Same as add() with the names as utf-8 bytes, which are interned without decoding'''
+        self.names.instances.append_raw(ins_name)
+        self.cell_ids.append(self.names.cells.intern_raw(cell_name))
+        self.x.append(x)
+        self.y.append(y)
+        self.orient.append(orient)
+        self.status.append(status)
+
+    def add_tokens(self, seperate_components):
+        '''
+        Add one instance from the tokens of its head line:
+        - compName modelName + FEATURE value1 value2 ... + PLACED ( x y ) orient ...
+        Entries with less than 3 tokens are stored as UNKNOWN, like ComponentHeadFormatter.
+        '''
+        if len(seperate_components) < 3:
+            self.add('UNKNOWN', 'UNKNOWN')
+            return
+        x = y = 0
+        orient = ORIENT_UNKNOWN
+        status = 0
+        n_tokens = len(seperate_components)
+        for i in range(3, n_tokens):
+            code = _STATUS_TOKENS.get(seperate_components[i])
+            if code is None:
+                continue
+            status = code
+            if i + 2 < n_tokens:
+                coord_parts = seperate_components[i + 1].strip('() ').split()
+                if len(coord_parts) >= 2:
+                    try:
+                        x = int(coord_parts[0])
+                        y = int(coord_parts[1])
+                        orient = ORIENT_CODE.get(seperate_components[i + 2], ORIENT_UNKNOWN)
+                    except ValueError:
+                        x = y = 0
+        self.add(seperate_components[1], seperate_components[2], x, y, orient, status)
+
+    def build(self) -> ComponentTable:
+        instances = self.names.instances.freeze()
+        return ComponentTable(
+            name_offsets=instances.offsets,
+            name_buffer=instances.buffer,
+            cell_ids=np.frombuffer(self.cell_ids, dtype=np.int32).copy(),
+            cell_names=self.names.cells,
+            x=np.frombuffer(self.x, dtype=np.int64).copy(),
+            y=np.frombuffer(self.y, dtype=np.int64).copy(),
+            orient=np.frombuffer(self.orient, dtype=np.int8).copy(),
+            status=np.frombuffer(self.status, dtype=np.int8).copy(),
+            names=self.names,
+        )
+
+
+class ComponentTableTransformer(BlockTransformer):
+    '''
+    Transform the raw COMPONENTS entries of MultiLineBlockParserWithEnd into a ComponentTable.
+    input: any iterable of {'head_section': full_content, ...}
+    '''
+    batch_size = 2048
+
+    def __init__(self, line_seperator):
+        self.line_seperator = line_seperator
+
+    def transform(self, raw_sections) -> ComponentTable:
+        builder = ComponentTableBuilder()
+        raw_sections = iter(raw_sections)
+        while batch := list(islice(raw_sections, self.batch_size)):
+            head_lines = [raw_section['head_section'] for raw_section in batch]
+            for seperated_head_line in self.line_seperator.seperate_many(head_lines):
+                builder.add_tokens(seperated_head_line)
+        return builder.build()
+
+
+component_table_transformer = ComponentTableTransformer(BulkLineSeperator())
@@ -0,0 +1,251 @@
+'''
+Streaming DEF writer for round-tripping edited designs.
+
+The output is the source DEF with some sections replaced; everything else is
+copied verbatim as byte ranges of the (memory-mapped) source, so the cost of a
+rewrite is the cost of the edit plus a copy at disk bandwidth:
+
+    writer = DefWriter(def_path, section_indexer)
+    writer.update_components(table)                  # patch the placements edited in a ComponentTable
+    writer.replace_section('NETS', format_nets(csr, table))
+    writer.write(out_path)
+
+update_components() keeps every COMPONENTS entry as it is in the source (SOURCE,
+WEIGHT, REGION, ...) and only rewrites the "+ PLACED ( x y ) N" part of the
+instances whose placement differs from the table; runs of untouched entries are
+copied as one byte range. format_components() / format_nets() regenerate a whole
+section from the columnar data instead, which is what is needed when instances or
+nets were added or removed (only the data held by the columns is written: names,
+cells, placement / connections).
+
+ECOs are written from a ComponentTable, the one of DefParser.parse_component_table()
+or of parse_component_table_incremental(), which patches it in place on the next
+call. The dict lists of parse() and a DesignStore are not accepted: they do not keep
+the placement status (FIXED / COVER) the entries are patched with.
+'''
+import re
+
+from .component_table import ComponentTable, ORIENT_CODE, ORIENT_UNKNOWN, ORIENTATIONS, PLACEMENT_STATUS, STATUS_CODE
+from .incremental import iter_entry_spans
+from .net_csr import IO_PIN
+from src.parser.compression import open_buffer
+
+# Size of the writes of a verbatim byte range
+COPY_CHUNK_SIZE = 64 << 20
+# Number of table rows formatted per output chunk
+FORMAT_BATCH_SIZE = 4096
+
+_PLACEMENT = re.compile(
+    rb'\+\s+(PLACED|FIXED|COVER)\s+\(\s*(-?\d+)\s+(-?\d+)\s*\)\s*(FN|FS|FE|FW|N|S|E|W)\b|\+\s+(UNPLACED)\b'
+)
+
+
+class DefWriterError(ValueError):
+    pass
+
+
+def _placement_text(status, x, y, orient):
+    if status == STATUS_CODE['UNPLACED']:
+        return '+ UNPLACED'
+    orientation = ORIENTATIONS[orient] if orient != ORIENT_UNKNOWN else 'N'
+    return f'+ {PLACEMENT_STATUS[status]} ( {x} {y} ) {orientation}'
+
+
+def _source_placement(match):
+    '''(status, x, y, orient) of a _PLACEMENT match, None when the entry has no placement'''
+    if match is None:
+        return None
+    if match.group(5):
+        return STATUS_CODE['UNPLACED'], 0, 0, ORIENT_UNKNOWN
+    return (STATUS_CODE[match.group(1).decode()], int(match.group(2)), int(match.group(3)),
+            ORIENT_CODE[match.group(4).decode()])
+
+
+def patch_component_entry(entry, status, x, y, orient):
+    '''
+    Entry bytes with its placement set to (status, x, y, orient);
+    None when the entry already has that placement.
+    '''
+    match = _PLACEMENT.search(entry)
+    source = _source_placement(match)
+    if source is None:
+        if status == STATUS_CODE['UNPLACED']:
+            return None
+        # No placement yet: add it in front of the closing ';'
+        semicolon = entry.rindex(b';')
+        text = _placement_text(status, x, y, orient).encode()
+        return entry[:semicolon].rstrip() + b' ' + text + b' ' + entry[semicolon:]
+    if status == STATUS_CODE['UNPLACED']:
+        if source[0] == status:
+            return None
+    elif source == (status, x, y, orient):
+        return None
+    return entry[:match.start()] + _placement_text(status, x, y, orient).encode() + entry[match.end():]
+
+
+def format_components(table):
+    '''Yield a whole COMPONENTS section for the ComponentTable, as bytes chunks'''
+    n = len(table)
+    instance_names = table.instance_names()
+    yield f'COMPONENTS {n} ;\n'.encode()
+    for start in range(0, n, FORMAT_BATCH_SIZE):
+        end = min(start + FORMAT_BATCH_SIZE, n)
+        lines = []
+        for name, cell_id, status, x, y, orient in zip(
+                instance_names[start:end], table.cell_ids[start:end].tolist(), table.status[start:end].tolist(),
+                table.x[start:end].tolist(), table.y[start:end].tolist(), table.orient[start:end].tolist()):
+            if status == STATUS_CODE['UNPLACED']:
+                lines.append(f'- {name} {table.cell_names[cell_id]} ;\n')
+            else:
+                lines.append(f'- {name} {table.cell_names[cell_id]} {_placement_text(status, x, y, orient)} ;\n')
+        yield ''.join(lines).encode('utf-8')
+    yield b'END COMPONENTS\n'
+
+
+def format_nets(csr, table):
+    '''
+    Yield a whole NETS section for the NetPinCSR, as bytes chunks:
+    "- net ( instance pin ) ( PIN name ) ... ;". Routing is not part of the CSR and is not written;
+    connections to instances missing from the table (UNKNOWN_INSTANCE) are left out.
+    '''
+    n = len(csr)
+    instance_names = table.instance_names()
+    yield f'NETS {n} ;\n'.encode()
+    indptr = csr.indptr.tolist()
+    for start in range(0, n, FORMAT_BATCH_SIZE):
+        end = min(start + FORMAT_BATCH_SIZE, n)
+        inst_ids = csr.inst_ids[indptr[start]:indptr[end]].tolist()
+        pin_ids = csr.pin_ids[indptr[start]:indptr[end]].tolist()
+        lines = []
+        for i in range(start, end):
+            connections = []
+            for k in range(indptr[i] - indptr[start], indptr[i + 1] - indptr[start]):
+                inst_id = inst_ids[k]
+                if inst_id == IO_PIN:
+                    connections.append(f' ( PIN {csr.pin_names[pin_ids[k]]} )')
+                elif inst_id >= 0:
+                    connections.append(f' ( {instance_names[inst_id]} {csr.pin_names[pin_ids[k]]} )')
+            lines.append(f'- {csr.net_name(i)}{"".join(connections)} ;\n')
+        yield ''.join(lines).encode('utf-8')
+    yield b'END NETS\n'
+
+
+class DefWriter:
+    '''
+    Write the source DEF with replaced sections, see the module docstring.
+    section_indexer is the DefSectionIndexer of the parser (it knows the section keywords);
+    buffer, when given, is the content of the source already in memory (the DEF decompressed
+    by the parser), used instead of opening the file again.
+    '''
+    def __init__(self, def_file_path, section_indexer, buffer=None):
+        self.def_file_path = def_file_path
+        self.section_indexer = section_indexer
+        self.buffer = buffer
+        # keyword -> write_section(mm, spans, out); out is a _SectionOutput
+        self.replacements = {}
+
+    def replace_section(self, keyword, chunks):
+        '''
+        Replace the keyword section (its first occurrence; later ones are dropped) by chunks,
+        an iterable of bytes making up the whole section, END line included.
+        The chunks are consumed while writing.
+        '''
+        def write_section(mm, spans, out):
+            for chunk in chunks:
+                out.write(chunk)
+        self.replacements[keyword] = write_section
+
+    def update_components(self, table, changed=None):
+        '''
+        Patch the placement of the COMPONENTS entries from table, a ComponentTable which must hold
+        one row per source entry, in file order (as returned by DefParser.parse_component_table()
+        or parse_component_table_incremental()).
+        changed: optional row ids (or boolean mask) of the edited rows; only these entries are
+        looked at, the others are copied without being inspected.
+        '''
+        if not isinstance(table, ComponentTable):
+            raise DefWriterError(
+                f"update_components() takes a ComponentTable, not {type(table).__name__}; "
+                "parse it with DefParser.parse_component_table() and edit its x / y / orient / status columns"
+            )
+        self.replacements['COMPONENTS'] = lambda mm, spans, out: _patch_components(mm, spans, out, table, changed)
+
+    def write(self, output_path):
+        mm = self.buffer if self.buffer is not None else open_buffer(self.def_file_path)
+        if not mm:
+            raise DefWriterError(f"{self.def_file_path} is empty")
+        try:
+            section_index = self.section_indexer.index(mm)
+            missing = set(self.replacements) - set(section_index)
+            if missing:
+                raise DefWriterError(f"No {', '.join(sorted(missing))} section in {self.def_file_path}")
+            with open(output_path, 'wb') as f, memoryview(mm) as view:
+                out = _SectionOutput(view, f)
+                # Everything between the replaced sections is copied verbatim
+                spans = sorted((span for keyword in self.replacements for span in section_index[keyword]),
+                               key=lambda span: span.start)
+                pos = 0
+                for span in spans:
+                    out.copy(pos, span.start)
+                    pos = span.end
+                    if span is section_index[span.keyword][0]:
+                        self.replacements[span.keyword](mm, section_index[span.keyword], out)
+                out.copy(pos, len(mm))
+        finally:
+            if mm is not self.buffer:
+                mm.close()
+
+
+class _SectionOutput:
+    '''Output handed to the section writers: write() bytes or copy() a byte range of the source'''
+    def __init__(self, view, f):
+        self.view = view
+        self.f = f
+
+    def write(self, data):
+        self.f.write(data)
+
+    def copy(self, start, end):
+        for chunk_start in range(start, end, COPY_CHUNK_SIZE):
+            self.f.write(self.view[chunk_start:min(chunk_start + COPY_CHUNK_SIZE, end)])
+
+
+def _row_ids(changed):
+    if getattr(changed, 'dtype', None) == bool:
+        return changed.nonzero()[0].tolist()
+    return [int(i) for i in changed]
+
+
+def _patch_components(mm, spans, out, table, changed):
+    # Row i of the table is the i-th entry over all the COMPONENTS spans;
+    # the spans are written one after the other, in place of the first one
+    span_entries = [list(iter_entry_spans(mm, span.body_start, span.end)) for span in spans]
+    n_entries = sum(len(entries) for entries in span_entries)
+    if n_entries != len(table):
+        raise DefWriterError(
+            f"ComponentTable has {len(table)} rows but COMPONENTS has {n_entries} entries; "
+            "use replace_section('COMPONENTS', format_components(table)) for added or removed instances"
+        )
+    if changed is None:
+        rows = range(len(table))
+        status, x, y, orient = table.status.tolist(), table.x.tolist(), table.y.tolist(), table.orient.tolist()
+    else:
+        rows = sorted(set(_row_ids(changed)))
+        status, x, y, orient = table.status, table.x, table.y, table.orient
+
+    rows = iter(rows)
+    i = next(rows, None)
+    first_row = 0
+    for span, entries in zip(spans, span_entries):
+        pos = span.start
+        while i is not None and i < first_row + len(entries):
+            start, end = entries[i - first_row]
+            patched = patch_component_entry(mm[start:end], int(status[i]), int(x[i]), int(y[i]), int(orient[i]))
+            if patched is not None:
+                # Everything since the last patched entry goes out as one byte range
+                out.copy(pos, start)
+                out.write(patched)
+                pos = end
+            i = next(rows, None)
+        out.copy(pos, span.end)
+        first_row += len(entries)
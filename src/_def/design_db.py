@@ -0,0 +1,290 @@
+'''
+In-memory design database with the cross-indexes built once.
+
+main.py, IntegrationChecker and def_parser.py each rebuilt instance2id, ins2cell_dict
+or component_instance_name_set from the same lists. DesignDB holds the design as
+NameTables and flat arrays:
+
+    instances        NameTable     the n_components COMPONENTS first, then the instances
+                                   only seen in NETS (so they have an id and a name)
+    cells            NameTable
+    instance_cells   int32 [n_instances]   cell id, -1 for the instances not in COMPONENTS
+    nets             NameTable     net id -> name (row k of the arrays is net id k)
+    net_ids          int64 [m]     ids of the nets that have connection info
+    net_indptr       int64 [n_nets + 1]    connections of net k are [net_indptr[k], net_indptr[k + 1])
+    conn_instances   int32 [n_conns]       instance id, IO_PIN / UNKNOWN_INSTANCE as in NetPinCSR
+    conn_pins        int32 [n_conns]       pin name id in pins
+    pins             NameTable
+
+and computes the reverse indexes once, in __init__:
+
+    cell_indptr / cell_instances         instances of cell c are cell_instances[cell_indptr[c]:cell_indptr[c + 1]]
+    instance_indptr / instance_conns     connections of every instance, in net order (pin incidence)
+    conn_nets                            net of every connection
+
+name -> id goes through the NameTables (dict while building, crc32 hash index after compact()).
+
+    db = DesignDB.from_def_output(open_design('./tmp/def_outputs.design'))
+    u1 = db.instance_id('u1')
+    db.cell_name(u1), db.nets_of_instance(u1), db.instances_of_cell('INV_X1')
+    db.connections(db.net_id('n1'))     # [(instance name, pin name)]
+'''
+from array import array
+
+import numpy as np
+
+from .name_table import NameTable
+from .net_csr import IO_PIN
+
+
+class DesignDB:
+    '''Instances, cells, nets and pins of one design with their cross-indexes, see the module docstring'''
+    def __init__(self, instances, n_components, cells, instance_cells, nets, net_indptr,
+                 conn_instances, conn_pins, pins, net_ids=None):
+        self.instances = instances
+        self.n_components = n_components
+        self.cells = cells
+        self.instance_cells = instance_cells
+        self.nets = nets
+        self.net_indptr = net_indptr
+        self.conn_instances = conn_instances
+        self.conn_pins = conn_pins
+        self.pins = pins
+        self.net_ids = np.arange(len(nets), dtype=np.int64) if net_ids is None else net_ids
+
+        self.refresh_cells()
+        # instance -> connections (stable sort: the connections of an instance stay in net order)
+        self.conn_nets = np.repeat(np.arange(len(nets), dtype=np.int64), np.diff(net_indptr))
+        known = np.flatnonzero(conn_instances >= 0)
+        instance_of_known = conn_instances[known]
+        self.instance_conns = known[np.argsort(instance_of_known, kind='stable')]
+        self.instance_indptr = _indptr(np.bincount(instance_of_known, minlength=len(instances)))
+
+    @classmethod
+    def from_tables(cls, table, csr):
+        '''DesignDB of a ComponentTable and the NetPinCSR built against it (their NameTables are shared)'''
+        names = table.names
+        if names is not None and len(names.instances) == len(table):
+            instances, cells = names.instances, names.cells
+        else:
+            instances = NameTable.from_buffer(table.name_offsets, table.name_buffer)
+            cells = _name_table(table.cell_names)
+        if csr.names is not None:
+            nets = csr.names.nets
+        else:
+            nets = NameTable.from_buffer(csr.name_offsets, csr.name_buffer)
+        if csr.pin_name_ids is not None and isinstance(csr.pin_names.table, NameTable):
+            pins, pin_name_ids = csr.pin_names.table, csr.pin_name_ids
+        else:
+            pins = NameTable()
+            pin_name_ids = np.array([pins.intern(name) for name in csr.pin_names], dtype=np.int32)
+        return cls(instances, len(table), cells, table.cell_ids, nets, csr.indptr,
+                   csr.inst_ids, pin_name_ids[csr.pin_ids], pins)
+
+    @classmethod
+    def from_records(cls, components, nets):
+        '''
+        DesignDB of def_outputs-style records: components [{'instance_name', 'cell_name'}],
+        nets [{'net_name', 'connections': [{'instance_name', 'pin_name'}]}]
+        '''
+        builder = DesignDBBuilder()
+        for component in components:
+            builder.add_instance(component['instance_name'], component.get('cell_name'))
+        for net in nets:
+            builder.add_net(net['net_name'], ((conn['instance_name'], conn['pin_name']) for conn in net['connections']))
+        return builder.build()
+
+    @classmethod
+    def from_def_output(cls, def_output):
+        '''
+        DesignDB of the def_outputs of def_parser.py: the dicts of def_outputs.pkl, or a DesignStore
+        (read column by column, no per-instance dicts). Net ids are those of net2id.
+        '''
+        # Imported here: src.design_store is not needed by the rest of the parser
+        from src.design_store import DesignStore
+        if isinstance(def_output, DesignStore):
+            return cls._from_store(def_output)
+        id2instance_info = def_output['id2instanceInfo']
+        id2net_info = def_output['id2NetInfo']
+        builder = DesignDBBuilder()
+        for i in range(len(id2instance_info)):
+            info = id2instance_info[i]
+            builder.add_instance(info['instance_name'], info.get('cell_name'))
+        net_ids = sorted(id2net_info)
+        net_names = [''] * (max(list(def_output['net2id'].values()) + net_ids, default=-1) + 1)
+        for net_name, net_id in def_output['net2id'].items():
+            net_names[net_id] = net_name
+        # Same as save_def_output: a net name repeated in NETS is in net2id once only
+        for net_id in net_ids:
+            net_names[net_id] = id2net_info[net_id]['net_name']
+        for net_id, net_name in enumerate(net_names):
+            connections = id2net_info[net_id]['connections'] if net_id in id2net_info else ()
+            builder.add_net(net_name, ((conn['instance_name'], conn['pin_name']) for conn in connections))
+        return builder.build(net_ids=np.array(net_ids, dtype=np.int64))
+
+    @classmethod
+    def _from_store(cls, store):
+        # Instances only referenced by the nets are stored after the components, as here
+        n_components = len(store.column('cell_ids'))
+        instance_offsets = store.column('instance_names.offsets')
+        extra_offsets = store.column('extra_instance_names.offsets')
+        instances = NameTable.from_buffer(
+            np.concatenate([instance_offsets, extra_offsets[1:] + instance_offsets[-1]]),
+            store.column('instance_names.buffer').tobytes() + store.column('extra_instance_names.buffer').tobytes())
+        instance_cells = np.full(len(instances), -1, dtype=np.int32)
+        instance_cells[:n_components] = store.column('cell_ids')
+        nets = _store_table(store, 'net_names')
+        net_ids = store.column('net_ids').copy()
+        counts = np.zeros(len(nets), dtype=np.int64)
+        counts[net_ids] = np.diff(store.column('conn_indptr'))
+        return cls(instances, n_components, _store_table(store, 'cell_names'), instance_cells, nets, _indptr(counts),
+                   store.column('conn_instance_ids').copy(), store.column('conn_pin_ids').copy(),
+                   _store_table(store, 'pin_names'), net_ids=net_ids)
+
+    def refresh_cells(self):
+        '''
+        (Re)build the cell -> instances index from instance_cells, e.g. after
+        update_component_table() patched the cell_ids of the table this DesignDB was built from
+        '''
+        placed = np.flatnonzero(self.instance_cells >= 0)
+        cell_of_placed = self.instance_cells[placed]
+        self.cell_instances = placed[np.argsort(cell_of_placed, kind='stable')]
+        self.cell_indptr = _indptr(np.bincount(cell_of_placed, minlength=len(self.cells)))
+        return self
+
+    @property
+    def n_instances(self):
+        return len(self.instances)
+
+    @property
+    def n_nets(self):
+        return len(self.nets)
+
+    def compact(self):
+        '''Drop the dict indexes of the name tables (lookups use their hash index)'''
+        for table in (self.instances, self.cells, self.nets, self.pins):
+            table.compact()
+        return self
+
+    def instance_id(self, name):
+        '''Instance id of name, -1 when unknown'''
+        return self.instances.get(name)
+
+    def instance_ids(self, names):
+        return self.instances.ids(names)
+
+    def is_component(self, inst_id):
+        '''True for the instances of COMPONENTS (not for the ones only seen in NETS)'''
+        return 0 <= inst_id < self.n_components
+
+    def cell_name(self, inst_id):
+        '''Cell name of an instance, None when it is not in COMPONENTS'''
+        cell_id = int(self.instance_cells[inst_id])
+        return self.cells[cell_id] if cell_id >= 0 else None
+
+    def instances_of_cell(self, cell):
+        '''Instance ids of a cell (name or id)'''
+        cell_id = self.cells.get(cell) if isinstance(cell, str) else cell
+        if cell_id < 0:
+            return self.cell_instances[:0]
+        return self.cell_instances[self.cell_indptr[cell_id]:self.cell_indptr[cell_id + 1]]
+
+    def net_id(self, name):
+        return self.nets.get(name)
+
+    def net_pins(self, net_id):
+        '''(instance ids, pin name ids) of the connections of a net'''
+        start, end = self.net_indptr[net_id], self.net_indptr[net_id + 1]
+        return self.conn_instances[start:end], self.conn_pins[start:end]
+
+    def connections(self, net_id):
+        '''[(instance name, pin name)] of a net, instance "PIN" for IO pins'''
+        inst_ids, pin_ids = self.net_pins(net_id)
+        return [('PIN' if inst_id == IO_PIN else self.instances[inst_id] if inst_id >= 0 else None, self.pins[pin_id])
+                for inst_id, pin_id in zip(inst_ids.tolist(), pin_ids.tolist())]
+
+    def instance_pins(self, inst_id):
+        '''(net ids, pin name ids) of the connections of an instance'''
+        conns = self.instance_conns[self.instance_indptr[inst_id]:self.instance_indptr[inst_id + 1]]
+        return self.conn_nets[conns], self.conn_pins[conns]
+
+    def nets_of_instance(self, inst_id):
+        '''Distinct net ids an instance connects to'''
+        return np.unique(self.instance_pins(inst_id)[0])
+
+    def unknown_connections(self):
+        '''Connections whose instance is not in COMPONENTS'''
+        return np.flatnonzero(self.conn_instances >= self.n_components)
+
+
+class DesignDBBuilder:
+    '''
+    Collect instances, then nets, and build() a DesignDB. Connection instances missing from
+    the components get an id after them; "PIN" connections are IO pins.
+    '''
+    def __init__(self):
+        self.instances = NameTable()
+        self.cells = NameTable()
+        self.pins = NameTable()
+        self.nets = NameTable()
+        self.instance_cells = array('i')
+        self.n_components = None
+        self.net_indptr = array('q', [0])
+        self.conn_instances = array('i')
+        self.conn_pins = array('i')
+
+    def add_instance(self, name, cell_name):
+        if self.n_components is not None:
+            raise ValueError("add all the instances before the nets")
+        self.instances.append(name)
+        self.instance_cells.append(self.cells.intern(cell_name) if cell_name is not None else -1)
+
+    def add_net(self, net_name, connections):
+        '''connections: iterable of (instance name, pin name)'''
+        if self.n_components is None:
+            self.n_components = len(self.instances)
+        self.nets.append(net_name)
+        instances = self.instances
+        for ins_name, pin_name in connections:
+            if ins_name == 'PIN':
+                inst_id = IO_PIN
+            else:
+                inst_id = instances.get(ins_name)
+                if inst_id < 0:
+                    inst_id = instances.intern(ins_name)
+                    self.instance_cells.append(-1)
+            self.conn_instances.append(inst_id)
+            self.conn_pins.append(self.pins.intern(pin_name))
+        self.net_indptr.append(len(self.conn_instances))
+
+    def build(self, net_ids=None) -> DesignDB:
+        n_components = len(self.instances) if self.n_components is None else self.n_components
+        return DesignDB(
+            self.instances.freeze(), n_components, self.cells.freeze(),
+            np.frombuffer(self.instance_cells, dtype=np.int32).copy(),
+            self.nets.freeze(),
+            np.frombuffer(self.net_indptr, dtype=np.int64).copy(),
+            np.frombuffer(self.conn_instances, dtype=np.int32).copy(),
+            np.frombuffer(self.conn_pins, dtype=np.int32).copy(),
+            self.pins.freeze(),
+            net_ids=net_ids,
+        )
+
+
+def _indptr(counts):
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr
+
+
+def _name_table(names):
+    if isinstance(names, NameTable):
+        return names
+    table = NameTable()
+    for name in names:
+        table.append(name)
+    return table
+
+
+def _store_table(store, name):
+    return NameTable.from_buffer(store.column(f'{name}.offsets'), store.column(f'{name}.buffer').tobytes())
@@ -0,0 +1,365 @@
+'''
+Floorplan of a DEF: DIEAREA, ROW, TRACKS and GCELLGRID as arrays.
+
+    die           int64 [k, 2]   die polygon (a two point DIEAREA is expanded to its 4 corners)
+
+Rows, one per ROW statement:
+
+    row_name_offsets / row_name_buffer   row names, as the pin names of IOPinTable
+    row_site_ids  int32 [r]      index into site_names
+    row_x, row_y  int64 [r]      origin
+    row_orient    int8  [r]      index into ORIENTATIONS
+    row_num_x     int64 [r]      DO numX BY numY (1 when not given)
+    row_num_y
+    row_step_x    int64 [r]      STEP stepX stepY (0 when not given)
+    row_step_y
+
+Tracks, one per TRACKS statement and layer (a statement without LAYER applies to every
+layer and has layer id -1):
+
+    track_direction  int8  [t]   0 for X (vertical tracks at x = start + k * step), 1 for Y
+    track_layer_ids  int32 [t]   index into layer_names
+    track_start      int64 [t]
+    track_count      int64 [t]   DO numTracks
+    track_step       int64 [t]
+    track_mask       int8  [t]   MASK maskNum, 0 when not given
+
+Gcell grid, one per GCELLGRID statement: gcell_direction, gcell_start, gcell_count, gcell_step,
+with the same meaning (the count is the number of grid lines).
+
+The snapping methods take coordinate arrays and return arrays: nearest row, nearest
+site of the row, nearest track of a layer, gcell of a point. Distances are measured on
+the integer database units, and a point halfway between two candidates always goes to
+the lower one (lower row y, lower x, lower site or track coordinate):
+
+    nearest_row      horizontal rows only (DO numX BY 1); the nearest row y, then the row
+                     at that y whose span [row_x, last site origin] is closest in x. A point
+                     beyond the rows snaps to the first / last row y; -1 when there is no row.
+    snap_to_sites    the nearest site origin of that row, clamped to its first / last site:
+                     a point left or right of a row goes to its end site. Without a row the
+                     point is returned unchanged.
+    snap_to_tracks   the nearest track of the layer (TRACKS with LAYER, or without LAYER for
+                     every layer), clamped to the first / last track of each statement.
+                     Unchanged when the layer has no track in that direction.
+    gcell_of         the cell [line k, line k + 1) of the grid lines: a point on a line is in
+                     the cell above / right of it. -1 before the first or from the last line on.
+
+    floorplan = parser.parse_floorplan()
+    rows, x, y = floorplan.snap_to_sites(table.x, table.y)
+    y = floorplan.snap_to_tracks(pin_y, 'M1', 'Y')
+    column, row = floorplan.gcell_of(table.x, table.y)
+'''
+import re
+from array import array
+
+import numpy as np
+
+from .component_table import ORIENT_CODE, ORIENT_UNKNOWN
+
+DIRECTIONS = ('X', 'Y')
+DIRECTION_CODE = {direction: code for code, direction in enumerate(DIRECTIONS)}
+FLOORPLAN_KEYWORDS = ('DIEAREA', 'ROW', 'TRACKS', 'GCELLGRID')
+
+_POINT = re.compile(r'\(\s*(-?\d+)\s+(-?\d+)\s*\)')
+
+
+class Floorplan:
+    '''Die, rows, tracks and gcell grid of a design, see the module docstring'''
+    def __init__(self, die, row_name_offsets, row_name_buffer, row_site_ids, site_names, row_x, row_y,
+                 row_orient, row_num_x, row_num_y, row_step_x, row_step_y, track_direction, track_layer_ids,
+                 layer_names, track_start, track_count, track_step, track_mask, gcell_direction,
+                 gcell_start, gcell_count, gcell_step):
+        self.die = die
+        self.row_name_offsets = row_name_offsets
+        self.row_name_buffer = row_name_buffer
+        self.row_site_ids = row_site_ids
+        self.site_names = site_names
+        self.row_x = row_x
+        self.row_y = row_y
+        self.row_orient = row_orient
+        self.row_num_x = row_num_x
+        self.row_num_y = row_num_y
+        self.row_step_x = row_step_x
+        self.row_step_y = row_step_y
+        self.track_direction = track_direction
+        self.track_layer_ids = track_layer_ids
+        self.layer_names = layer_names
+        self.layer_index = {name: i for i, name in enumerate(layer_names)}
+        self.track_start = track_start
+        self.track_count = track_count
+        self.track_step = track_step
+        self.track_mask = track_mask
+        self.gcell_direction = gcell_direction
+        self.gcell_start = gcell_start
+        self.gcell_count = gcell_count
+        self.gcell_step = gcell_step
+        self._row_grid = None
+
+    def __len__(self):
+        '''Number of rows'''
+        return len(self.row_x)
+
+    def row_name(self, i):
+        return self.row_name_buffer[self.row_name_offsets[i]:self.row_name_offsets[i + 1]].decode('utf-8')
+
+    def row_names(self):
+        offsets = self.row_name_offsets.tolist()
+        buffer = self.row_name_buffer
+        return [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def die_bbox(self):
+        '''(xlo, ylo, xhi, yhi) of the die, None without DIEAREA'''
+        if len(self.die) == 0:
+            return None
+        return (int(self.die[:, 0].min()), int(self.die[:, 1].min()),
+                int(self.die[:, 0].max()), int(self.die[:, 1].max()))
+
+    def row_end(self):
+        '''(x, y) of the far corner of the last site origin of every row'''
+        return (self.row_x + (self.row_num_x - 1) * self.row_step_x,
+                self.row_y + (self.row_num_y - 1) * self.row_step_y)
+
+    def is_horizontal(self):
+        '''Rows of sites along x (DO numX BY 1)'''
+        return self.row_num_y == 1
+
+    def _rows_by_y(self):
+        # Horizontal rows sorted by (y, x); for each, the index of its y among the distinct ys
+        if self._row_grid is None:
+            rows = np.flatnonzero(self.is_horizontal())
+            rows = rows[np.lexsort((self.row_x[rows], self.row_y[rows]))]
+            ys, y_rank = np.unique(self.row_y[rows], return_inverse=True)
+            self._row_grid = rows, ys, y_rank
+        return self._row_grid
+
+    def nearest_row(self, x, y):
+        '''
+        Horizontal row closest to every point: the nearest row y, then among the rows at that
+        y the one whose span [row_x, last site] is closest in x. -1 when there is no row.
+        '''
+        x = np.asarray(x, dtype=np.int64)
+        y = np.asarray(y, dtype=np.int64)
+        rows, ys, y_rank = self._rows_by_y()
+        if len(rows) == 0:
+            return np.full(len(y), -1, dtype=np.int64)
+        level = _nearest(ys, y)
+        # Rows at a level are contiguous in rows; search x among the starts of the level
+        starts = np.searchsorted(y_rank, np.arange(len(ys)), 'left')
+        ends = np.searchsorted(y_rank, np.arange(len(ys)), 'right')
+        key = y_rank * (1 << 32) + (self.row_x[rows] - self.row_x.min())
+        position = np.searchsorted(key, level * (1 << 32) + np.clip(x - self.row_x.min(), 0, (1 << 32) - 1), 'right') - 1
+        left = np.clip(position, starts[level], ends[level] - 1)
+        right = np.minimum(left + 1, ends[level] - 1)
+        end_x, _ = self.row_end()
+        distance = [np.maximum(self.row_x[rows[k]] - x, 0) + np.maximum(x - end_x[rows[k]], 0) for k in (left, right)]
+        return rows[np.where(distance[1] < distance[0], right, left)]
+
+    def snap_to_rows(self, x, y):
+        '''(row ids, y snapped to the origin of the nearest row)'''
+        rows = self.nearest_row(x, y)
+        y = np.asarray(y, dtype=np.int64)
+        if len(self) == 0:
+            return rows, y.copy()
+        return rows, np.where(rows >= 0, self.row_y[rows], y)
+
+    def snap_to_sites(self, x, y):
+        '''(row ids, x, y) of the nearest site origin, on the nearest row'''
+        x = np.asarray(x, dtype=np.int64)
+        rows, snapped_y = self.snap_to_rows(x, y)
+        if len(self) == 0:
+            return rows, x.copy(), snapped_y
+        origin = self.row_x[rows]
+        step = self.row_step_x[rows]
+        site = np.clip(_nearest_step(x - origin, step), 0, self.row_num_x[rows] - 1)
+        return rows, np.where(rows >= 0, origin + site * step, x), snapped_y
+
+    def tracks(self, layer, direction):
+        '''Indices of the TRACKS rows of layer (a name) in direction ('X' or 'Y')'''
+        layer_id = self.layer_index.get(layer, -2)
+        return np.flatnonzero((self.track_direction == DIRECTION_CODE[direction])
+                              & ((self.track_layer_ids == layer_id) | (self.track_layer_ids == -1)))
+
+    def track_coordinates(self, layer, direction):
+        '''Sorted coordinates of all the tracks of layer in direction'''
+        return np.unique(np.concatenate([np.zeros(0, dtype=np.int64)] + [
+            self.track_start[k] + np.arange(self.track_count[k]) * self.track_step[k]
+            for k in self.tracks(layer, direction).tolist()
+        ]))
+
+    def snap_to_tracks(self, values, layer, direction):
+        '''
+        values (x for direction 'X', y for 'Y') moved to the nearest track of layer; unchanged
+        when the layer has no track in that direction
+        '''
+        values = np.asarray(values, dtype=np.int64)
+        best = values.copy()
+        best_distance = np.full(len(values), np.iinfo(np.int64).max)
+        # A layer has a few TRACKS statements (one per mask at most): loop over them
+        for k in self.tracks(layer, direction).tolist():
+            start, count, step = int(self.track_start[k]), int(self.track_count[k]), int(self.track_step[k])
+            index = _nearest_step(values - start, np.full(len(values), step))
+            snapped = start + np.clip(index, 0, count - 1) * step
+            distance = np.abs(snapped - values)
+            closer = (distance < best_distance) | ((distance == best_distance) & (snapped < best))
+            best[closer] = snapped[closer]
+            best_distance[closer] = distance[closer]
+        return best
+
+    def gcell_lines(self, direction):
+        '''Sorted grid line coordinates of the gcell grid in direction ('X': columns, 'Y': rows)'''
+        return np.unique(np.concatenate([np.zeros(0, dtype=np.int64)] + [
+            self.gcell_start[k] + np.arange(self.gcell_count[k]) * self.gcell_step[k]
+            for k in np.flatnonzero(self.gcell_direction == DIRECTION_CODE[direction]).tolist()
+        ]))
+
+    def gcell_of(self, x, y):
+        '''(column, row) of the gcell of every point, -1 outside of the grid'''
+        return tuple(_cell_of(self.gcell_lines(direction), np.asarray(values, dtype=np.int64))
+                     for direction, values in (('X', x), ('Y', y)))
+
+
+def _nearest(sorted_values, values):
+    '''Index of the nearest element of sorted_values for each of values'''
+    right = np.clip(np.searchsorted(sorted_values, values), 0, len(sorted_values) - 1)
+    left = np.maximum(right - 1, 0)
+    closer_left = np.abs(values - sorted_values[left]) <= np.abs(sorted_values[right] - values)
+    return np.where(closer_left, left, right)
+
+
+def _nearest_step(offsets, steps):
+    '''Index k of the multiple k * step nearest to each offset, the lower one on a tie; 0 where step is 0'''
+    steps = np.asarray(steps, dtype=np.int64)
+    safe = np.where(steps > 0, steps, 1)
+    # round(offset / step) with ties down, in integers: floor((2 * offset + step - 1) / (2 * step))
+    return np.where(steps > 0, (2 * offsets + safe - 1) // (2 * safe), 0)
+
+
+def _cell_of(lines, values):
+    cells = np.searchsorted(lines, values, 'right') - 1
+    return np.where((cells >= 0) & (cells < len(lines) - 1), cells, -1)
+
+
+class FloorplanBuilder:
+    '''Add the DIEAREA / ROW / TRACKS / GCELLGRID statements, then build() the Floorplan'''
+    def __init__(self):
+        self.die = []
+        self.row_name_offsets = array('q', [0])
+        self.row_name_buffer = bytearray()
+        self.row_site_ids = array('i')
+        self.site_names = []
+        self.site_index = {}
+        self.rows = array('q')
+        self.row_orient = array('b')
+        self.tracks = array('q')
+        self.track_layer_ids = array('i')
+        self.layer_names = []
+        self.layer_index = {}
+        self.gcells = array('q')
+
+    def _intern(self, names, index, name):
+        code = index.get(name)
+        if code is None:
+            code = index[name] = len(names)
+            names.append(name)
+        return code
+
+    def add_statement(self, text):
+        '''Add one statement, from its keyword to its ';' '''
+        tokens = text.replace(';', ' ; ').split()
+        if not tokens:
+            return
+        keyword = tokens[0]
+        if keyword == 'DIEAREA':
+            points = [(int(x), int(y)) for x, y in _POINT.findall(text)]
+            if len(points) == 2:
+                (xlo, ylo), (xhi, yhi) = points
+                points = [(xlo, ylo), (xlo, yhi), (xhi, yhi), (xhi, ylo)]
+            self.die = points
+        elif keyword == 'ROW' and len(tokens) >= 6:
+            self.add_row(tokens)
+        elif keyword == 'TRACKS' and len(tokens) >= 6:
+            self.add_tracks(tokens)
+        elif keyword == 'GCELLGRID' and len(tokens) >= 7:
+            # GCELLGRID {X | Y} start DO numColumns+1 STEP space ;
+            self.gcells.extend((DIRECTION_CODE.get(tokens[1], 0), int(tokens[2]), int(tokens[4]), int(tokens[6])))
+
+    def add_row(self, tokens):
+        # ROW rowName siteName origX origY siteOrient [DO numX BY numY [STEP stepX stepY]] ...
+        self.row_name_buffer += tokens[1].encode('utf-8')
+        self.row_name_offsets.append(len(self.row_name_buffer))
+        self.row_site_ids.append(self._intern(self.site_names, self.site_index, tokens[2]))
+        self.row_orient.append(ORIENT_CODE.get(tokens[5], ORIENT_UNKNOWN))
+        num_x, num_y, step_x, step_y = 1, 1, 0, 0
+        if len(tokens) > 9 and tokens[6] == 'DO' and tokens[8] == 'BY':
+            num_x, num_y = int(tokens[7]), int(tokens[9])
+            if len(tokens) > 12 and tokens[10] == 'STEP':
+                step_x, step_y = int(tokens[11]), int(tokens[12])
+        self.rows.extend((int(tokens[3]), int(tokens[4]), num_x, num_y, step_x, step_y))
+
+    def add_tracks(self, tokens):
+        # TRACKS [MASK maskNum [SAMEMASK]] {X | Y} start DO numTracks STEP space
+        #        [MASK maskNum [SAMEMASK]] [LAYER layerName ...] ;
+        direction = start = count = step = None
+        mask = 0
+        layers = []
+        i, n = 1, len(tokens)
+        while i < n and tokens[i] != ';':
+            token = tokens[i]
+            if token in DIRECTION_CODE and i + 5 < n:
+                direction, start = DIRECTION_CODE[token], int(tokens[i + 1])
+                count, step = int(tokens[i + 3]), int(tokens[i + 5])
+                i += 6
+            elif token == 'MASK' and i + 1 < n:
+                mask = int(tokens[i + 1])
+                i += 2
+            elif token == 'LAYER':
+                i += 1
+                while i < n and tokens[i] != ';':
+                    layers.append(self._intern(self.layer_names, self.layer_index, tokens[i]))
+                    i += 1
+            else:
+                i += 1
+        if direction is None:
+            return
+        for layer_id in layers or [-1]:
+            self.tracks.extend((direction, start, count, step, mask))
+            self.track_layer_ids.append(layer_id)
+
+    def build(self) -> Floorplan:
+        rows = np.frombuffer(self.rows, dtype=np.int64).reshape(-1, 6)
+        tracks = np.frombuffer(self.tracks, dtype=np.int64).reshape(-1, 5)
+        gcells = np.frombuffer(self.gcells, dtype=np.int64).reshape(-1, 4)
+        return Floorplan(
+            die=np.array(self.die, dtype=np.int64).reshape(-1, 2),
+            row_name_offsets=np.frombuffer(self.row_name_offsets, dtype=np.int64).copy(),
+            row_name_buffer=bytes(self.row_name_buffer),
+            row_site_ids=np.frombuffer(self.row_site_ids, dtype=np.int32).copy(),
+            site_names=list(self.site_names),
+            row_x=rows[:, 0].copy(),
+            row_y=rows[:, 1].copy(),
+            row_orient=np.frombuffer(self.row_orient, dtype=np.int8).copy(),
+            row_num_x=rows[:, 2].copy(),
+            row_num_y=rows[:, 3].copy(),
+            row_step_x=rows[:, 4].copy(),
+            row_step_y=rows[:, 5].copy(),
+            track_direction=tracks[:, 0].astype(np.int8),
+            track_layer_ids=np.frombuffer(self.track_layer_ids, dtype=np.int32).copy(),
+            layer_names=list(self.layer_names),
+            track_start=tracks[:, 1].copy(),
+            track_count=tracks[:, 2].copy(),
+            track_step=tracks[:, 3].copy(),
+            track_mask=tracks[:, 4].astype(np.int8),
+            gcell_direction=gcells[:, 0].astype(np.int8),
+            gcell_start=gcells[:, 1].copy(),
+            gcell_count=gcells[:, 2].copy(),
+            gcell_step=gcells[:, 3].copy(),
+        )
+
+
+def parse_floorplan(mm, section_index):
+    '''Floorplan of the DIEAREA / ROW / TRACKS / GCELLGRID spans of section_index in mm'''
+    builder = FloorplanBuilder()
+    for keyword in FLOORPLAN_KEYWORDS:
+        for span in section_index.get(keyword, []):
+            builder.add_statement(mm[span.start:span.end].decode('utf-8', errors='ignore'))
+    return builder.build()
@@ -0,0 +1,182 @@
+'''
+Hierarchy trie over instance names.
+
+Instance names are hierarchical paths joined by the DIVIDERCHAR of the DEF header
+(top/u_core/u_alu/U123; an escaped divider "\\/" is part of a name). Once the names
+are sorted, every scope is a contiguous run: all the names starting with
+"top/u_core/" are next to each other. The trie keeps, per scope node:
+
+    node_parent   int32 [n_nodes]   parent node, -1 for the root
+    node_depth    int32 [n_nodes]   0 for the root
+    node_start    int64 [n_nodes]   the instances under the node are
+    node_end      int64 [n_nodes]   order[node_start:node_end]
+    node_names    list  [n_nodes]   scope name ('' for the root)
+
+order is the permutation that sorts the instances by hierarchy (the table rows in
+that order), rank its inverse. When the table is already sorted (is_sorted), order
+is the identity and the ranges are ranges of instance ids directly.
+
+    trie = HierarchyTrie.build(table.instance_names(), divider='/')
+    trie.instances('top/u_core')                # table rows under top/u_core
+    trie.aggregate(cell_area, np.add)           # per-scope sum, aligned with the nodes
+'''
+import re
+
+import numpy as np
+
+DEFAULT_DIVIDER = '/'
+_DIVIDERCHAR = re.compile(r'DIVIDERCHAR\s+"(.)"')
+
+
+def divider_char(header_line, default=DEFAULT_DIVIDER):
+    '''Divider of a 'DIVIDERCHAR "/" ;' header line'''
+    match = _DIVIDERCHAR.search(header_line or '')
+    return match.group(1) if match else default
+
+
+class HierarchyTrie:
+    '''Scope tree of the instance names, see the module docstring'''
+    def __init__(self, divider, order, node_parent, node_depth, node_start, node_end, node_names):
+        self.divider = divider
+        self.order = order
+        self.rank = np.empty_like(order)
+        self.rank[order] = np.arange(len(order))
+        self.is_sorted = bool((order == np.arange(len(order))).all())
+        self.node_parent = node_parent
+        self.node_depth = node_depth
+        self.node_start = node_start
+        self.node_end = node_end
+        self.node_names = node_names
+        self._paths = None
+
+    @classmethod
+    def build(cls, instance_names, divider=DEFAULT_DIVIDER):
+        split = _splitter(divider)
+        order = np.array(sorted(range(len(instance_names)), key=instance_names.__getitem__), dtype=np.int64)
+        node_parent = [-1]
+        node_depth = [0]
+        node_start = [0]
+        node_end = [len(instance_names)]
+        node_names = ['']
+        # Open scopes from the root down: (name, node id)
+        stack = []
+        last_scope = None
+        for position, i in enumerate(order.tolist()):
+            scopes = split(instance_names[i])[:-1]
+            # Consecutive instances mostly share their scope: nothing opens or closes
+            if scopes == last_scope:
+                continue
+            last_scope = scopes
+            common = 0
+            while common < len(stack) and common < len(scopes) and stack[common][0] == scopes[common]:
+                common += 1
+            for _, node in stack[common:]:
+                node_end[node] = position
+            del stack[common:]
+            for depth in range(common, len(scopes)):
+                node_parent.append(stack[-1][1] if stack else 0)
+                node_depth.append(depth + 1)
+                node_start.append(position)
+                node_end.append(len(instance_names))
+                node_names.append(scopes[depth])
+                stack.append((scopes[depth], len(node_names) - 1))
+        for _, node in stack:
+            node_end[node] = len(instance_names)
+        return cls(
+            divider, order,
+            np.array(node_parent, dtype=np.int32),
+            np.array(node_depth, dtype=np.int32),
+            np.array(node_start, dtype=np.int64),
+            np.array(node_end, dtype=np.int64),
+            node_names,
+        )
+
+    def __len__(self):
+        return len(self.node_parent)
+
+    def path(self, node):
+        '''Full scope name of node'''
+        names = []
+        while node > 0:
+            names.append(self.node_names[node])
+            node = self.node_parent[node]
+        return self.divider.join(reversed(names))
+
+    def node(self, scope):
+        '''Node id of a scope name ('' is the root), None when there is no such scope'''
+        if self._paths is None:
+            # Built on first lookup: full path -> node, parents always come before their children
+            paths = ['']
+            for node in range(1, len(self)):
+                parent = self.node_parent[node]
+                paths.append(self.node_names[node] if parent == 0 else paths[parent] + self.divider + self.node_names[node])
+            self._paths = {path: node for node, path in enumerate(paths)}
+        return self._paths.get(scope.strip(self.divider))
+
+    def range(self, scope):
+        '''(start, end) of the scope in the sorted order, (0, 0) for an unknown scope'''
+        node = self.node(scope)
+        if node is None:
+            return 0, 0
+        return int(self.node_start[node]), int(self.node_end[node])
+
+    def instances(self, scope):
+        '''Ids of all the instances under scope, at any depth'''
+        start, end = self.range(scope)
+        return self.order[start:end]
+
+    def count(self, scope):
+        start, end = self.range(scope)
+        return end - start
+
+    def children(self, node):
+        '''Child nodes of node'''
+        return np.flatnonzero(self.node_parent == node)
+
+    def scope_of(self, instance_ids):
+        '''Deepest scope node of each instance'''
+        ranks = self.rank[np.asarray(instance_ids, dtype=np.int64)]
+        # Nodes are created in sorted order, so node_start is non-decreasing: the deepest node
+        # containing a rank is the last one starting at or before it that also ends after it.
+        # The ones that end too early step up to their parent together, at most depth times
+        # (the root contains every rank).
+        nodes = np.searchsorted(self.node_start, ranks, side='right').astype(np.int64) - 1
+        stale = np.flatnonzero(self.node_end[nodes] <= ranks)
+        while len(stale):
+            nodes[stale] = self.node_parent[nodes[stale]]
+            stale = stale[self.node_end[nodes[stale]] <= ranks[stale]]
+        return nodes
+
+    def aggregate(self, values, ufunc=np.add):
+        '''
+        ufunc.reduce of values (one per instance, in table order) over the instances of every
+        node, aligned with the nodes: e.g. total cell area or max x per module.
+        '''
+        values = np.asarray(values)[self.order]
+        if len(values) == 0:
+            return np.zeros(len(self), dtype=values.dtype)
+        # reduceat over interleaved (start, end) pairs reduces [start, end) at even positions;
+        # a padding element makes end == len(values) a valid index
+        padded = np.concatenate([values, values[:1]])
+        indices = np.empty(2 * len(self), dtype=np.int64)
+        indices[0::2] = self.node_start
+        indices[1::2] = self.node_end
+        return ufunc.reduceat(padded, indices)[0::2]
+
+    def stats(self, max_depth=None):
+        '''[(scope, depth, instance count)] of the nodes, in hierarchy order'''
+        return [
+            (self.path(node), int(self.node_depth[node]), int(self.node_end[node] - self.node_start[node]))
+            for node in range(len(self))
+            if max_depth is None or self.node_depth[node] <= max_depth
+        ]
+
+
+def _splitter(divider):
+    escaped = re.compile(r'(?<!\\)' + re.escape(divider))
+
+    def split(name):
+        if '\\' not in name:
+            return name.split(divider)
+        return escaped.split(name)
+    return split
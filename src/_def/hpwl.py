@@ -0,0 +1,200 @@
+'''
+Half-perimeter wirelength (HPWL) of the nets of a design.
+
+The position of a connection is the location of its instance plus the offset of
+its pin, both taken from columnar data:
+
+    x[inst_id] + dx(orient[inst_id], pin offset, cell size)
+
+The pin offset is the center of the bounding box of the PORT geometry (RECT, or
+PATH points when there is no RECT) of the LEF PIN, in the N orientation; it is
+turned into the placed orientation with the DEF rules (the placement location
+is the lower-left corner of the oriented cell):
+
+    N  ( x,     y )       FN ( w - x, y )
+    S  ( w - x, h - y )   FS ( x,     h - y )
+    W  ( h - y, x )       FW ( y,     x )
+    E  ( y,     w - x )   FE ( h - y, w - x )
+
+The HPWL of a net is then (max x - min x) + (max y - min y) over its connections,
+computed for all nets at once with np.maximum.reduceat / np.minimum.reduceat over
+the NetPinCSR segments. Instances missing from the ComponentTable and unplaced
+instances are left out; nets with less than two pins have an HPWL of 0. IO pins
+("( PIN name )") count at the center of their shape when an IOPinTable is given
+(and the pin is placed), and are left out otherwise.
+
+    engine = HPWLEngine(csr, table, pin_offsets_from_lef(lef_result, csr, table.cell_names, 1000),
+                        cell_sizes_from_lef(lef_result, table.cell_names, 1000), io_pins=parser.parse_io_pins(csr))
+    engine.total()
+    table.x[moved] += 200
+    engine.update(engine.nets_of_instances(moved))   # only the nets of the moved instances
+'''
+import numpy as np
+
+from .component_table import ORIENT_UNKNOWN, STATUS_CODE
+from .net_csr import IO_PIN
+from .spatial_index import _expand
+
+# Per orientation (in ORIENTATIONS order): dx = kxw * w + kxh * h + axx * x + axy * y, same for dy
+_ORIENT_TRANSFORM = np.array([
+    # kxw kxh axx axy  kyw kyh ayx ayy
+    [0, 0, 1, 0, 0, 0, 0, 1],    # N
+    [1, 0, -1, 0, 0, 1, 0, -1],  # S
+    [0, 0, 0, 1, 1, 0, -1, 0],   # E
+    [0, 1, 0, -1, 0, 0, 1, 0],   # W
+    [1, 0, -1, 0, 0, 0, 0, 1],   # FN
+    [0, 0, 1, 0, 0, 1, 0, -1],   # FS
+    [0, 1, 0, -1, 1, 0, -1, 0],  # FE
+    [0, 0, 0, 1, 0, 0, 1, 0],    # FW
+], dtype=np.float64)
+
+
+def _port_points(pin):
+    '''x and y coordinates of the PORT RECTs of a LEF PIN block, or of its PATHs without RECT'''
+    xs, ys = [], []
+    for port in pin.get('sub_blocks', {}).get('PORT', []):
+        for rect in port['attributes'].get('rectangles', []):
+            xs += [rect['x1'], rect['x2']]
+            ys += [rect['y1'], rect['y2']]
+    if xs:
+        return xs, ys
+    for port in pin.get('sub_blocks', {}).get('PORT', []):
+        for path in port['attributes'].get('paths', []):
+            coordinates = path['coordinates']
+            xs += coordinates[0::2][:len(coordinates) // 2]
+            ys += coordinates[1::2]
+    return xs, ys
+
+
+def pin_offsets_from_lef(lef_result, csr, cell_names, dbu_per_micron):
+    '''
+    (dx, dy) float64 arrays aligned with the pins of csr: offset of the pin from the origin of
+    its cell, N orientation, in DEF database units. Pins without geometry in the LEF are put
+    at the center of the cell (or its origin when the cell has no SIZE either).
+    '''
+    macros = {}
+    for block_list in lef_result['blocks'].values():
+        for block in block_list:
+            if block['type'] == 'MACRO':
+                macros[block['name']] = block
+    dx = np.zeros(len(csr.pin_names))
+    dy = np.zeros(len(csr.pin_names))
+    pin_centers = {}
+    for pin_id, (cell_id, pin_name) in enumerate(zip(csr.pin_cell_ids.tolist(), csr.pin_names)):
+        if cell_id < 0:
+            continue
+        macro = macros.get(cell_names[cell_id])
+        if macro is None:
+            continue
+        if macro['name'] not in pin_centers:
+            centers = {}
+            for pin in macro.get('sub_blocks', {}).get('PIN', []):
+                xs, ys = _port_points(pin)
+                if xs and ys:
+                    centers[pin['name']] = ((min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2)
+            size = macro['attributes'].get('size')
+            default = (size['width'] / 2, size['height'] / 2) if size else (0.0, 0.0)
+            pin_centers[macro['name']] = (centers, default)
+        centers, default = pin_centers[macro['name']]
+        x, y = centers.get(pin_name, default)
+        dx[pin_id] = x * dbu_per_micron
+        dy[pin_id] = y * dbu_per_micron
+    return dx, dy
+
+
+class HPWLEngine:
+    '''
+    Per-net and total HPWL over a NetPinCSR and its ComponentTable, see the module docstring.
+    The placement is read from table.x / y / orient / status at every evaluation, so moves are
+    made by editing the table columns, followed by update() of the affected nets.
+    '''
+    def __init__(self, csr, table, pin_offsets=None, cell_sizes=None, io_pins=None):
+        self.csr = csr
+        self.table = table
+        n_pins = len(csr.pin_names)
+        self.pin_dx, self.pin_dy = pin_offsets if pin_offsets is not None else (np.zeros(n_pins), np.zeros(n_pins))
+        n_cells = len(table.cell_names)
+        self.cell_w, self.cell_h = cell_sizes if cell_sizes is not None else (np.zeros(n_cells), np.zeros(n_cells))
+        # IOPinTable row of every csr pin, -1 for the pins that are not (known) IO pins
+        self.io_pins = io_pins
+        self.io_rows = io_pins.rows_of(csr) if io_pins is not None else np.full(n_pins, -1, dtype=np.int64)
+        self.net_ids = csr.net_of_connection()
+        self._instance_nets = None
+        self.hpwl = self.net_hpwl()
+
+    def pin_positions(self, connections):
+        '''x, y of the given connections, and the mask of those that count (placed instances / IO pins)'''
+        inst_ids = self.csr.inst_ids[connections]
+        valid = inst_ids >= 0
+        inst = np.where(valid, inst_ids, 0)
+        table = self.table
+        valid &= table.status[inst] > STATUS_CODE['UNPLACED']
+        orient = table.orient[inst].astype(np.int64)
+        transform = _ORIENT_TRANSFORM[np.where(orient == ORIENT_UNKNOWN, 0, orient)]
+        cell_ids = table.cell_ids[inst]
+        w, h = self.cell_w[cell_ids], self.cell_h[cell_ids]
+        pin_ids = self.csr.pin_ids[connections]
+        px, py = self.pin_dx[pin_ids], self.pin_dy[pin_ids]
+        x = table.x[inst] + transform[:, 0] * w + transform[:, 1] * h + transform[:, 2] * px + transform[:, 3] * py
+        y = table.y[inst] + transform[:, 4] * w + transform[:, 5] * h + transform[:, 6] * px + transform[:, 7] * py
+        if self.io_pins is not None:
+            io = np.flatnonzero(inst_ids == IO_PIN)
+            rows = self.io_rows[pin_ids[io]]
+            io = io[rows >= 0]
+            rows = rows[rows >= 0]
+            placed = self.io_pins.status[rows] > STATUS_CODE['UNPLACED']
+            io, rows = io[placed], rows[placed]
+            x[io], y[io] = self.io_pins.center(rows)
+            valid[io] = True
+        return x, y, valid
+
+    def net_hpwl(self, nets=None):
+        '''HPWL of the given nets (all nets by default), float64 in database units'''
+        indptr = self.csr.indptr
+        if nets is None:
+            nets = np.arange(len(self.csr))
+            connections = np.arange(indptr[-1])
+            net_index = self.net_ids
+        else:
+            nets = np.asarray(nets, dtype=np.int64).reshape(-1)
+            net_index, rank = _expand(indptr[nets + 1] - indptr[nets])
+            connections = indptr[nets][net_index] + rank
+        hpwl = np.zeros(len(nets))
+        if len(self.table) == 0:
+            return hpwl
+        x, y, valid = self.pin_positions(connections)
+        net_index = net_index[valid]
+        if net_index.size == 0:
+            return hpwl
+        x, y = x[valid], y[valid]
+        # net_index is sorted, so each net is one segment; reduceat over the non-empty ones
+        starts = np.flatnonzero(np.r_[True, net_index[1:] != net_index[:-1]])
+        segment_nets = net_index[starts]
+        hpwl[segment_nets] = (np.maximum.reduceat(x, starts) - np.minimum.reduceat(x, starts)
+                              + np.maximum.reduceat(y, starts) - np.minimum.reduceat(y, starts))
+        return hpwl
+
+    def total(self):
+        return float(self.hpwl.sum())
+
+    def update(self, nets):
+        '''Re-evaluate the given nets after a move; return the new total'''
+        nets = np.unique(np.asarray(nets, dtype=np.int64))
+        self.hpwl[nets] = self.net_hpwl(nets)
+        return self.total()
+
+    def nets_of_instances(self, inst_ids):
+        '''Ids of the nets connected to any of the given instances'''
+        if self._instance_nets is None:
+            # Transposed CSR: instance -> connections, built on first use
+            inst = self.csr.inst_ids
+            order = np.argsort(inst, kind='stable')
+            order = order[inst[order] >= 0]
+            counts = np.bincount(inst[order], minlength=len(self.table))
+            indptr = np.zeros(len(self.table) + 1, dtype=np.int64)
+            np.cumsum(counts, out=indptr[1:])
+            self._instance_nets = (indptr, self.net_ids[order])
+        indptr, nets = self._instance_nets
+        inst_ids = np.asarray(inst_ids, dtype=np.int64).reshape(-1)
+        owner, rank = _expand(indptr[inst_ids + 1] - indptr[inst_ids])
+        return np.unique(nets[indptr[inst_ids][owner] + rank])
@@ -0,0 +1,255 @@
+'''
+Incremental (ECO) re-parse of COMPONENTS and NETS.
+
+An ECO touches a few hundred entries of a DEF with millions of them. Instead of
+reparsing everything, every "- name ... ;" entry is hashed and compared with the
+hashes kept from the previous parse:
+
+    section hash unchanged   -> the previous entries are reused as a whole
+    entry hash known         -> the previous formatted entry is reused
+    entry hash unknown       -> only this entry is parsed and transformed
+
+Entries are matched by content, not position, so inserted and deleted entries are
+handled as well; the result is always in the order of the new file, i.e. exactly
+what DefParser.parse() would return.
+
+update_component_table() does the same for the columnar ComponentTable: only the
+changed entries are tokenized, and when the instances are still the same ones in
+the same order their rows of the previous table are patched in place (cell and
+placement), so the table a DefWriter was given stays the one to use. A DesignDB built
+from_tables() shares the cell_ids column, but its cell -> instances index is not
+updated by the patch; call refresh_cells() when rows changed (a rebuilt table, i.e.
+`table is not previous.table`, needs a new DesignDB):
+
+    table, state, changed, stats = update_component_table(mm, spans, previous=state)
+    if len(changed):
+        db.refresh_cells()
+'''
+import hashlib
+import pickle
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+
+from src.parser.section_indexer import SectionReader
+from src.parser.specifig_parser import MultiLineDashParser
+from src.parser.entry_lines import EntryLines
+from .component_table import ComponentTable, ComponentTableBuilder
+from .transformer.specific import BulkLineSeperator
+
+# One entry, as MultiLineDashParser reads it: from the "- " line to the end of the line holding the first ';'
+_ENTRY = re.compile(rb'^[ \t\r\f\v]*- [^;]*;[^\n]*\n?', re.MULTILINE)
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+@dataclass
+class SectionSnapshot:
+    '''Hashes and formatted entries of one section from a previous parse'''
+    section_hash: bytes
+    entry_hashes: List[bytes] = field(default_factory=list)
+    entries: List[dict] = field(default_factory=list)
+    # Where the entries were read: their raw_lines point into this file
+    source: Optional[str] = None
+    span_starts: List[int] = field(default_factory=list)
+
+
+@dataclass
+class TableSnapshot:
+    '''Hashes of the COMPONENTS entries of a previous parse and the ComponentTable built from them'''
+    section_hash: bytes
+    entry_hashes: List[bytes] = field(default_factory=list)
+    table: Optional[ComponentTable] = None
+
+
+@dataclass
+class UpdateStats:
+    '''What an incremental parse of one section had to redo'''
+    section: str
+    total: int = 0
+    reused: int = 0
+    reparsed: int = 0
+
+
+def iter_entry_spans(mm, start, end):
+    '''Yield the (start, end) byte range of every "- name ... ;" entry in [start, end)'''
+    for match in _ENTRY.finditer(mm, start, end):
+        yield match.start(), match.end()
+
+
+def _relocate(entry, source, start, end):
+    '''entry, or a copy of it whose raw_lines are the range [start, end) of source when they moved'''
+    raw_lines = entry.get('raw_lines')
+    if not isinstance(raw_lines, EntryLines) or (raw_lines.source, raw_lines.start, raw_lines.end) == (source, start, end):
+        return entry
+    return dict(entry, raw_lines=EntryLines(source, start, end))
+
+
+def update_section(mm, spans, keyword, block_transformer, previous=None, source=None):
+    '''
+    Entries of the sections in spans, reusing the unchanged ones of previous (a SectionSnapshot).
+    source is the path of the file in mm: the raw_lines of the entries are then byte ranges of it,
+    and reused entries are moved to their new range.
+    return (entries, SectionSnapshot, UpdateStats)
+    '''
+    # The view must be released before mm can be closed
+    with memoryview(mm) as view:
+        return _update_section(mm, view, spans, keyword, block_transformer, previous, source)
+
+
+def _update_section(mm, view, spans, keyword, block_transformer, previous, source):
+    section_digest = hashlib.blake2b(digest_size=16)
+    for span in spans:
+        section_digest.update(view[span.start:span.end])
+    section_hash = section_digest.digest()
+
+    stats = UpdateStats(keyword)
+    span_starts = [span.start for span in spans]
+    if previous is not None and previous.section_hash == section_hash:
+        stats.total = stats.reused = len(previous.entries)
+        if source is None or (getattr(previous, 'source', None), getattr(previous, 'span_starts', None)) == (source, span_starts):
+            return previous.entries, previous, stats
+        # Same entries at other offsets (or in another file)
+        entry_spans = [entry_span for span in spans for entry_span in iter_entry_spans(mm, span.body_start, span.end)]
+        entries = [_relocate(entry, source, start, end) for entry, (start, end) in zip(previous.entries, entry_spans)]
+        return entries, SectionSnapshot(section_hash, previous.entry_hashes, entries, source, span_starts), stats
+
+    previous_index = {}
+    if previous is not None:
+        previous_index = {entry_hash: i for i, entry_hash in enumerate(previous.entry_hashes)}
+
+    entry_hashes = []
+    entries = []
+    changed_positions = []
+    changed_raw_sections = []
+    dash_parser = MultiLineDashParser()
+    for span in spans:
+        for start, end in iter_entry_spans(mm, span.body_start, span.end):
+            entry_hash = _digest(view[start:end])
+            entry_hashes.append(entry_hash)
+            i = previous_index.get(entry_hash)
+            if i is not None:
+                entries.append(previous.entries[i] if source is None else _relocate(previous.entries[i], source, start, end))
+                continue
+            # Parse just this entry, transform all the changed ones together below
+            f = SectionReader(mm, start, end, source=source)
+            changed_positions.append(len(entries))
+            changed_raw_sections.append(dash_parser.parse(f, f.readline(), keyword))
+            entries.append(None)
+
+    for position, entry in zip(changed_positions, block_transformer.transform(changed_raw_sections)):
+        entries[position] = entry
+
+    stats.total = len(entries)
+    stats.reparsed = len(changed_positions)
+    stats.reused = stats.total - stats.reparsed
+    return entries, SectionSnapshot(section_hash, entry_hashes, entries, source, span_starts), stats
+
+
+def update_component_table(mm, spans, previous=None):
+    '''
+    ComponentTable of the COMPONENTS sections in spans, tokenizing only the entries that are not
+    in previous (a TableSnapshot). When the entries are still the same instances in the same
+    order, the rows of previous.table are patched in place and that table is returned; otherwise
+    a new table is built, the rows of the unchanged entries being copied from previous.table.
+    return (table, TableSnapshot, changed, UpdateStats); changed are the row ids of the entries
+    that were tokenized again.
+    '''
+    with memoryview(mm) as view:
+        return _update_component_table(mm, view, spans, previous)
+
+
+def _update_component_table(mm, view, spans, previous):
+    section_digest = hashlib.blake2b(digest_size=16)
+    for span in spans:
+        section_digest.update(view[span.start:span.end])
+    section_hash = section_digest.digest()
+
+    stats = UpdateStats('COMPONENTS')
+    if previous is not None and previous.section_hash == section_hash:
+        stats.total = stats.reused = len(previous.table)
+        return previous.table, previous, np.zeros(0, dtype=np.int64), stats
+
+    previous_index = {}
+    if previous is not None:
+        previous_index = {entry_hash: i for i, entry_hash in enumerate(previous.entry_hashes)}
+
+    entry_hashes = []
+    # Row of previous.table each entry is the same as, -1 for the changed entries
+    previous_rows = []
+    changed_rows = []
+    head_lines = []
+    dash_parser = MultiLineDashParser()
+    for span in spans:
+        for start, end in iter_entry_spans(mm, span.body_start, span.end):
+            entry_hash = _digest(view[start:end])
+            i = previous_index.get(entry_hash, -1)
+            if i < 0:
+                f = SectionReader(mm, start, end)
+                changed_rows.append(len(entry_hashes))
+                head_lines.append(dash_parser.parse(f, f.readline(), 'COMPONENTS')['head_section'])
+            entry_hashes.append(entry_hash)
+            previous_rows.append(i)
+
+    # The changed entries are tokenized together, with the cell names of the previous table
+    # when it can be patched (so that the cell ids agree)
+    table = previous.table if previous is not None else None
+    names = table.names if table is not None and len(table) else None
+    if names is not None and names.cells.frozen:
+        names = None
+    builder = ComponentTableBuilder(names)
+    for seperated_head_line in BulkLineSeperator().seperate_many(head_lines):
+        builder.add_tokens(seperated_head_line)
+    changed = builder.build()
+    changed_rows = np.array(changed_rows, dtype=np.int64)
+
+    if names is not None and _same_instances(table, previous_rows, changed, changed_rows):
+        table.cell_ids[changed_rows] = changed.cell_ids
+        table.x[changed_rows] = changed.x
+        table.y[changed_rows] = changed.y
+        table.orient[changed_rows] = changed.orient
+        table.status[changed_rows] = changed.status
+    else:
+        table = _merge_rows(table, previous_rows, changed)
+
+    stats.total = len(entry_hashes)
+    stats.reparsed = len(changed_rows)
+    stats.reused = stats.total - stats.reparsed
+    return table, TableSnapshot(section_hash, entry_hashes, table), changed_rows, stats
+
+
+def _same_instances(table, previous_rows, changed, changed_rows):
+    '''True when row k of the new entries is instance k of table, for every k'''
+    if len(previous_rows) != len(table):
+        return False
+    if any(i >= 0 and i != k for k, i in enumerate(previous_rows)):
+        return False
+    return all(changed.instance_name(j) == table.instance_name(row) for j, row in enumerate(changed_rows.tolist()))
+
+
+def _merge_rows(table, previous_rows, changed):
+    # New table in entry order: the unchanged rows from table, the others from changed
+    builder = ComponentTableBuilder()
+    changed_row = 0
+    for i in previous_rows:
+        source = table
+        if i < 0:
+            source, i, changed_row = changed, changed_row, changed_row + 1
+        builder.add(source.instance_name(i), source.cell_name(i), int(source.x[i]), int(source.y[i]),
+                    int(source.orient[i]), int(source.status[i]))
+    return builder.build()
+
+
+def save_state(path, state):
+    '''Persist the {keyword: SectionSnapshot} state of DefParser.parse_incremental'''
+    with open(path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_state(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,342 @@
+'''
+Columnar storage of the PINS section.
+
+The IO pins (terminals) of the design, one row per "- pinName + NET netName ..." entry:
+
+    name_offsets  int64 [n + 1]  pin i is name_buffer[name_offsets[i]:name_offsets[i + 1]]
+    name_buffer   bytes          all pin names, utf-8, back to back
+    net_ids       int32 [n]      net id, -1 without + NET (see below)
+    direction     int8  [n]      index into DIRECTIONS, -1 when not given
+    use           int8  [n]      index into USES, -1 when not given
+    special       bool  [n]      + SPECIAL
+    layer_ids     int32 [n]      index into layer_names, layer of the shape, -1 without shape
+    xlo, ylo,     int64 [n]      bounding box of the shape (+ LAYER rectangle, or + POLYGON
+    xhi, yhi                     points), relative to the pin location, N orientation
+    x, y          int64 [n]      placement location, 0 when the pin has none
+    orient        int8  [n]      index into ORIENTATIONS, -1 when unknown
+    status        int8  [n]      index into PLACEMENT_STATUS
+
+A pin with several + PORT keeps the shape and the placement of its first port.
+The shape is turned around the pin location by the orientation, so the absolute
+center of the pin shape is location + rotate(orient, box center), see center().
+
+Net names go to the nets NameTable of a DesignNames (net_names). Built against the
+DesignNames of a NetPinCSR (IOPinTableBuilder(csr.names), parser.parse_io_pins(csr)),
+net_ids are the net ids of that CSR and of the DesignDB built from it; the nets of
+the PINS that are not in NETS (e.g. power pins of SPECIALNETS) are numbered after
+them, from len(net_names), and named in extra_net_names. Without a DesignNames the
+table interns the net names in a table of its own.
+
+IOPinTableTransformer fills the columns straight from the raw PINS entries; rows_of()
+maps the "( PIN name )" connections of a NetPinCSR to the rows of the table.
+
+    pins = parser.parse_io_pins(csr)
+    rows = pins.rows_of(csr)        # per csr pin id, -1 for instance pins / unknown IO pins
+    x, y = pins.center()
+'''
+from array import array
+from itertools import islice
+
+import numpy as np
+
+from .transformer.base import BlockTransformer
+from .transformer.specific import BulkLineSeperator
+from .component_table import ORIENT_CODE, ORIENT_UNKNOWN, STATUS_CODE, ORIENTATIONS, PLACEMENT_STATUS
+from .name_table import DesignNames
+
+DIRECTIONS = ('INPUT', 'OUTPUT', 'INOUT', 'FEEDTHRU')
+DIRECTION_CODE = {direction: code for code, direction in enumerate(DIRECTIONS)}
+USES = ('SIGNAL', 'POWER', 'GROUND', 'CLOCK', 'TIEOFF', 'ANALOG', 'SCAN', 'RESET')
+USE_CODE = {use: code for code, use in enumerate(USES)}
+_STATUS_TOKENS = {f'+ {status}': code for status, code in STATUS_CODE.items() if status != 'UNPLACED'}
+
+# Rotation of a point around the pin location, per orientation (in ORIENTATIONS order):
+# x' = axx * x + axy * y, y' = ayx * x + ayy * y
+_ORIENT_ROTATION = np.array([
+    # axx axy ayx ayy
+    [1, 0, 0, 1],     # N
+    [-1, 0, 0, -1],   # S
+    [0, 1, -1, 0],    # E
+    [0, -1, 1, 0],    # W
+    [-1, 0, 0, 1],    # FN
+    [1, 0, 0, -1],    # FS
+    [0, -1, -1, 0],   # FE
+    [0, 1, 1, 0],     # FW
+], dtype=np.float64)
+
+
+class IOPinTable:
+    '''
+    Columnar table of the IO pins of a design, see the module docstring for the columns.
+    '''
+    def __init__(self, name_offsets, name_buffer, net_ids, net_names, direction, use, special,
+                 layer_ids, layer_names, xlo, ylo, xhi, yhi, x, y, orient, status, extra_net_names=()):
+        self.name_offsets = name_offsets
+        self.name_buffer = name_buffer
+        self.net_ids = net_ids
+        self.net_names = net_names
+        # Names of the net ids from len(net_names) on: nets that are not in net_names
+        self.extra_net_names = list(extra_net_names)
+        self.direction = direction
+        self.use = use
+        self.special = special
+        self.layer_ids = layer_ids
+        self.layer_names = layer_names
+        self.xlo = xlo
+        self.ylo = ylo
+        self.xhi = xhi
+        self.yhi = yhi
+        self.x = x
+        self.y = y
+        self.orient = orient
+        self.status = status
+        self._index = None
+
+    def __len__(self):
+        return len(self.net_ids)
+
+    def pin_name(self, i):
+        return self.name_buffer[self.name_offsets[i]:self.name_offsets[i + 1]].decode('utf-8')
+
+    def pin_names(self):
+        '''All pin names, in table order'''
+        offsets = self.name_offsets.tolist()
+        buffer = self.name_buffer
+        return [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def net_name(self, i):
+        net_id = int(self.net_ids[i])
+        if net_id < 0:
+            return None
+        if net_id < len(self.net_names):
+            return self.net_names[net_id]
+        return self.extra_net_names[net_id - len(self.net_names)]
+
+    def is_placed(self):
+        '''Boolean mask of the pins that have a location (PLACED, FIXED or COVER)'''
+        return self.status > STATUS_CODE['UNPLACED']
+
+    def index(self, pin_name):
+        '''Row of pin_name, -1 when there is no such pin'''
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.pin_names())}
+        return self._index.get(pin_name, -1)
+
+    def rows_of(self, csr):
+        '''
+        Row of every pin of csr (aligned with csr.pin_names): the IO pin of a "( PIN name )"
+        connection, -1 for instance pins and for IO pins missing from the PINS section
+        '''
+        rows = np.full(len(csr.pin_names), -1, dtype=np.int64)
+        for pin_id in np.flatnonzero(csr.pin_cell_ids < 0).tolist():
+            rows[pin_id] = self.index(csr.pin_names[pin_id])
+        return rows
+
+    def net_ids_in(self, csr):
+        '''Net id in csr of every pin, -1 when its net is not in csr'''
+        if csr.names is not None and csr.names.nets is self.net_names:
+            # Built against the names of csr: the ids are already its net ids
+            return np.where(self.net_ids < len(self.net_names), self.net_ids, -1).astype(np.int64)
+        # A net name repeated in NETS maps to its first id, as in the NameTables
+        net_index = {}
+        for i, name in enumerate(csr.net_names()):
+            net_index.setdefault(name, i)
+        names = list(self.net_names) + self.extra_net_names
+        mapping = np.array([net_index.get(name, -1) for name in names] + [-1], dtype=np.int64)
+        # net_ids == -1 picks the trailing -1
+        return mapping[self.net_ids]
+
+    def center(self, rows=None):
+        '''
+        Absolute x, y (float64) of the center of the pin shapes; the pin location itself for
+        pins without a shape
+        '''
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.int64)
+        cx = (self.xlo[rows] + self.xhi[rows]) / 2
+        cy = (self.ylo[rows] + self.yhi[rows]) / 2
+        orient = self.orient[rows].astype(np.int64)
+        rotation = _ORIENT_ROTATION[np.where(orient == ORIENT_UNKNOWN, 0, orient)]
+        x = self.x[rows] + rotation[:, 0] * cx + rotation[:, 1] * cy
+        y = self.y[rows] + rotation[:, 2] * cx + rotation[:, 3] * cy
+        return x, y
+
+    def row(self, i):
+        '''Pin i as a dict, the coded columns decoded'''
+        info = {
+            'pin_name': self.pin_name(i),
+            'net_name': self.net_name(i),
+            'direction': DIRECTIONS[self.direction[i]] if self.direction[i] >= 0 else None,
+            'use': USES[self.use[i]] if self.use[i] >= 0 else None,
+            'special': bool(self.special[i]),
+        }
+        if self.layer_ids[i] >= 0:
+            info['layer'] = self.layer_names[self.layer_ids[i]]
+            info['shape'] = (int(self.xlo[i]), int(self.ylo[i]), int(self.xhi[i]), int(self.yhi[i]))
+        if self.status[i] > STATUS_CODE['UNPLACED']:
+            orient = ORIENTATIONS[self.orient[i]] if self.orient[i] != ORIENT_UNKNOWN else None
+            info['placementInfo'] = (int(self.x[i]), int(self.y[i]), orient, PLACEMENT_STATUS[self.status[i]])
+        return info
+
+
+def _point(token):
+    '''(x, y) of a "( x y )" token, None if it is not one'''
+    parts = token.strip('() ').split()
+    if len(parts) < 2 or not token.startswith('('):
+        return None
+    try:
+        return int(parts[0]), int(parts[1])
+    except ValueError:
+        return None
+
+
+class IOPinTableBuilder:
+    '''
+    Append pins one at a time, then build() the IOPinTable.
+    With names (the DesignNames of a NetPinCSR), nets are looked up in names.nets and
+    the net ids are those of the CSR; otherwise they are interned in a new table.
+    '''
+    def __init__(self, names=None):
+        self.name_offsets = array('q', [0])
+        self.name_buffer = bytearray()
+        self.net_ids = array('i')
+        # Net ids are the rows of a shared table, which is only looked up
+        self.shared_nets = names is not None
+        self.names = names if names is not None else DesignNames()
+        self.extra_net_names = []
+        self.extra_net_index = {}
+        self.direction = array('b')
+        self.use = array('b')
+        self.special = array('b')
+        self.layer_ids = array('i')
+        self.layer_names = []
+        self.layer_index = {}
+        self.box = array('q')
+        self.x = array('q')
+        self.y = array('q')
+        self.orient = array('b')
+        self.status = array('b')
+
+    def _intern(self, names, index, name):
+        code = index.get(name)
+        if code is None:
+            code = index[name] = len(names)
+            names.append(name)
+        return code
+
+    def _net_id(self, net_name):
+        nets = self.names.nets
+        if not self.shared_nets:
+            return nets.intern(net_name)
+        net_id = nets.get(net_name)
+        if net_id < 0:
+            net_id = len(nets) + self._intern(self.extra_net_names, self.extra_net_index, net_name)
+        return net_id
+
+    def add(self, pin_name, net_name=None, direction=-1, use=-1, special=False,
+            layer_name=None, box=(0, 0, 0, 0), x=0, y=0, orient=ORIENT_UNKNOWN, status=0):
+        self.name_buffer += pin_name.encode('utf-8')
+        self.name_offsets.append(len(self.name_buffer))
+        self.net_ids.append(-1 if net_name is None else self._net_id(net_name))
+        self.direction.append(direction)
+        self.use.append(use)
+        self.special.append(special)
+        self.layer_ids.append(-1 if layer_name is None else self._intern(self.layer_names, self.layer_index, layer_name))
+        self.box.extend(box)
+        self.x.append(x)
+        self.y.append(y)
+        self.orient.append(orient)
+        self.status.append(status)
+
+    def add_tokens(self, seperate_components):
+        '''
+        Add one pin from the tokens of its head line:
+        - pinName + NET netName + DIRECTION dir + USE use + LAYER layer [MASK n] pt pt
+          + POLYGON layer [MASK n] pt pt pt ... + {FIXED | PLACED | COVER} pt orient ...
+        Only the first shape and the first placement are kept (first + PORT).
+        '''
+        if len(seperate_components) < 2:
+            self.add('UNKNOWN')
+            return
+        tokens = seperate_components
+        fields = {'pin_name': tokens[1]}
+        n_tokens = len(tokens)
+        i = 2
+        while i < n_tokens:
+            token = tokens[i]
+            i += 1
+            if not token.startswith('+ '):
+                continue
+            if token == '+ NET' and i < n_tokens:
+                fields.setdefault('net_name', tokens[i])
+            elif token == '+ SPECIAL':
+                fields['special'] = True
+            elif token == '+ DIRECTION' and i < n_tokens:
+                fields.setdefault('direction', DIRECTION_CODE.get(tokens[i], -1))
+            elif token == '+ USE' and i < n_tokens:
+                fields.setdefault('use', USE_CODE.get(tokens[i], -1))
+            elif token in ('+ LAYER', '+ POLYGON') and i < n_tokens and 'layer_name' not in fields:
+                points = []
+                j = i + 1
+                while j < n_tokens and not tokens[j].startswith('+ '):
+                    point = _point(tokens[j])
+                    if point is not None:
+                        points.append(point)
+                    j += 1
+                if points:
+                    xs, ys = zip(*points)
+                    fields['layer_name'] = tokens[i]
+                    fields['box'] = (min(xs), min(ys), max(xs), max(ys))
+            elif token in _STATUS_TOKENS and 'status' not in fields:
+                fields['status'] = _STATUS_TOKENS[token]
+                point = _point(tokens[i]) if i < n_tokens else None
+                if point is not None:
+                    fields['x'], fields['y'] = point
+                    if i + 1 < n_tokens:
+                        fields['orient'] = ORIENT_CODE.get(tokens[i + 1], ORIENT_UNKNOWN)
+        self.add(**fields)
+
+    def build(self) -> IOPinTable:
+        box = np.frombuffer(self.box, dtype=np.int64).reshape(-1, 4)
+        return IOPinTable(
+            name_offsets=np.frombuffer(self.name_offsets, dtype=np.int64).copy(),
+            name_buffer=bytes(self.name_buffer),
+            net_ids=np.frombuffer(self.net_ids, dtype=np.int32).copy(),
+            net_names=self.names.nets if self.shared_nets else self.names.nets.freeze(),
+            direction=np.frombuffer(self.direction, dtype=np.int8).copy(),
+            use=np.frombuffer(self.use, dtype=np.int8).copy(),
+            special=np.frombuffer(self.special, dtype=np.int8).astype(bool),
+            layer_ids=np.frombuffer(self.layer_ids, dtype=np.int32).copy(),
+            layer_names=list(self.layer_names),
+            xlo=box[:, 0].copy(),
+            ylo=box[:, 1].copy(),
+            xhi=box[:, 2].copy(),
+            yhi=box[:, 3].copy(),
+            x=np.frombuffer(self.x, dtype=np.int64).copy(),
+            y=np.frombuffer(self.y, dtype=np.int64).copy(),
+            orient=np.frombuffer(self.orient, dtype=np.int8).copy(),
+            status=np.frombuffer(self.status, dtype=np.int8).copy(),
+            extra_net_names=self.extra_net_names,
+        )
+
+
+class IOPinTableTransformer(BlockTransformer):
+    '''
+    Transform the raw PINS entries of MultiLineBlockParserWithEnd into an IOPinTable.
+    input: any iterable of {'head_section': full_content, ...}
+    '''
+    batch_size = 2048
+
+    def __init__(self, line_seperator):
+        self.line_seperator = line_seperator
+
+    def transform(self, raw_sections, names=None) -> IOPinTable:
+        builder = IOPinTableBuilder(names)
+        raw_sections = iter(raw_sections)
+        while batch := list(islice(raw_sections, self.batch_size)):
+            head_lines = [raw_section['head_section'] for raw_section in batch]
+            for seperated_head_line in self.line_seperator.seperate_many(head_lines):
+                builder.add_tokens(seperated_head_line)
+        return builder.build()
+
+
+io_pin_table_transformer = IOPinTableTransformer(BulkLineSeperator())
@@ -0,0 +1,260 @@
+'''
+Interned name tables shared by the DEF parsers.
+
+A NameTable gives every distinct name a stable integer id, in first-seen order, and
+stores the names back to back in one utf-8 buffer:
+
+    offsets  int64 [n + 1]  name i is buffer[offsets[i]:offsets[i + 1]]
+    buffer   bytes          all the names
+
+While parsing, new names are found through a dict keyed by the raw bytes. freeze()
+turns the columns into NumPy / bytes once a table is complete (the instances after
+COMPONENTS, the nets after NETS); compact() also drops the dict, after which lookups
+go through a hash index: the crc32 of every name, sorted, searched with searchsorted.
+
+DesignNames holds the tables of one design (instances, cells, nets, pins). The
+ComponentTable and NetPinCSR builders intern into it, so a cell or pin name like
+INV_X1 or A exists once, the instance and net name buffers are the ones of the tables,
+and the later stages compare ids instead of strings:
+
+    names = table.names
+    names.cells.get('INV_X1')            # cell id, as in table.cell_ids
+    names.instances.ids(['u1', 'u2'])    # rows of the ComponentTable, -1 when unknown
+    names.pins[csr.pin_name_ids[k]]
+
+A frozen or compacted table is read-only: interning a name it already holds gives its
+id, a new name raises FrozenNameTableError. The builders fork such tables instead of
+interning into them, so names.compact() can be called before the NETS are parsed.
+'''
+import zlib
+from array import array
+
+import numpy as np
+
+
+class FrozenNameTableError(ValueError):
+    '''A new name was added to a frozen (or compacted) NameTable'''
+
+
+class NameTable:
+    '''Names <-> ids, see the module docstring. Indexing and iteration give the names as str.'''
+    def __init__(self):
+        self.offsets = array('q', [0])
+        self.buffer = bytearray()
+        # raw name -> id, until compact()
+        self.index = {}
+        self.frozen = False
+        self._hashes = None
+        self._order = None
+
+    @classmethod
+    def from_buffer(cls, offsets, buffer, index=False):
+        '''
+        Frozen table over existing offsets / buffer (not copied), e.g. the instance names of a table.
+        index=True builds the dict index, for many lookups (otherwise they use the hash index).
+        '''
+        table = cls()
+        table.offsets = np.asarray(offsets, dtype=np.int64)
+        table.buffer = buffer
+        table.index = _raw_index(table.offsets, buffer) if index else None
+        table.frozen = True
+        return table
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, i):
+        return bytes(self.buffer[self.offsets[i]:self.offsets[i + 1]])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].decode('utf-8')
+
+    def names(self):
+        '''All the names, in id order'''
+        offsets = self.offsets.tolist()
+        buffer = self.buffer
+        return [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def __eq__(self, other):
+        if isinstance(other, NameTable):
+            return bytes(self.buffer) == bytes(other.buffer) and list(self.offsets) == list(other.offsets)
+        if isinstance(other, (list, tuple)):
+            return self.names() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"NameTable({len(self)} names)"
+
+    def append_raw(self, raw):
+        '''Add raw (utf-8 bytes) as a new name, even if it is already there; return its id'''
+        if self.frozen:
+            raise FrozenNameTableError(f"cannot add {raw!r}: the name table is frozen (fork its DesignNames)")
+        name_id = len(self.offsets) - 1
+        self.buffer += raw
+        self.offsets.append(len(self.buffer))
+        self.index.setdefault(raw, name_id)
+        return name_id
+
+    def extend_raw(self, offsets, buffer):
+        '''Append all the names of an offsets / buffer pair at once (like append_raw for each)'''
+        if self.frozen:
+            raise FrozenNameTableError("cannot add names: the name table is frozen (fork its DesignNames)")
+        first = len(self.offsets) - 1
+        base = len(self.buffer) - int(offsets[0])
+        self.buffer += buffer[int(offsets[0]):int(offsets[-1])]
+        self.offsets.extend((np.asarray(offsets[1:], dtype=np.int64) + base).tolist())
+        for raw, name_id in _raw_index(offsets, buffer, first).items():
+            self.index.setdefault(raw, name_id)
+
+    def append(self, name):
+        return self.append_raw(name.encode('utf-8'))
+
+    def intern_raw(self, raw):
+        '''Id of raw (utf-8 bytes), added when new'''
+        name_id = self.index.get(raw) if self.index is not None else self.get_raw(raw, None)
+        if name_id is None:
+            if self.frozen:
+                raise FrozenNameTableError(f"cannot add {raw!r}: the name table is frozen (fork its DesignNames)")
+            name_id = self.index[raw] = len(self.offsets) - 1
+            self.buffer += raw
+            self.offsets.append(len(self.buffer))
+        return name_id
+
+    def intern(self, name):
+        return self.intern_raw(name.encode('utf-8'))
+
+    def freeze(self):
+        '''No more names: offsets become an int64 array and buffer bytes'''
+        if not self.frozen:
+            self.offsets = np.frombuffer(self.offsets, dtype=np.int64).copy()
+            self.buffer = bytes(self.buffer)
+            self.frozen = True
+        return self
+
+    def compact(self):
+        '''freeze() and drop the dict index: lookups use the hash index from then on'''
+        self.freeze()
+        self.index = None
+        return self
+
+    def _hash_index(self):
+        if self._hashes is None:
+            offsets = self.offsets.tolist()
+            buffer = self.buffer
+            hashes = np.fromiter((zlib.crc32(buffer[start:end]) for start, end in zip(offsets[:-1], offsets[1:])),
+                                 dtype=np.int64, count=len(self))
+            self._order = np.argsort(hashes, kind='stable')
+            self._hashes = hashes[self._order]
+        return self._hashes, self._order
+
+    def get_raw(self, raw, default=-1):
+        '''Id of raw (utf-8 bytes), default when unknown'''
+        if self.index is not None:
+            return self.index.get(raw, default)
+        hashes, order = self._hash_index()
+        code = zlib.crc32(raw)
+        k = int(np.searchsorted(hashes, code))
+        # The first id of a name wins, as with the dict (the sort is stable)
+        while k < len(hashes) and hashes[k] == code:
+            if self.raw(order[k]) == raw:
+                return int(order[k])
+            k += 1
+        return default
+
+    def get(self, name, default=-1):
+        return self.get_raw(name.encode('utf-8'), default)
+
+    def __contains__(self, name):
+        return self.get(name) >= 0
+
+    def ids(self, names):
+        '''Ids of names (str), -1 for the unknown ones'''
+        raws = [name.encode('utf-8') for name in names]
+        if self.index is not None:
+            get = self.index.get
+            return np.fromiter((get(raw, -1) for raw in raws), dtype=np.int64, count=len(raws))
+        hashes, order = self._hash_index()
+        codes = np.fromiter(map(zlib.crc32, raws), dtype=np.int64, count=len(raws))
+        position = np.minimum(np.searchsorted(hashes, codes), max(len(hashes) - 1, 0))
+        result = np.full(len(raws), -1, dtype=np.int64)
+        if len(hashes) == 0:
+            return result
+        candidates = order[position].tolist()
+        # One candidate per name is right unless two names share a crc32
+        for k, (raw, candidate) in enumerate(zip(raws, candidates)):
+            result[k] = candidate if self.raw(candidate) == raw else self.get_raw(raw)
+        return result
+
+
+def _raw_index(offsets, buffer, first=0):
+    '''{raw name: id} of an offsets / buffer pair, ids from first; the first id of a repeated name wins'''
+    index = {}
+    if not isinstance(buffer, bytes):
+        buffer = bytes(buffer)
+    bounds = np.asarray(offsets).tolist()
+    for name_id, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]), first):
+        index.setdefault(buffer[start:end], name_id)
+    return index
+
+
+class NameList:
+    '''Sequence of the names of ids in a NameTable (like a list of str, without the str objects)'''
+    def __init__(self, table, ids):
+        self.table = table
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return self.table[int(self.ids[i])]
+
+    def __iter__(self):
+        table = self.table
+        return (table[name_id] for name_id in self.ids.tolist())
+
+    def __eq__(self, other):
+        if isinstance(other, (NameList, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"NameList({len(self)} names)"
+
+
+class DesignNames:
+    '''The name tables of one design, shared by the ComponentTable / NetPinCSR builders'''
+    def __init__(self):
+        self.instances = NameTable()
+        self.cells = NameTable()
+        self.nets = NameTable()
+        self.pins = NameTable()
+
+    def fork(self, *fresh):
+        '''DesignNames sharing these tables, except the ones named in fresh which start empty'''
+        names = DesignNames()
+        for name, table in self.tables().items():
+            if name not in fresh:
+                setattr(names, name, table)
+        return names
+
+    def writable(self, *names):
+        '''These DesignNames, or a fork() in which the frozen tables among names start empty'''
+        frozen = [name for name in names if getattr(self, name).frozen]
+        return self.fork(*frozen) if frozen else self
+
+    def tables(self):
+        return {'instances': self.instances, 'cells': self.cells, 'nets': self.nets, 'pins': self.pins}
+
+    def compact(self):
+        '''Drop the dict indexes of all the tables once parsing is done'''
+        for table in self.tables().values():
+            table.compact()
+        return self
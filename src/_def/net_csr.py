@@ -0,0 +1,238 @@
+'''
+Compressed-sparse-row storage of the NETS connectivity.
+
+EnhancedNetHeadFormatter emits a list of {'ins_name', 'pin_name'} dicts per net;
+NetPinCSR keeps all the connections of all nets in flat NumPy arrays:
+
+    indptr        int64 [n_nets + 1]  connections of net i are [indptr[i], indptr[i + 1])
+    inst_ids      int32 [n_conns]     row of the instance in the ComponentTable,
+                                      IO_PIN for "( PIN name )", UNKNOWN_INSTANCE if not found
+    pin_ids       int32 [n_conns]     index into the pin table
+    pin_cell_ids  int32 [n_pins]      cell of each pin (-1 for IO pins)
+    pin_names     list  [n_pins]      pin name
+
+A pin is interned per cell: ( I1 A ) and ( I7 A ) share a pin id when I1 and I7
+are instances of the same cell. Names go to the DesignNames of the ComponentTable:
+net names are names.nets (name_offsets / name_buffer), the pin names are interned in
+names.pins (pin_name_ids [n_pins]; pin_names reads them as str).
+'''
+from array import array
+from itertools import islice
+
+import numpy as np
+
+from .transformer.base import BlockTransformer
+from .transformer.specific import BulkLineSeperator
+from .name_table import DesignNames, NameList
+
+IO_PIN = -1
+UNKNOWN_INSTANCE = -2
+
+
+class NetPinCSR:
+    '''
+    Net -> pin connectivity of a design, see the module docstring for the arrays.
+    inst_ids refer to the rows of the ComponentTable the CSR was built against.
+    '''
+    def __init__(self, indptr, inst_ids, pin_ids, pin_cell_ids, pin_names, name_offsets, name_buffer,
+                 pin_name_ids=None, names=None):
+        self.indptr = indptr
+        self.inst_ids = inst_ids
+        self.pin_ids = pin_ids
+        self.pin_cell_ids = pin_cell_ids
+        self.pin_names = pin_names
+        self.name_offsets = name_offsets
+        self.name_buffer = name_buffer
+        # Ids of the pin names in names.pins, and the DesignNames of the nets (None when built from plain arrays)
+        self.pin_name_ids = pin_name_ids
+        self.names = names
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def net_name(self, i):
+        return self.name_buffer[self.name_offsets[i]:self.name_offsets[i + 1]].decode('utf-8')
+
+    def net_names(self):
+        '''All net names, in net id order'''
+        offsets = self.name_offsets.tolist()
+        buffer = self.name_buffer
+        return [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def net_of_connection(self):
+        '''Net id of every connection, aligned with inst_ids / pin_ids'''
+        return np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.indptr))
+
+    def degree(self, include_io=True):
+        '''Number of connections of every net, with or without the IO pins'''
+        if include_io:
+            return np.diff(self.indptr)
+        io_count = np.bincount(self.net_of_connection()[self.inst_ids == IO_PIN], minlength=len(self))
+        return np.diff(self.indptr) - io_count
+
+    def fanout(self, n_instances):
+        '''Number of connections of every instance (0..n_instances-1)'''
+        inst_ids = self.inst_ids[self.inst_ids >= 0]
+        return np.bincount(inst_ids, minlength=n_instances)
+
+    def connections(self, i):
+        '''(inst_ids, pin_ids) of net i'''
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.inst_ids[start:end], self.pin_ids[start:end]
+
+    def row(self, i, component_table):
+        '''
+        Net i in the id2NetInfo layout of def_parser.py:
+        {'net_name', 'connections': [{'instance_name', 'pin_name'}, ...]}
+        As there, IO pin connections are left out; instances missing from the
+        ComponentTable are reported as 'UNKNOWN'.
+        '''
+        inst_ids, pin_ids = self.connections(i)
+        return {
+            'net_name': self.net_name(i),
+            'connections': [
+                {
+                    'instance_name': component_table.instance_name(inst_id) if inst_id >= 0 else 'UNKNOWN',
+                    'pin_name': self.pin_names[pin_id]
+                }
+                for inst_id, pin_id in zip(inst_ids.tolist(), pin_ids.tolist()) if inst_id != IO_PIN
+            ]
+        }
+
+
+class NetPinCSRBuilder:
+    '''
+    Append nets one at a time, then build() the NetPinCSR.
+    Instance names are resolved against component_table while appending.
+    '''
+    def __init__(self, component_table, names=None):
+        self.component_table = component_table
+        self.cell_ids = component_table.cell_ids.tolist()
+        names = names if names is not None else component_table.names
+        # Instances are looked up in the names of the table, or in a dict built on first use
+        self.instance_table = None
+        if names is not None and len(names.instances) == len(component_table):
+            self.instance_table = names.instances
+        self.instance_index = None
+        self.raw_instance_index = None
+        self.names = names if names is not None else DesignNames()
+        if len(self.names.nets):
+            # Net ids are the CSR rows: the nets of another CSR are not shared
+            self.names = self.names.fork('nets')
+        # A frozen (compacted) pin table cannot take new pin names: the CSR gets its own
+        self.names = self.names.writable('nets', 'pins')
+        self.indptr = array('q', [0])
+        self.inst_ids = array('i')
+        self.pin_ids = array('i')
+        self.pin_cell_ids = array('i')
+        self.pin_name_ids = array('i')
+        # (cell id, pin name id) -> pin id
+        self.pin_index = {}
+
+    def _pin_id(self, cell_id, pin_name_id):
+        pin_id = self.pin_index.get((cell_id, pin_name_id))
+        if pin_id is None:
+            pin_id = self.pin_index[(cell_id, pin_name_id)] = len(self.pin_cell_ids)
+            self.pin_cell_ids.append(cell_id)
+            self.pin_name_ids.append(pin_name_id)
+        return pin_id
+
+    def add(self, net_name, connections):
+        '''connections: iterable of (ins_name, pin_name), ins_name "PIN" for IO pins'''
+        if self.instance_table is not None:
+            lookup = self.instance_table.get
+        else:
+            if self.instance_index is None:
+                self.instance_index = {name: i for i, name in enumerate(self.component_table.instance_names())}
+            lookup = self.instance_index.get
+        self.names.nets.append(net_name)
+        intern_pin = self.names.pins.intern
+        for ins_name, pin_name in connections:
+            if ins_name == 'PIN':
+                inst_id = IO_PIN
+                cell_id = -1
+            else:
+                inst_id = lookup(ins_name, UNKNOWN_INSTANCE)
+                cell_id = self.cell_ids[inst_id] if inst_id >= 0 else -1
+            self.inst_ids.append(inst_id)
+            self.pin_ids.append(self._pin_id(cell_id, intern_pin(pin_name)))
+        self.indptr.append(len(self.inst_ids))
+
+    def add_raw(self, net_name, connections):
+        '''Same as add() with utf-8 bytes names, which are looked up and interned without decoding'''
+        if self.instance_table is not None:
+            lookup = self.instance_table.get_raw
+        else:
+            if self.raw_instance_index is None:
+                offsets = self.component_table.name_offsets.tolist()
+                buffer = self.component_table.name_buffer
+                self.raw_instance_index = {buffer[start:end]: i for i, (start, end) in enumerate(zip(offsets[:-1], offsets[1:]))}
+            lookup = self.raw_instance_index.get
+        self.names.nets.append_raw(net_name)
+        intern_pin = self.names.pins.intern_raw
+        for ins_name, pin_name in connections:
+            if ins_name == b'PIN':
+                inst_id = IO_PIN
+                cell_id = -1
+            else:
+                inst_id = lookup(ins_name, UNKNOWN_INSTANCE)
+                cell_id = self.cell_ids[inst_id] if inst_id >= 0 else -1
+            self.inst_ids.append(inst_id)
+            self.pin_ids.append(self._pin_id(cell_id, intern_pin(pin_name)))
+        self.indptr.append(len(self.inst_ids))
+
+    def add_tokens(self, seperate_components):
+        '''
+        Add one net from the tokens of its head line, with the connection rules of
+        EnhancedNetHeadFormatter: "( ins pin ... )" groups up to the first "+ PROPERTY".
+        '''
+        if len(seperate_components) < 2:
+            self.add('UNKNOWN', [])
+            return
+        connections = []
+        for token in seperate_components[2:]:
+            if token.startswith('+ '):
+                break
+            if token.startswith('(') and token.endswith(')'):
+                parts = token.strip('() ').split()
+                if len(parts) >= 2:
+                    connections.append((parts[0], parts[1]))
+        self.add(seperate_components[1], connections)
+
+    def build(self) -> NetPinCSR:
+        nets = self.names.nets.freeze()
+        pin_name_ids = np.frombuffer(self.pin_name_ids, dtype=np.int32).copy()
+        return NetPinCSR(
+            indptr=np.frombuffer(self.indptr, dtype=np.int64).copy(),
+            inst_ids=np.frombuffer(self.inst_ids, dtype=np.int32).copy(),
+            pin_ids=np.frombuffer(self.pin_ids, dtype=np.int32).copy(),
+            pin_cell_ids=np.frombuffer(self.pin_cell_ids, dtype=np.int32).copy(),
+            pin_names=NameList(self.names.pins, pin_name_ids),
+            name_offsets=nets.offsets,
+            name_buffer=nets.buffer,
+            pin_name_ids=pin_name_ids,
+            names=self.names,
+        )
+
+
+class NetPinCSRTransformer(BlockTransformer):
+    '''
+    Transform the raw NETS entries of MultiLineBlockParserWithEnd into a NetPinCSR.
+    input: any iterable of {'head_section': full_content, ...} and the ComponentTable of the design
+    '''
+    batch_size = 2048
+
+    def __init__(self, line_seperator):
+        self.line_seperator = line_seperator
+
+    def transform(self, raw_sections, component_table) -> NetPinCSR:
+        builder = NetPinCSRBuilder(component_table)
+        raw_sections = iter(raw_sections)
+        while batch := list(islice(raw_sections, self.batch_size)):
+            head_lines = [raw_section['head_section'] for raw_section in batch]
+            for seperated_head_line in self.line_seperator.seperate_many(head_lines):
+                builder.add_tokens(seperated_head_line)
+        return builder.build()
+
+
+net_csr_transformer = NetPinCSRTransformer(BulkLineSeperator())
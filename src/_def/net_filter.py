@@ -0,0 +1,102 @@
+'''
+Post-parse filtering of nets.
+
+All the predicates are evaluated at once on per-net arrays, and the kept nets are
+renumbered 0..m-1 in their original order:
+
+    degree     number of instance connections (IO pins excluded, as in id2NetInfo)
+    names      net names, only used by the power net predicate
+
+Predicates (a net is dropped when any of them holds):
+
+    min_degree / max_degree   degree outside [min_degree, max_degree]; only applied to nets
+                              that connect at least one instance
+    drop_io_only              the net connects no instance (only IO pins, or nothing)
+    drop_power                the name matches power_pattern (VDD, VSS, GND, ...)
+
+NetFilter(min_degree=2) is the classic pruning of def_parser.py: single-pin nets are dropped.
+'''
+import re
+
+import numpy as np
+
+from .net_csr import NetPinCSR
+
+DEFAULT_POWER_PATTERN = r'^(VDD|VSS|VCC|GND|VPWR|VGND|VNW|VPW)\w*$'
+
+
+class NetFilter:
+    def __init__(self, min_degree=None, max_degree=None, drop_io_only=False, drop_power=False,
+                 power_pattern=DEFAULT_POWER_PATTERN):
+        self.min_degree = min_degree
+        self.max_degree = max_degree
+        self.drop_io_only = drop_io_only
+        self.drop_power = drop_power
+        self.power_pattern = re.compile(power_pattern, re.IGNORECASE)
+
+    def keep_mask(self, degree, names=None):
+        '''Boolean mask of the nets that pass every predicate'''
+        degree = np.asarray(degree)
+        keep = np.ones(len(degree), dtype=bool)
+        connects_instances = degree > 0
+        if self.min_degree is not None:
+            keep &= ~connects_instances | (degree >= self.min_degree)
+        if self.max_degree is not None:
+            keep &= ~connects_instances | (degree <= self.max_degree)
+        if self.drop_io_only:
+            keep &= connects_instances
+        if self.drop_power:
+            if names is None:
+                raise ValueError("drop_power needs the net names")
+            match = self.power_pattern.match
+            keep &= ~np.fromiter((match(name) is not None for name in names), dtype=bool, count=len(degree))
+        return keep
+
+    def renumber(self, keep):
+        '''(kept old ids, new id of every old id or -1 when dropped)'''
+        kept = np.flatnonzero(keep)
+        new_ids = np.full(len(keep), -1, dtype=np.int64)
+        new_ids[kept] = np.arange(len(kept))
+        return kept, new_ids
+
+    def filter_nets(self, nets):
+        '''
+        Filter the formatted nets of DefParser.parse() (dicts with 'net_name' and 'connections').
+        return (kept old ids, new id of every old id or -1)
+        '''
+        # The dicts have to be visited once; the predicates then run on the degree array
+        degree = np.fromiter(
+            (sum(connection['ins_name'] != 'PIN' for connection in net['connections']) for net in nets),
+            dtype=np.int64, count=len(nets)
+        )
+        names = [net['net_name'] for net in nets] if self.drop_power else None
+        return self.renumber(self.keep_mask(degree, names))
+
+    def filter_csr(self, csr):
+        '''
+        Filter a NetPinCSR.
+        return (filtered NetPinCSR with the kept nets renumbered, new id of every old id or -1)
+        '''
+        names = csr.net_names() if self.drop_power else None
+        kept, new_ids = self.renumber(self.keep_mask(csr.degree(include_io=False), names))
+
+        counts = np.diff(csr.indptr)[kept]
+        indptr = np.zeros(len(kept) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        # Position of every kept connection in the old arrays
+        connections = np.repeat(csr.indptr[kept] - indptr[:-1], counts) + np.arange(indptr[-1])
+        name_lengths = np.diff(csr.name_offsets)[kept]
+        name_offsets = np.zeros(len(kept) + 1, dtype=np.int64)
+        np.cumsum(name_lengths, out=name_offsets[1:])
+        name_positions = np.repeat(csr.name_offsets[kept] - name_offsets[:-1], name_lengths) + np.arange(name_offsets[-1])
+        name_buffer = np.frombuffer(csr.name_buffer, dtype=np.uint8)[name_positions].tobytes()
+        return NetPinCSR(
+            indptr=indptr,
+            inst_ids=csr.inst_ids[connections],
+            pin_ids=csr.pin_ids[connections],
+            pin_cell_ids=csr.pin_cell_ids,
+            pin_names=csr.pin_names,
+            name_offsets=name_offsets,
+            name_buffer=name_buffer,
+            pin_name_ids=csr.pin_name_ids,
+        ), new_ids
@@ -0,0 +1,276 @@
+'''
+Process-parallel parsing of DEF sections.
+
+Once the section indexer knows the byte range of a section, the range can be
+handed to a worker process: the worker mmaps the file itself (or gets the bytes
+of its chunk when the content only exists in memory) and does the work whose
+result is small to send back.
+
+Large sections are further split into chunks aligned on "- name ... ;" entry
+boundaries; the chunks are processed in the pool and concatenated in file
+order, which gives exactly the entries of the serial path.
+
+parse() returns one formatted dict per entry, so its workers send those dicts
+back. Formatting them is the larger part of the serial time and has to stay in
+the workers (a compact token encoding formatted in the main process costs more
+there than unpickling the dicts). What is expensive on that side is the cyclic
+GC running over the millions of unpickled objects, so the GC is paused while
+the pool is open, and is off in the workers. The columnar readers return arrays
+only: for DefParser.parse_component_table() / parse_net_csr() the workers return
+the arrays of their chunk (submit_columns), and the chunks are merged into one
+ComponentTable / NetPinCSR:
+
+    COMPONENTS  name offsets / buffer, cell ids + cell names, x, y, orient, status
+    NETS        indptr, instance ids, pin ids + (cell, pin name) table, net name offsets / buffer
+
+NETS workers number the connection instances themselves: the instance names and
+cells of the table are sent once per worker by the pool initializer, and indexed
+once there. The merge appends the name buffers in bulk (NameTable.extend_raw).
+'''
+import gc
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.parser.section_indexer import SectionReader, SectionSpan, open_mmap, split_on_entries
+from src.parser.specifig_parser import MultiLineBlockParserWithEnd
+from src._def.transformer.specific import component_block_transformer, enhanced_net_block_transformer
+from src._def.component_table import ComponentTable, component_table_transformer
+from src._def.net_csr import NetPinCSR, net_csr_transformer
+from src._def.byte_engine import parse_component_table_bytes, parse_net_csr_bytes
+from src._def.name_table import DesignNames, NameList, NameTable
+
+# Sections that can be handed to a worker, with the transformer applied to them
+SECTION_TRANSFORMERS = {
+    'COMPONENTS': component_block_transformer,
+    'NETS': enhanced_net_block_transformer,
+}
+
+# Sections smaller than this are not split into chunks
+MIN_CHUNK_BYTES = 4 << 20
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+# Instance lookup of a NETS worker, set by the pool initializer (see ParallelSectionParser)
+_worker_instances = None
+
+
+def parse_chunk(def_file_path, keyword, start, end, data=None):
+    '''
+    Parse and transform the entries of a section found in [start, end).
+    Runs in a worker process, so it opens its own mmap of the file; for an input
+    that is not mmapped (e.g. decompressed in memory) the bytes of the chunk are
+    passed in data instead.
+    '''
+    source = os.path.abspath(def_file_path)
+    if data is not None:
+        f = SectionReader(data, 0, len(data), source=source, base=start)
+        return SECTION_TRANSFORMERS[keyword].transform(MultiLineBlockParserWithEnd().parse(f, '', keyword))
+    mm = open_mmap(def_file_path)
+    try:
+        f = SectionReader(mm, start, end, source=source)
+        return SECTION_TRANSFORMERS[keyword].transform(MultiLineBlockParserWithEnd().parse(f, '', keyword))
+    finally:
+        mm.close()
+
+
+def _init_worker(instances=None):
+    # Pool initializer. A worker only builds objects that it sends back, and the
+    # cyclic GC pass over them would find nothing to free, so the GC is off in workers.
+    # The instance names are indexed once per worker, for every NETS chunk.
+    global _worker_instances
+    gc.disable()
+    if instances is not None:
+        _worker_instances = _instance_lookup(instances)
+
+
+def _instance_lookup(instances):
+    '''(ComponentTable columns, DesignNames with the indexed instance names) of (name_offsets, name_buffer, cell_ids)'''
+    name_offsets, name_buffer, cell_ids = instances
+    names = DesignNames()
+    names.instances = NameTable.from_buffer(name_offsets, name_buffer, index=True)
+    return (name_offsets, name_buffer, cell_ids), names
+
+
+def parse_columns_chunk(def_file_path, keyword, start, end, data=None, engine='text', instances=None):
+    '''
+    Columns of the entries found in [start, end) (see the module docstring), built with the
+    text or bytes engine. instances: (name_offsets, name_buffer, cell_ids) of the ComponentTable,
+    for NETS; by default those the pool initializer gave the worker. Runs in a worker process;
+    data as in parse_chunk.
+    '''
+    if data is not None:
+        mm, start, end = data, 0, len(data)
+    else:
+        mm = open_mmap(def_file_path)
+    try:
+        if keyword == 'COMPONENTS':
+            if engine == 'bytes':
+                table = parse_component_table_bytes(mm, [SectionSpan(keyword, start, start, end)])
+            else:
+                table = component_table_transformer.transform(_iter_raw_chunk(mm, start, end, keyword))
+            return (table.name_offsets, table.name_buffer, table.cell_ids, list(table.cell_names),
+                    table.x, table.y, table.orient, table.status)
+        (name_offsets, name_buffer, cell_ids), names = (
+            _instance_lookup(instances) if instances is not None else _worker_instances)
+        # The nets and pins of every chunk are its own, the instance index is shared
+        table = ComponentTable(name_offsets, name_buffer, cell_ids, None, None, None, None, None,
+                               names=names.fork('nets', 'pins'))
+        if engine == 'bytes':
+            csr = parse_net_csr_bytes(mm, [SectionSpan(keyword, start, start, end)], table)
+        else:
+            csr = net_csr_transformer.transform(_iter_raw_chunk(mm, start, end, keyword), table)
+        return (csr.indptr, csr.inst_ids, csr.pin_ids, csr.pin_cell_ids, list(csr.pin_names),
+                csr.name_offsets, csr.name_buffer)
+    finally:
+        if data is None:
+            mm.close()
+
+
+def _iter_raw_chunk(mm, start, end, keyword):
+    return MultiLineBlockParserWithEnd().iter_parse(SectionReader(mm, start, end), '', keyword)
+
+
+def merge_component_columns(parts) -> ComponentTable:
+    '''ComponentTable of the COMPONENTS columns of consecutive chunks, as the serial path builds it'''
+    names = DesignNames()
+    cell_ids = []
+    for name_offsets, name_buffer, part_cell_ids, cell_names, *_ in parts:
+        names.instances.extend_raw(name_offsets, name_buffer)
+        # Chunk cell ids -> ids of the merged cells table
+        remap = np.array([names.cells.intern(cell_name) for cell_name in cell_names] or [0], dtype=np.int32)
+        cell_ids.append(remap[part_cell_ids])
+    instances = names.instances.freeze()
+    columns = [np.concatenate([part[k] for part in parts]) if parts else np.zeros(0, dtype=dtype)
+               for k, dtype in ((4, np.int64), (5, np.int64), (6, np.int8), (7, np.int8))]
+    return ComponentTable(
+        instances.offsets, instances.buffer,
+        np.concatenate(cell_ids) if cell_ids else np.zeros(0, dtype=np.int32),
+        names.cells, *columns, names=names,
+    )
+
+
+def merge_net_columns(parts, component_table) -> NetPinCSR:
+    '''NetPinCSR of the NETS columns of consecutive chunks, as NetPinCSRBuilder builds it'''
+    names = component_table.names if component_table.names is not None else DesignNames()
+    if len(names.nets):
+        names = names.fork('nets')
+    names = names.writable('nets', 'pins')
+    indptr = [np.zeros(1, dtype=np.int64)]
+    inst_ids = []
+    pin_ids = []
+    # (cell id, pin name id) -> pin id, in first-seen order like the builder
+    pin_index = {}
+    pin_cell_ids = []
+    pin_name_ids = []
+    n_conns = 0
+    for part_indptr, part_inst_ids, part_pin_ids, part_pin_cells, part_pin_names, net_offsets, net_buffer in parts:
+        names.nets.extend_raw(net_offsets, net_buffer)
+        remap = []
+        for cell_id, pin_name in zip(part_pin_cells.tolist(), part_pin_names):
+            key = (cell_id, names.pins.intern(pin_name))
+            pin_id = pin_index.get(key)
+            if pin_id is None:
+                pin_id = pin_index[key] = len(pin_cell_ids)
+                pin_cell_ids.append(cell_id)
+                pin_name_ids.append(key[1])
+            remap.append(pin_id)
+        indptr.append(part_indptr[1:] + n_conns)
+        n_conns += int(part_indptr[-1])
+        inst_ids.append(part_inst_ids)
+        pin_ids.append(np.array(remap or [0], dtype=np.int32)[part_pin_ids])
+    nets = names.nets.freeze()
+    pin_name_ids = np.array(pin_name_ids, dtype=np.int32)
+    return NetPinCSR(
+        indptr=np.concatenate(indptr),
+        inst_ids=np.concatenate(inst_ids) if inst_ids else np.zeros(0, dtype=np.int32),
+        pin_ids=np.concatenate(pin_ids) if pin_ids else np.zeros(0, dtype=np.int32),
+        pin_cell_ids=np.array(pin_cell_ids, dtype=np.int32),
+        pin_names=NameList(names.pins, pin_name_ids),
+        name_offsets=nets.offsets,
+        name_buffer=nets.buffer,
+        pin_name_ids=pin_name_ids,
+        names=names,
+    )
+
+
+class ParallelSectionParser:
+    '''
+    Submit sections to a process pool and collect the transformed entries.
+
+    usage:
+        with ParallelSectionParser(def_file_path, workers=8) as section_parser:
+            section_parser.submit(mm, span)
+            ...
+            results = section_parser.results()   # {keyword: [formatted entries]}
+
+    or, for the columnar readers (instances: the table columns NETS workers number against):
+        with ParallelSectionParser(def_file_path, workers=8, instances=instances) as section_parser:
+            section_parser.submit_columns(mm, span, engine)
+            parts = section_parser.column_results('NETS')   # chunk columns, in file order
+    '''
+    def __init__(self, def_file_path, workers=None, min_chunk_bytes=None, instances=None):
+        self.def_file_path = def_file_path
+        self.workers = workers or default_workers()
+        self.min_chunk_bytes = min_chunk_bytes or MIN_CHUNK_BYTES
+        self.instances = instances
+        self.pool = None
+        self.futures = {}
+        self.column_futures = {}
+
+    def __enter__(self):
+        # The instances are sent to every worker once, not with every chunk
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.instances,))
+        # Unpickling the returned entries creates millions of objects: with the GC on, its
+        # passes over them cost more than the unpickling itself
+        self.gc_was_enabled = gc.isenabled()
+        gc.disable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.pool.shutdown(cancel_futures=exc_type is not None)
+        finally:
+            self.pool = None
+            if self.gc_was_enabled:
+                gc.enable()
+        return False
+
+    def _submit_chunks(self, function, mm, span, *args):
+        # One chunk per worker at most, and none smaller than min_chunk_bytes
+        n_chunks = max(1, min(self.workers, (span.end - span.body_start) // self.min_chunk_bytes))
+        # Workers mmap the file themselves unless the content only exists in memory
+        in_memory = not isinstance(mm, mmap.mmap)
+        return [
+            self.pool.submit(function, self.def_file_path, span.keyword, start, end,
+                             bytes(mm[start:end]) if in_memory else None, *args)
+            for start, end in split_on_entries(mm, span.body_start, span.end, n_chunks)
+        ]
+
+    def submit(self, mm, span):
+        # A keyword can have several sections: their entries follow each other, as in the serial path
+        self.futures.setdefault(span.keyword, []).extend(self._submit_chunks(parse_chunk, mm, span))
+
+    def submit_columns(self, mm, span, engine='text'):
+        '''Submit span to parse_columns_chunk (NETS numbered against the instances of the pool)'''
+        if span.keyword == 'NETS' and self.instances is None:
+            raise ValueError("NETS columns need the instances: ParallelSectionParser(..., instances=...)")
+        self.column_futures.setdefault(span.keyword, []).extend(
+            self._submit_chunks(parse_columns_chunk, mm, span, engine))
+
+    def results(self):
+        # Merge the chunks back in file order
+        return {
+            keyword: [entry for future in futures for entry in future.result()]
+            for keyword, futures in self.futures.items()
+        }
+
+    def column_results(self, keyword):
+        '''Columns of the chunks of keyword, in file order'''
+        return [future.result() for future in self.column_futures.get(keyword, [])]
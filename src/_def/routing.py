@@ -0,0 +1,472 @@
+'''
+Routing geometry of the NETS / SPECIALNETS sections.
+
+The wiring statements of every net (+ ROUTED / FIXED / COVER / NOSHIELD, + SHIELD,
+and the special net shapes) are expanded into flat arrays:
+
+    segments   net_ids, layer_ids, x1, y1, x2, y2, width, status   one row per wire segment
+    vias       net_ids, via_ids, x, y, orient                      one row per via (DO n BY m
+                                                                   arrays are expanded)
+    rects      net_ids, layer_ids, xlo, ylo, xhi, yhi              RECT / + POLYGON shapes
+                                                                   (a polygon is its bounding box)
+
+Net ids number the entries of the section in file order, so for NETS they are the
+ids of the NetPinCSR built from the same file. Layer and via names are interned
+(layer_names / via_names); coordinates are int32 like the LEF/DEF reader's.
+
+The point compression of DEF is resolved on the point arrays: in ( x * ) and ( * y )
+the "*" repeats the coordinate of the previous point, ( * * ) is the previous point
+itself (e.g. after a via). A segment joins two consecutive distinct points of a path;
+a VIRTUAL point starts a new stretch without a segment to it, RECT ( dx1 dy1 dx2 dy2 )
+is a rect relative to the current point. width is the route width of special wiring
+and 0 in regular wiring (the default width of the layer or of the NONDEFAULTRULE,
+which the DEF does not repeat).
+
+A path changes layer at a via; which layer it continues on is only known from the
+via definition, so it is given as via_layers ({via name: (layer, layer)}: the path
+goes on the other layer of the pair). Without it the path keeps its layer.
+
+The section is read in chunks of whole entries straight from the mmap. In a chunk,
+every "( x y [ext] )" point is pulled out by one regex and converted to an int array
+at once; only the remaining words (layers, vias, keywords) are walked in Python, and
+they assign runs of consecutive points to a path, a shape or a via list. Segments,
+"*" filling, via positions and shape boxes are then array expressions, so the points
+never become Python objects. Parentheses, "+" and ";" are expected to be separate
+tokens (as every DEF writer emits them); "#" comments are dropped.
+
+    routing = parser.parse_routing('NETS')
+    routing.net_wirelength()                   # per net, in database units
+    special = parser.parse_routing('SPECIALNETS', via_layers={'M1_M2': ('M1', 'M2')})
+'''
+import re
+from array import array
+from itertools import compress
+
+import numpy as np
+
+from src.parser.section_indexer import split_on_entries
+from .component_table import ORIENT_CODE, ORIENT_UNKNOWN
+from .spatial_index import _expand
+
+WIRING_STATUS = ('ROUTED', 'FIXED', 'COVER', 'NOSHIELD', 'SHIELD')
+WIRING_CODE = {status: code for code, status in enumerate(WIRING_STATUS)}
+SEGMENT_COLUMNS = ('net_ids', 'layer_ids', 'x1', 'y1', 'x2', 'y2', 'width', 'status')
+VIA_COLUMNS = ('net_ids', 'via_ids', 'x', 'y', 'orient')
+RECT_COLUMNS = ('net_ids', 'layer_ids', 'xlo', 'ylo', 'xhi', 'yhi')
+# Chunks of entries processed at once, bounds the temporary arrays
+CHUNK_BYTES = 16 << 20
+
+# Options between the layer (and width) of a special path and its first point
+_SPECIAL_PATH_OPTIONS = ('SHAPE', 'STYLE', 'MASK')
+_COMMENT = re.compile(r'(?<!\S)#[^\n]*')
+# A point, its "x y" captured; RECT ( dx1 dy1 dx2 dy2 ) does not match and stays as words
+_POINT = re.compile(r'\(\s*((?:-?\d+|\*)\s+(?:-?\d+|\*))(?:\s+(?:-?\d+|\*))?\s*\)')
+# Stands for a point between the words
+_POINT_MARK = '\x00'
+# Value of a "*" coordinate before filling
+_STAR = -(1 << 40)
+
+# What a run of points is: not geometry (VPIN, ...), a wiring path, a special RECT / POLYGON, a + VIA list
+_IGNORED, _PATH, _SHAPE, _VIA_POINTS = range(4)
+# Switch rows: first point, kind, net, layer, width, status, group (path / shape id), via, orient
+_SWITCH_FIELDS = 9
+# Via rows: net, via, point, orient, num_x, num_y, step_x, step_y (vias placed on a path point)
+_VIA_FIELDS = 8
+# Rect rows: net, layer, point, dx1, dy1, dx2, dy2 (RECT around a path point)
+_RECT_FIELDS = 7
+
+
+class RoutingGeometry:
+    '''
+    Wire segments, vias and rects of the nets of one section, see the module docstring.
+    '''
+    def __init__(self, section, name_offsets, name_buffer, layer_names, via_names, segments, vias, rects):
+        self.section = section
+        self.name_offsets = name_offsets
+        self.name_buffer = name_buffer
+        self.layer_names = layer_names
+        self.via_names = via_names
+        # {column: array}
+        self.segments = segments
+        self.vias = vias
+        self.rects = rects
+
+    def __len__(self):
+        '''Number of nets'''
+        return len(self.name_offsets) - 1
+
+    def net_name(self, i):
+        return self.name_buffer[self.name_offsets[i]:self.name_offsets[i + 1]].decode('utf-8')
+
+    def net_names(self):
+        '''All net names, in net id order'''
+        offsets = self.name_offsets.tolist()
+        buffer = self.name_buffer
+        return [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def segment_length(self):
+        '''Manhattan length of every segment (int64)'''
+        segments = self.segments
+        return (np.abs(segments['x2'].astype(np.int64) - segments['x1'])
+                + np.abs(segments['y2'].astype(np.int64) - segments['y1']))
+
+    def net_wirelength(self):
+        '''Routed wirelength of every net'''
+        return np.bincount(self.segments['net_ids'], weights=self.segment_length(), minlength=len(self))
+
+    def layer_wirelength(self):
+        '''Routed wirelength per layer, aligned with layer_names'''
+        return np.bincount(self.segments['layer_ids'], weights=self.segment_length(), minlength=len(self.layer_names))
+
+    def via_count(self):
+        '''Number of vias of every net'''
+        return np.bincount(self.vias['net_ids'], minlength=len(self))
+
+    def net_segments(self, i):
+        '''Row range [start, end) of the segments of net i (segments are stored by net)'''
+        net_ids = self.segments['net_ids']
+        return int(np.searchsorted(net_ids, i, 'left')), int(np.searchsorted(net_ids, i, 'right'))
+
+
+class _ChunkWalker:
+    '''
+    Walk the words of one chunk (points taken out, before[k] points precede word k) and record
+    which run of points belongs to what, plus the vias and RECTs placed on path points.
+    '''
+    def __init__(self, builder, words, before):
+        self.builder = builder
+        self.words = words
+        self.before = before
+        # A point belongs to the last switch at or before it
+        self.switches = [0, _IGNORED, -1, -1, 0, 0, 0, -1, ORIENT_UNKNOWN]
+        self.vias = []
+        self.rects = []
+        self.virtual = []
+        self.n_groups = 0
+
+    def _switch(self, k, kind, net=-1, layer=-1, width=0, status=0, via=-1, orient=ORIENT_UNKNOWN, group=None):
+        '''The points after word k start a new run; return its group id'''
+        if group is None:
+            self.n_groups += 1
+            group = self.n_groups
+        self.switches.extend((self.before[k], kind, net, layer, width, status, group, via, orient))
+        return group
+
+    def walk(self):
+        words = self.words
+        builder = self.builder
+        special = builder.special
+        i, n = 0, len(words)
+        while i < n:
+            # The section line, END <section> and anything between entries is skipped
+            if words[i] != '-' or i + 1 >= n:
+                i += 1
+                continue
+            net = builder._add_net(words[i + 1])
+            i += 2
+            while i < n and words[i] != ';':
+                word = words[i]
+                if word == '(':
+                    # Connections ( comp pin ), which may hold "+ SYNTHESIZED"
+                    i = i + 4 if i + 3 < n and words[i + 3] == ')' else _close(words, i) + 1
+                    continue
+                if word != '+' or i + 1 >= n:
+                    i += 1
+                    continue
+                keyword = words[i + 1]
+                i += 2
+                if keyword in WIRING_CODE:
+                    if keyword == 'SHIELD':
+                        # + SHIELD shieldNetName layer ...
+                        i += 1
+                    i = self._walk_wiring(i, net, WIRING_CODE[keyword])
+                    self._switch(i, _IGNORED)
+                elif keyword == 'SUBNET':
+                    # + SUBNET name ( comp pin ) ... [NONDEFAULTRULE rule] [ROUTED layer ...]
+                    i += 1
+                    while i < n and words[i] not in ('+', ';'):
+                        if words[i] == '(':
+                            i = _close(words, i) + 1
+                        elif words[i] in WIRING_CODE:
+                            i = self._walk_wiring(i + 1, net, WIRING_CODE[words[i]])
+                            self._switch(i, _IGNORED)
+                        else:
+                            i += 1
+                elif special and keyword in ('RECT', 'POLYGON') and i < n:
+                    # + RECT layer pt pt / + POLYGON layer pt pt pt ...
+                    self._switch(i, _SHAPE, net, builder._layer_id(words[i]))
+                    self._switch(i + 1, _IGNORED)
+                    i += 1
+                elif special and keyword == 'VIA' and i < n:
+                    # + VIA viaName [orient] pt ...
+                    via = builder._via_id(words[i])
+                    i += 1
+                    orient = ORIENT_UNKNOWN
+                    if i < n and words[i] in ORIENT_CODE:
+                        orient = ORIENT_CODE[words[i]]
+                        i += 1
+                    self._switch(i - 1, _VIA_POINTS, net, via=via, orient=orient)
+                    self._switch(i, _IGNORED)
+            i += 1
+
+    def _walk_wiring(self, i, net, status):
+        '''
+        Walk a wiring statement from its first layer name: paths separated by NEW.
+        return the index of the word that ends it ("+ keyword" or ";")
+        '''
+        words = self.words
+        before = self.before
+        builder = self.builder
+        special = builder.special
+        via_layers = builder.via_layers
+        n = len(words)
+        while i < n and words[i] not in ('+', ';'):
+            # Path header: layer [width] [TAPER | TAPERRULE rule] [STYLE n] [+ SHAPE / + STYLE / + MASK ...]
+            layer = builder._layer_id(words[i])
+            i += 1
+            width = 0
+            if special and i < n and words[i].lstrip('-').isdigit():
+                width = int(words[i])
+                i += 1
+            while i < n:
+                word = words[i]
+                if word == 'TAPER':
+                    i += 1
+                elif word in ('TAPERRULE', 'STYLE'):
+                    i += 2
+                elif word == '+' and i + 1 < n and words[i + 1] in _SPECIAL_PATH_OPTIONS:
+                    i += 3
+                else:
+                    break
+            path = self._switch(i - 1, _PATH, net, layer, width, status)
+            path_start = before[i - 1]
+            new_path = False
+            # The words between the points of the path
+            while i < n:
+                word = words[i]
+                if word == 'NEW':
+                    i += 1
+                    new_path = True
+                    break
+                if word in ('+', ';'):
+                    break
+                if word == 'MASK':
+                    i += 2
+                elif word == 'VIRTUAL':
+                    # The next point is not wired to the previous one
+                    self.virtual.append(before[i])
+                    i += 1
+                elif word == 'RECT' or word == '(':
+                    # RECT ( dx1 dy1 dx2 dy2 ) around the current point; a stray group is skipped
+                    start = i + 1 if word == 'RECT' else i
+                    close = _close(words, start)
+                    values = words[start + 1:close]
+                    if word == 'RECT' and len(values) == 4 and before[i] > path_start:
+                        self.rects.extend((net, layer, before[i] - 1) + tuple(map(int, values)))
+                    i = close + 1
+                else:
+                    # viaName [orient] [DO numX BY numY STEP stepX stepY] on the current point
+                    via = builder._via_id(word)
+                    point = before[i] - 1
+                    i += 1
+                    orient = ORIENT_UNKNOWN
+                    if i < n and words[i] in ORIENT_CODE:
+                        orient = ORIENT_CODE[words[i]]
+                        i += 1
+                    array_shape = (1, 1, 0, 0)
+                    if i + 6 < n and words[i] == 'DO' and words[i + 2] == 'BY' and words[i + 4] == 'STEP':
+                        array_shape = (int(words[i + 1]), int(words[i + 3]), int(words[i + 5]), int(words[i + 6]))
+                        i += 7
+                    if point < path_start:
+                        continue
+                    self.vias.extend((net, via, point, orient) + array_shape)
+                    layers = via_layers.get(via)
+                    if layers is not None and layer in layers:
+                        # Same path, on the other layer of the via from here on
+                        layer = layers[1] if layer == layers[0] else layers[0]
+                        self._switch(i - 1, _PATH, net, layer, width, status, group=path)
+            if not new_path:
+                break
+        return i
+
+
+def _rows(values, n_fields):
+    return np.array(values, dtype=np.int64).reshape(-1, n_fields)
+
+
+class RoutingGeometryBuilder:
+    '''
+    Append chunks of section text made of whole entries, then build() the RoutingGeometry.
+    The SPECIALNETS grammar (route width after the layer, + SHAPE, + RECT, ...) is used for
+    section 'SPECIALNETS'.
+    '''
+    def __init__(self, section='NETS', via_layers=None):
+        self.section = section
+        self.special = section == 'SPECIALNETS'
+        self.name_offsets = array('q', [0])
+        self.name_buffer = bytearray()
+        self.layer_names = []
+        self.layer_index = {}
+        self.via_names = []
+        self.via_index = {}
+        # One {column: array} per chunk
+        self.segment_chunks = []
+        self.via_chunks = []
+        self.rect_chunks = []
+        # via id -> (layer id, layer id)
+        self.via_layers = {}
+        for via_name, layers in (via_layers or {}).items():
+            self.via_layers[self._via_id(via_name)] = tuple(self._layer_id(layer) for layer in layers)
+
+    def _layer_id(self, name):
+        layer_id = self.layer_index.get(name)
+        if layer_id is None:
+            layer_id = self.layer_index[name] = len(self.layer_names)
+            self.layer_names.append(name)
+        return layer_id
+
+    def _via_id(self, name):
+        via_id = self.via_index.get(name)
+        if via_id is None:
+            via_id = self.via_index[name] = len(self.via_names)
+            self.via_names.append(name)
+        return via_id
+
+    def _add_net(self, name):
+        self.name_buffer += name.encode('utf-8')
+        self.name_offsets.append(len(self.name_buffer))
+        return len(self.name_offsets) - 2
+
+    def add_text(self, text):
+        '''Add the entries of a piece of section text made of whole "- name ... ;" entries'''
+        if '#' in text:
+            text = _COMMENT.sub('', text)
+        text = text.replace(';', ' ; ')
+        # split() alternates the text between the points and the "x y" of the points
+        pieces = _POINT.split(text)
+        point_text = ' '.join(pieces[1::2]).replace('*', str(_STAR))
+        if point_text:
+            points = np.fromstring(point_text, dtype=np.int64, sep=' ').reshape(-1, 2)
+        else:
+            points = np.zeros((0, 2), dtype=np.int64)
+        tokens = f' {_POINT_MARK} '.join(pieces[0::2]).split()
+        is_mark = np.fromiter(map(_POINT_MARK.__eq__, tokens), dtype=bool, count=len(tokens))
+        words = list(compress(tokens, ~is_mark))
+        # The q-th point follows marks[q] - q words; before[k] points precede word k (and the end)
+        marks = np.flatnonzero(is_mark)
+        before = np.searchsorted(marks - np.arange(len(marks)), np.arange(len(words) + 1), 'right').tolist()
+        walker = _ChunkWalker(self, words, before)
+        walker.walk()
+        self._add_geometry(points, walker)
+
+    def _add_geometry(self, points, walker):
+        runs = _rows(walker.switches, _SWITCH_FIELDS)
+        run_of_point = np.searchsorted(runs[:, 0], np.arange(len(points)), 'right') - 1
+        kind = runs[run_of_point, 1]
+        group = runs[run_of_point, 6]
+        # "*" takes the value of the previous point: forward fill of the explicit values, per axis
+        index = np.where(points == _STAR, 0, np.arange(len(points))[:, None])
+        np.maximum.accumulate(index, axis=0, out=index)
+        x = points[index[:, 0], 0]
+        y = points[index[:, 1], 1]
+        valid = (x != _STAR) & (y != _STAR)
+
+        # Segments: consecutive distinct points of the same path, the later one not virtual
+        joins = np.zeros(len(points), dtype=bool)
+        joins[1:] = ((kind[1:] == _PATH) & (group[1:] == group[:-1]) & valid[1:] & valid[:-1]
+                     & ((x[1:] != x[:-1]) | (y[1:] != y[:-1])))
+        virtual = np.array(walker.virtual, dtype=np.int64)
+        joins[virtual[virtual < len(points)]] = False
+        end = np.flatnonzero(joins)
+        run = runs[run_of_point[end]]
+        self.segment_chunks.append({
+            'net_ids': run[:, 2], 'layer_ids': run[:, 3],
+            'x1': x[end - 1], 'y1': y[end - 1], 'x2': x[end], 'y2': y[end],
+            'width': run[:, 4], 'status': run[:, 5],
+        })
+
+        # Vias: on path points (DO arrays expanded) and on the points of + VIA lists, in file order
+        path_vias = _rows(walker.vias, _VIA_FIELDS)
+        owner, rank = _expand(path_vias[:, 4] * path_vias[:, 5])
+        path_vias = path_vias[owner]
+        point = path_vias[:, 2]
+        listed = np.flatnonzero((kind == _VIA_POINTS) & valid)
+        listed_run = runs[run_of_point[listed]]
+        order = np.argsort(np.concatenate([point, listed]), kind='stable')
+        self.via_chunks.append({
+            'net_ids': np.concatenate([path_vias[:, 0], listed_run[:, 2]])[order],
+            'via_ids': np.concatenate([path_vias[:, 1], listed_run[:, 7]])[order],
+            'x': np.concatenate([x[point] + rank % path_vias[:, 4] * path_vias[:, 6], x[listed]])[order],
+            'y': np.concatenate([y[point] + rank // path_vias[:, 4] * path_vias[:, 7], y[listed]])[order],
+            'orient': np.concatenate([path_vias[:, 3], listed_run[:, 8]])[order],
+        })
+
+        # Rects: RECT around path points, and the bounding box of each special RECT / POLYGON
+        path_rects = _rows(walker.rects, _RECT_FIELDS)
+        point = path_rects[:, 2]
+        x1, y1 = x[point] + path_rects[:, 3], y[point] + path_rects[:, 4]
+        x2, y2 = x[point] + path_rects[:, 5], y[point] + path_rects[:, 6]
+        shape_points = np.flatnonzero((kind == _SHAPE) & valid)
+        starts = np.flatnonzero(np.r_[True, group[shape_points[1:]] != group[shape_points[:-1]]][:len(shape_points)])
+        shape_run = runs[run_of_point[shape_points[starts]]]
+        boxes = [reduce.reduceat(values[shape_points], starts) if len(starts) else np.zeros(0, dtype=np.int64)
+                 for values, reduce in ((x, np.minimum), (y, np.minimum), (x, np.maximum), (y, np.maximum))]
+        order = np.argsort(np.concatenate([point, shape_points[starts]]), kind='stable')
+        self.rect_chunks.append({
+            'net_ids': np.concatenate([path_rects[:, 0], shape_run[:, 2]])[order],
+            'layer_ids': np.concatenate([path_rects[:, 1], shape_run[:, 3]])[order],
+            'xlo': np.concatenate([np.minimum(x1, x2), boxes[0]])[order],
+            'ylo': np.concatenate([np.minimum(y1, y2), boxes[1]])[order],
+            'xhi': np.concatenate([np.maximum(x1, x2), boxes[2]])[order],
+            'yhi': np.concatenate([np.maximum(y1, y2), boxes[3]])[order],
+        })
+
+    def build(self) -> RoutingGeometry:
+        return RoutingGeometry(
+            section=self.section,
+            name_offsets=np.frombuffer(self.name_offsets, dtype=np.int64).copy(),
+            name_buffer=bytes(self.name_buffer),
+            layer_names=list(self.layer_names),
+            via_names=list(self.via_names),
+            segments=_concatenate(self.segment_chunks, SEGMENT_COLUMNS),
+            vias=_concatenate(self.via_chunks, VIA_COLUMNS),
+            rects=_concatenate(self.rect_chunks, RECT_COLUMNS),
+        )
+
+
+def _concatenate(chunks, columns):
+    '''{column: array} over all the chunks; status / orient as int8, the rest int32'''
+    result = {}
+    for name in columns:
+        dtype = np.int8 if name in ('status', 'orient') else np.int32
+        if chunks:
+            result[name] = np.concatenate([chunk[name] for chunk in chunks]).astype(dtype)
+        else:
+            result[name] = np.zeros(0, dtype=dtype)
+    return result
+
+
+def _close(words, i):
+    '''Index of the ")" closing the "(" at i (the last word if it is missing)'''
+    depth = 0
+    for j in range(i, len(words)):
+        if words[j] == '(':
+            depth += 1
+        elif words[j] == ')':
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(words) - 1
+
+
+def parse_routing(mm, spans, section='NETS', via_layers=None, chunk_bytes=CHUNK_BYTES):
+    '''
+    RoutingGeometry of the section (NETS or SPECIALNETS) found at spans of the mmap / buffer mm.
+    The body is processed in chunks of about chunk_bytes, cut on entry boundaries.
+    '''
+    builder = RoutingGeometryBuilder(section, via_layers)
+    for span in spans:
+        n_chunks = max(1, (span.end - span.body_start) // chunk_bytes)
+        for start, end in split_on_entries(mm, span.body_start, span.end, n_chunks):
+            builder.add_text(mm[start:end].decode('utf-8', errors='ignore'))
+    return builder.build()
@@ -0,0 +1,234 @@
+'''
+Spatial index over component placements.
+
+The instances of a ComponentTable become boxes (x, y) .. (x + w, y + h), with the
+cell width / height from the LEF SIZE (swapped for the E, W, FE, FW orientations),
+and are stored in a uniform bin grid: every box is listed in each bin it
+overlaps, as a CSR (bin_indptr / bin_items), so a window only looks at the boxes
+of the bins it covers.
+
+All queries are batched and run as NumPy array expressions over all the
+(query, bin) and (query, candidate) pairs at once; the single-query methods are
+thin wrappers. A box is reported once per query even when it spans several bins:
+only the bin holding the lower-left corner of the box / window overlap reports it.
+Boxes and windows are closed, so touching counts as overlapping.
+
+    index = SpatialIndex.from_component_table(table, cell_sizes_from_lef(lef_result, table.cell_names, 1000))
+    index.query_rect(0, 0, 5000, 5000)            # table row ids
+    indptr, ids = index.query_rects(windows)     # windows: [n, 4] array, ids of window i in indptr[i]:indptr[i + 1]
+    ids, distances = index.nearest_many(points, k=4)
+'''
+import numpy as np
+
+from .component_table import ORIENT_CODE
+
+# Orientations that swap the width and the height of a cell
+ROTATED_ORIENTS = tuple(ORIENT_CODE[orient] for orient in ('E', 'W', 'FE', 'FW'))
+# Queries processed together by the batch methods, bounds the size of the temporary arrays
+QUERY_BATCH_SIZE = 1 << 16
+
+
+def cell_sizes_from_lef(lef_result, cell_names, dbu_per_micron):
+    '''
+    (width, height) float64 arrays aligned with cell_names, in DEF database units,
+    from the MACRO SIZE of the LEFParser result; 0 for cells without a SIZE.
+    dbu_per_micron is the DEF "UNITS DISTANCE MICRONS" value.
+    '''
+    sizes = {}
+    for block_list in lef_result['blocks'].values():
+        for block in block_list:
+            if block['type'] == 'MACRO' and 'size' in block['attributes']:
+                sizes[block['name']] = block['attributes']['size']
+    width = np.zeros(len(cell_names))
+    height = np.zeros(len(cell_names))
+    for cell_id, cell_name in enumerate(cell_names):
+        if cell_name in sizes:
+            width[cell_id] = sizes[cell_name]['width'] * dbu_per_micron
+            height[cell_id] = sizes[cell_name]['height'] * dbu_per_micron
+    return width, height
+
+
+def _expand(counts):
+    '''(owner, rank) of every item when owner i has counts[i] items'''
+    owner = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    return owner, np.arange(len(owner)) - starts[owner]
+
+
+class SpatialIndex:
+    '''
+    Uniform bin grid over boxes, see the module docstring.
+    ids[i] is the id reported for box i (the table row with from_component_table()).
+    '''
+    def __init__(self, xlo, ylo, xhi, yhi, ids=None, bin_size=None):
+        self.xlo = np.asarray(xlo, dtype=np.float64)
+        self.ylo = np.asarray(ylo, dtype=np.float64)
+        self.xhi = np.asarray(xhi, dtype=np.float64)
+        self.yhi = np.asarray(yhi, dtype=np.float64)
+        self.ids = np.arange(len(self.xlo)) if ids is None else np.asarray(ids)
+        self._build_grid(bin_size)
+
+    @classmethod
+    def from_component_table(cls, table, cell_sizes=None, bin_size=None):
+        '''
+        Index the placed instances of a ComponentTable.
+        cell_sizes: (width, height) arrays per cell id, e.g. from cell_sizes_from_lef();
+        without it every instance is a point at its location.
+        '''
+        rows = np.flatnonzero(table.is_placed())
+        x = table.x[rows].astype(np.float64)
+        y = table.y[rows].astype(np.float64)
+        if cell_sizes is None:
+            return cls(x, y, x, y, ids=rows, bin_size=bin_size)
+        width, height = cell_sizes
+        w = width[table.cell_ids[rows]]
+        h = height[table.cell_ids[rows]]
+        rotated = np.isin(table.orient[rows], ROTATED_ORIENTS)
+        w, h = np.where(rotated, h, w), np.where(rotated, w, h)
+        return cls(x, y, x + w, y + h, ids=rows, bin_size=bin_size)
+
+    def __len__(self):
+        return len(self.xlo)
+
+    def _build_grid(self, bin_size):
+        n = len(self)
+        if n == 0:
+            self.x0 = self.y0 = 0.0
+            self.nx = self.ny = 1
+            self.bin_w = self.bin_h = 1.0
+            self.bin_indptr = np.zeros(2, dtype=np.int64)
+            self.bin_items = np.zeros(0, dtype=np.int64)
+            return
+        self.x0, self.y0 = self.xlo.min(), self.ylo.min()
+        extent_w = max(self.xhi.max() - self.x0, 1.0)
+        extent_h = max(self.yhi.max() - self.y0, 1.0)
+        if bin_size is None:
+            # About one box per bin, but no smaller than the average box so boxes span few bins
+            side = np.sqrt(extent_w * extent_h / n)
+            bin_w = max(side, (self.xhi - self.xlo).mean())
+            bin_h = max(side, (self.yhi - self.ylo).mean())
+        else:
+            bin_w, bin_h = (bin_size, bin_size) if np.isscalar(bin_size) else bin_size
+        self.nx = int(extent_w // bin_w) + 1
+        self.ny = int(extent_h // bin_h) + 1
+        self.bin_w, self.bin_h = float(bin_w), float(bin_h)
+
+        bx0, by0, bx1, by1 = self._bin_range(self.xlo, self.ylo, self.xhi, self.yhi)
+        box, bins = self._covered_bins(bx0, by0, bx1, by1)
+        order = np.argsort(bins, kind='stable')
+        self.bin_items = box[order]
+        self.bin_indptr = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(bins, minlength=self.nx * self.ny), out=self.bin_indptr[1:])
+
+    def _bin_x(self, x):
+        return np.clip(((x - self.x0) // self.bin_w).astype(np.int64), 0, self.nx - 1)
+
+    def _bin_y(self, y):
+        return np.clip(((y - self.y0) // self.bin_h).astype(np.int64), 0, self.ny - 1)
+
+    def _bin_range(self, xlo, ylo, xhi, yhi):
+        return self._bin_x(xlo), self._bin_y(ylo), self._bin_x(xhi), self._bin_y(yhi)
+
+    def _covered_bins(self, bx0, by0, bx1, by1):
+        '''(owner, bin) of every bin covered by the bin ranges'''
+        nbx = bx1 - bx0 + 1
+        owner, rank = _expand(nbx * (by1 - by0 + 1))
+        return owner, (by0[owner] + rank // nbx[owner]) * self.nx + bx0[owner] + rank % nbx[owner]
+
+    def query_rects(self, rects):
+        '''
+        Boxes overlapping each window of rects ([n, 4]: xlo, ylo, xhi, yhi).
+        return (indptr, ids): the ids of window i are ids[indptr[i]:indptr[i + 1]], by box order
+        '''
+        rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+        query, box = self._query_pairs(rects)
+        indptr = np.zeros(len(rects) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(query, minlength=len(rects)), out=indptr[1:])
+        return indptr, self.ids[box]
+
+    def _query_pairs(self, rects):
+        '''(query, box) of every overlapping pair, sorted by query then box'''
+        queries = []
+        boxes = []
+        for start in range(0, len(rects), QUERY_BATCH_SIZE):
+            query, box = self._query_batch(rects[start:start + QUERY_BATCH_SIZE])
+            queries.append(query + start)
+            boxes.append(box)
+        if not queries:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(queries), np.concatenate(boxes)
+
+    def _query_batch(self, rects):
+        qxlo, qylo, qxhi, qyhi = rects.T
+        query, bins = self._covered_bins(*self._bin_range(qxlo, qylo, qxhi, qyhi))
+        # Every (query, box) candidate pair from the covered bins
+        pair, rank = _expand(self.bin_indptr[bins + 1] - self.bin_indptr[bins])
+        box = self.bin_items[self.bin_indptr[bins[pair]] + rank]
+        query = query[pair]
+        bins = bins[pair]
+        xlo, ylo = self.xlo[box], self.ylo[box]
+        keep = ((xlo <= qxhi[query]) & (self.xhi[box] >= qxlo[query])
+                & (ylo <= qyhi[query]) & (self.yhi[box] >= qylo[query]))
+        query, box, bins, xlo, ylo = query[keep], box[keep], bins[keep], xlo[keep], ylo[keep]
+        # Report each pair from a single bin: the one of the lower-left corner of the overlap
+        corner_bin = self._bin_y(np.maximum(ylo, qylo[query])) * self.nx + self._bin_x(np.maximum(xlo, qxlo[query]))
+        keep = corner_bin == bins
+        # Sorting the combined key orders the pairs by query, then box
+        key = np.sort(query[keep] * max(len(self), 1) + box[keep])
+        return key // max(len(self), 1), key % max(len(self), 1)
+
+    def query_points(self, points):
+        '''Boxes containing each point of points ([n, 2]), as (indptr, ids) like query_rects()'''
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return self.query_rects(np.hstack([points, points]))
+
+    def nearest_many(self, points, k=1):
+        '''
+        The k boxes nearest to each point of points ([n, 2]), by euclidean distance to the box
+        (0 inside it), ties broken by id.
+        return (ids, distances), both [n, k], padded with -1 / inf when the index has less than k boxes
+        '''
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        nearest_ids = np.full((len(points), k), -1, dtype=np.int64)
+        nearest_distances = np.full((len(points), k), np.inf)
+        if len(self) == 0 or k <= 0:
+            return nearest_ids, nearest_distances
+        step = min(self.bin_w, self.bin_h)
+        xmax, ymax = self.xhi.max(), self.yhi.max()
+        pending = np.arange(len(points))
+        radius = np.full(len(points), step)
+        # Grow a window around the unresolved points until it holds k boxes closer than its half side
+        while pending.size:
+            px, py = points[pending, 0], points[pending, 1]
+            r = radius[pending]
+            query, box = self._query_pairs(np.column_stack([px - r, py - r, px + r, py + r]))
+            count = np.bincount(query, minlength=len(pending))
+            dx = np.maximum(np.maximum(self.xlo[box] - px[query], px[query] - self.xhi[box]), 0)
+            dy = np.maximum(np.maximum(self.ylo[box] - py[query], py[query] - self.yhi[box]), 0)
+            distance = np.hypot(dx, dy)
+            order = np.lexsort((self.ids[box], distance, query))
+            query, box, distance = query[order], box[order], distance[order]
+            _, rank = _expand(count)
+            top = rank < k
+            nearest_ids[pending[query[top]], rank[top]] = self.ids[box[top]]
+            nearest_distances[pending[query[top]], rank[top]] = distance[top]
+
+            kth = nearest_distances[pending, k - 1]
+            covers_all = (px - r <= self.x0) & (py - r <= self.y0) & (px + r >= xmax) & (py + r >= ymax)
+            resolved = ((count >= k) & (kth <= r)) | covers_all
+            radius[pending] *= 2
+            pending = pending[~resolved]
+        return nearest_ids, nearest_distances
+
+    def query_rect(self, xlo, ylo, xhi, yhi):
+        '''Ids of the boxes overlapping the window'''
+        return self.query_rects([[xlo, ylo, xhi, yhi]])[1]
+
+    def query_point(self, x, y):
+        '''Ids of the boxes containing the point'''
+        return self.query_points([[x, y]])[1]
+
+    def nearest(self, x, y, k=1):
+        '''(ids, distances) of the k boxes nearest to the point'''
+        ids, distances = self.nearest_many([[x, y]], k)
+        return ids[0][ids[0] >= 0], distances[0][ids[0] >= 0]
@@ -42,6 +42,13 @@ class LineSeperator:
     def seperate(self, line):
         pass
 
+    def seperate_many(self, lines):
+        '''
+        Seperate a batch of lines, return one token list per line.
+        Seperators that can work on many lines at once override this.
+        '''
+        return [self.seperate(line) for line in lines]
+
 class LineFormatter:
     '''
     Given separated line with n components, 
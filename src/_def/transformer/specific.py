@@ -1,3 +1,8 @@
+import re
+from itertools import islice
+
+import numpy as np
+
 from .base import LineClearer, LineSeperator, LineFormatter, BlockTransformer, SectionTransformer
 
 #############################################
@@ -111,6 +116,152 @@ class CommonLineSeperator(LineSeperator):
         
         return tokens
 
+class RegexLineSeperator(LineSeperator):
+    '''
+    Same token rules as CommonLineSeperator, but the line is scanned by one compiled
+    regex (findall runs in C) instead of character by character in Python.
+    1. + word                          -> "+ word"
+    2. standalone ( ... )              -> one token
+    3. " ... " (with \\ escapes)        -> one token
+    4. any other run of non-space, non-quote characters (e.g. "asdf(xxxx)")
+    A standalone group with nested or unbalanced parentheses is rare; such a line
+    falls back to CommonLineSeperator so the output is always identical.
+    '''
+    token_pattern = re.compile(r'''
+        \+\s*([^\s"]+)                     # 1: + word
+      | ( (?<!\S)\([^()]*\)              # 2: standalone ( ... ) group
+        | "(?:\\[\s\S]?|[^"\\])*"?       #    quoted string
+        | (?<!\S)\(                       #    standalone ( that needs the fallback
+        | [^\s"]+                        #    plain word
+        )
+    ''', re.VERBOSE)
+
+    def __init__(self):
+        self.fallback = CommonLineSeperator()
+
+    def seperate(self, line):
+        line = line.strip()
+        tokens = [plain or '+ ' + plus for plus, plain in self.token_pattern.findall(line)]
+        if '(' in tokens:
+            # A bare "(" means a nested/unbalanced group (or a word that is just "(")
+            return self.fallback.seperate(line)
+        return tokens
+
+class BulkLineSeperator(LineSeperator):
+    '''
+    High-throughput seperator for the head lines of COMPONENTS / NETS entries.
+    Same token rules (and output) as CommonLineSeperator, but a whole batch of lines
+    is tokenized at once with a few numpy passes over its bytes and bulk str splits:
+
+        - c1 cellA + PLACED ( 100 200 ) N          (lines joined with \x05)
+        -> spaces outside ( ... ) groups become \x01, except the one after "+"
+        -> split on \x05 for lines, then on \x01 for tokens
+
+    This is only valid for "regular" lines: ASCII, no tabs, every "(" opens a standalone
+    group that closes before the next space or line end, every "+" is followed by a
+    word, every quoted string is a standalone word without spaces (PROPERTY values).
+    Runs of spaces outside the groups are collapsed (routing lines often align their
+    comments), the groups themselves are kept as written. A batch containing anything
+    else is split in halves, down to per-line RegexLineSeperator calls for the small
+    irregular pieces.
+    '''
+    control_chars = bytes(range(32)) + b'\x7f'
+
+    def __init__(self, batch_size=2048, min_batch_size=16):
+        self.batch_size = batch_size
+        self.min_batch_size = min_batch_size
+        self.line_seperator = RegexLineSeperator()
+
+    def seperate(self, line):
+        return self.line_seperator.seperate(line)
+
+    def seperate_many(self, lines):
+        tokens = []
+        for start in range(0, len(lines), self.batch_size):
+            tokens.extend(self._seperate_batch(lines[start:start + self.batch_size]))
+        return tokens
+
+    def _seperate_batch(self, lines):
+        tokens = self._bulk_seperate(lines)
+        if tokens is not None:
+            return tokens
+        if len(lines) > self.min_batch_size:
+            half = len(lines) // 2
+            return self._seperate_batch(lines[:half]) + self._seperate_batch(lines[half:])
+        return [self.line_seperator.seperate(line) for line in lines]
+
+    def _bulk_seperate(self, lines):
+        '''Tokenize a batch of regular lines, None if any line is not regular'''
+        if not lines or '' in lines:
+            return None
+        n_lines = len(lines)
+        blob = '\x05'.join(lines)
+        if not blob.isascii():
+            return None
+        raw = blob.encode()
+        # No tabs / control chars but the line breaks
+        if len(raw) - len(raw.translate(None, self.control_chars)) != n_lines - 1:
+            return None
+        chars = np.frombuffer(raw, dtype=np.uint8)
+        n_chars = len(chars)
+        spaces = chars == 32
+        breaks = np.flatnonzero(chars == 5)
+        # Nothing to strip
+        if spaces[0] or spaces[-1] or spaces[breaks - 1].any() or spaces[breaks + 1].any():
+            return None
+
+        if '"' in blob:
+            # Every quoted string is a ' "word"' followed by a space or the line end
+            quoted = blob.split('"')[1::2]
+            n_quoted = len(quoted)
+            if (blob.count('"') != 2 * n_quoted or blob.count(' "') != n_quoted
+                    or blob.count('" ') + blob.count('"\x05') + blob.endswith('"') != n_quoted):
+                return None
+            quoted = '\x02'.join(quoted)
+            if ' ' in quoted or '\x05' in quoted or '\\' in quoted or '(' in quoted or ')' in quoted or '+' in quoted:
+                return None
+
+        if '+' in blob:
+            # Every "+" is a " + word"
+            plus = np.flatnonzero(chars == 43)
+            if plus[0] == 0 or plus[-1] + 2 >= n_chars or not spaces[plus - 1].all() or not spaces[plus + 1].all():
+                return None
+            after = chars[plus + 2]
+            if (spaces[plus + 2] | (after == 40) | (after == 34) | (after == 5)).any():
+                return None
+
+        if '(' in blob or ')' in blob:
+            # Every group is " ( ... )" followed by a space or the line end, groups
+            # do not nest or span lines
+            opens = chars == 40
+            closes = chars == 41
+            depth = np.cumsum(opens.view(np.int8) - closes.view(np.int8), dtype=np.int8)
+            if depth.min() < 0 or depth.max() > 1 or depth[-1] or depth[breaks].any():
+                return None
+            starts = np.flatnonzero(opens)
+            if len(starts) and (starts[0] == 0 or not spaces[starts - 1].all()):
+                return None
+            ends = np.flatnonzero(closes) + 1
+            ends = ends[ends < n_chars]
+            if not (spaces[ends] | (chars[ends] == 5)).all():
+                return None
+            spaces &= depth == 0
+
+        # Collapse the runs of spaces outside the groups
+        repeated = spaces[1:] & spaces[:-1]
+        if repeated.any():
+            keep = np.ones(n_chars, dtype=bool)
+            keep[1:] = ~repeated
+            chars = chars[keep]
+            spaces = spaces[keep]
+        else:
+            chars = chars.copy()
+        if '+' in blob:
+            spaces[np.flatnonzero(chars == 43) + 1] = False
+        chars[spaces] = 1
+
+        return [line.split('\x01') for line in chars.tobytes().decode().split('\x05')]
+
 #############################################
 # Specific Line formatter
 #############################################
@@ -338,6 +489,20 @@ class EnhancedSectionTransformer(SectionTransformer):
         
         return formatted_head_line
 
+    def transform_many(self, raw_sections: list[dict]):
+        '''
+        Same as transform for a batch of sections; the head lines are handed to the
+        line seperator together so it can tokenize them in bulk.
+        '''
+        head_lines = [raw_section['head_section'] for raw_section in raw_sections]
+        formatted_sections = []
+        for raw_section, seperated_head_line in zip(raw_sections, self.line_seperator.seperate_many(head_lines)):
+            formatted_head_line = self.line_formatter.format(seperated_head_line)
+            if 'raw_content' in raw_section:
+                formatted_head_line['raw_lines'] = raw_section['raw_content']
+            formatted_sections.append(formatted_head_line)
+        return formatted_sections
+
 #############################################
 # Specific Block transformer
 #############################################
@@ -376,21 +541,27 @@ class EnhancedBlockTransformer(BlockTransformer):
             line_formatter
         )
 
+    batch_size = 2048
+
     def transform(self, list_of_raw_sections: list[dict]):
         '''
         input: [{'head_section': full_content, 'property_section':[], 'raw_content': [lines]}]
         '''
-        result_list = []
-        
-        for raw_section in list_of_raw_sections:
-            transformed_section = self.section_transformer.transform(raw_section)
-            result_list.append(transformed_section)
+        return list(self.iter_transform(list_of_raw_sections))
 
-        return result_list
+    def iter_transform(self, raw_sections):
+        '''
+        Lazy version of transform: raw_sections can be any iterable (e.g. a parser generator),
+        one formatted entry is yielded per raw section.
+        Sections are transformed in batches of batch_size.
+        '''
+        raw_sections = iter(raw_sections)
+        while batch := list(islice(raw_sections, self.batch_size)):
+            yield from self.section_transformer.transform_many(batch)
 
 component_block_transformer = EnhancedBlockTransformer(
     MultiLineLineClearer(),
-    CommonLineSeperator(),
+    BulkLineSeperator(),
     ComponentHeadFormatter()
 )
 
@@ -403,6 +574,6 @@ net_block_transformer = NoPropertyBlockTransformer(
 # Enhanced NET transformer for multi-line support
 enhanced_net_block_transformer = EnhancedBlockTransformer(
     MultiLineLineClearer(),
-    CommonLineSeperator(),
+    BulkLineSeperator(),
     EnhancedNetHeadFormatter()
 )
\ No newline at end of file
@@ -0,0 +1,400 @@
+'''
+Binary, memory-mappable store of a parsed design.
+
+def_parser.py used to pickle the nested dicts instance2id / id2instanceInfo /
+net2id / id2NetInfo; loading them back meant unpickling millions of small
+objects. The store keeps the same information as flat arrays and string tables
+in one file:
+
+    magic    8 bytes   b'DEFSTORE'
+    version  uint32
+    toc_len  uint32    length of the table of contents
+    toc_crc  uint32    crc32 of the table of contents
+    toc      json      {column name: {'dtype', 'offset', 'count', 'crc'}}
+    columns  ...       raw arrays, each aligned on 64 bytes
+
+A string table "name" is two columns: "name.offsets" (int64, n + 1) and
+"name.buffer" (utf-8 bytes). open_design() only reads and checks the header;
+columns are mapped with np.frombuffer on first access.
+
+DesignStore is a read-only Mapping with the keys of def_outputs.pkl, whose values
+are lazy Mapping views, so code written against the pickled dicts keeps working:
+
+    design = open_design('./tmp/def_outputs.design')
+    design['id2instanceInfo'][0]     # {'instance_name', 'cell_name', 'placementInfo'}
+    design['id2NetInfo'][5]          # {'net_name', 'connections': [...]}
+
+instance_records() / net_records() build all the values at once from the columns,
+much faster than going through the views one id at a time.
+'''
+import json
+import mmap
+import struct
+import zlib
+from collections.abc import Mapping
+
+import numpy as np
+
+STORE_MAGIC = b'DEFSTORE'
+STORE_VERSION = 1
+ALIGNMENT = 64
+_HEADER = struct.Struct('<8sIII')
+
+# Column dtypes are stored by name; only these can appear in a store
+_DTYPES = {'int8', 'int32', 'int64', 'uint8'}
+
+
+class DesignStoreError(ValueError):
+    '''The file is not a design store, has another version or is corrupted'''
+
+
+#############################################
+# Writing
+#############################################
+class DesignStoreWriter:
+    '''
+    Collect columns and string tables, then write() them as one store file.
+    '''
+    def __init__(self):
+        self.columns = {}
+
+    def add_column(self, name, values, dtype):
+        self.columns[name] = np.ascontiguousarray(values, dtype=dtype)
+
+    def add_strings(self, name, strings):
+        encoded = [string.encode('utf-8') for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        self.add_column(f'{name}.offsets', offsets, 'int64')
+        self.add_column(f'{name}.buffer', np.frombuffer(b''.join(encoded), dtype=np.uint8), 'uint8')
+
+    def write(self, path):
+        toc = {}
+        offset = 0
+        for name, values in self.columns.items():
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            toc[name] = {
+                'dtype': values.dtype.name,
+                'offset': offset,
+                'count': len(values),
+                'crc': zlib.crc32(values),
+            }
+            offset += values.nbytes
+        toc_bytes = json.dumps(toc).encode('utf-8')
+        data_start = -(-(_HEADER.size + len(toc_bytes)) // ALIGNMENT) * ALIGNMENT
+
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(STORE_MAGIC, STORE_VERSION, len(toc_bytes), zlib.crc32(toc_bytes)))
+            f.write(toc_bytes)
+            for name, values in self.columns.items():
+                f.seek(data_start + toc[name]['offset'])
+                f.write(values.tobytes())
+            f.truncate(data_start + offset)
+
+
+def _intern(values):
+    '''Return (ids, table) with table[ids[i]] == values[i]'''
+    index = {}
+    ids = [index.setdefault(value, len(index)) for value in values]
+    return ids, list(index)
+
+
+def _coordinates(instance_infos, placements):
+    '''
+    (x, y) lists of the placements as ints, 0 for the unplaced instances. The legacy dict path
+    can hold the coordinates as strings; anything that is not an integer is rejected.
+    '''
+    xs = []
+    ys = []
+    for info, placement in zip(instance_infos, placements):
+        if not placement:
+            xs.append(0)
+            ys.append(0)
+            continue
+        try:
+            xs.append(int(placement[0]))
+            ys.append(int(placement[1]))
+        except (TypeError, ValueError):
+            raise ValueError(f"Instance {info['instance_name']}: placement coordinates "
+                             f"{placement[0]!r}, {placement[1]!r} are not integers") from None
+    return xs, ys
+
+
+def save_def_output(path, def_output):
+    '''
+    Write the def_outputs dicts of def_parser.py
+    {'instance2id', 'id2instanceInfo', 'net2id', 'id2NetInfo'} as a design store.
+    '''
+    writer = DesignStoreWriter()
+
+    # Instances, in id order; instance2id is rebuilt from the names
+    instance_infos = [def_output['id2instanceInfo'][i] for i in range(len(def_output['id2instanceInfo']))]
+    writer.add_strings('instance_names', [info['instance_name'] for info in instance_infos])
+    cell_ids, cell_names = _intern(info['cell_name'] for info in instance_infos)
+    writer.add_column('cell_ids', cell_ids, 'int32')
+    writer.add_strings('cell_names', cell_names)
+    placements = [info.get('placementInfo') for info in instance_infos]
+    writer.add_column('placed', [placement is not None for placement in placements], 'int8')
+    xs, ys = _coordinates(instance_infos, placements)
+    writer.add_column('x', xs, 'int64')
+    writer.add_column('y', ys, 'int64')
+    orient_ids, orientations = _intern(placement[2] if placement else '' for placement in placements)
+    writer.add_column('orient_ids', orient_ids, 'int32')
+    writer.add_strings('orientations', orientations)
+
+    # All nets in id order (net2id), then the kept nets of id2NetInfo with their connections
+    net_ids = sorted(def_output['id2NetInfo'])
+    net_names = [''] * (max(list(def_output['net2id'].values()) + net_ids, default=-1) + 1)
+    for net_name, net_id in def_output['net2id'].items():
+        net_names[net_id] = net_name
+    for net_id in net_ids:
+        net_names[net_id] = def_output['id2NetInfo'][net_id]['net_name']
+    writer.add_strings('net_names', net_names)
+    writer.add_column('net_ids', net_ids, 'int64')
+    connections = [def_output['id2NetInfo'][net_id]['connections'] for net_id in net_ids]
+    writer.add_column('conn_indptr', np.cumsum([0] + [len(conns) for conns in connections]), 'int64')
+
+    # Connection instances refer to the instance names; unknown names are appended after them
+    instance2id = def_output['instance2id']
+    extra_names = {}
+    conn_instances = []
+    for conns in connections:
+        for conn in conns:
+            name = conn['instance_name']
+            inst_id = instance2id.get(name)
+            if inst_id is None:
+                inst_id = len(instance_infos) + extra_names.setdefault(name, len(extra_names))
+            conn_instances.append(inst_id)
+    writer.add_column('conn_instance_ids', conn_instances, 'int32')
+    writer.add_strings('extra_instance_names', list(extra_names))
+    pin_ids, pin_names = _intern(conn['pin_name'] for conns in connections for conn in conns)
+    writer.add_column('conn_pin_ids', pin_ids, 'int32')
+    writer.add_strings('pin_names', pin_names)
+
+    writer.write(path)
+
+
+#############################################
+# Reading
+#############################################
+class StringTable:
+    '''Read-only sequence of the strings of a store string table'''
+    def __init__(self, offsets, buffer):
+        self.offsets = offsets
+        self.buffer = buffer
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return bytes(self.buffer[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def tolist(self):
+        offsets = self.offsets.tolist()
+        buffer = self.buffer.tobytes()
+        return [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+class _NameIndexView(Mapping):
+    '''{name: id} over a string table, the hash index is built on first lookup'''
+    def __init__(self, names):
+        self.names = names
+        self._index = None
+
+    def _get_index(self):
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names.tolist())}
+        return self._index
+
+    def __getitem__(self, name):
+        return self._get_index()[name]
+
+    def __iter__(self):
+        return iter(self._get_index())
+
+    def __len__(self):
+        return len(self._get_index())
+
+
+class _InstanceInfoView(Mapping):
+    '''{instance id: {'instance_name', 'cell_name'[, 'placementInfo']}}'''
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, i):
+        store = self.store
+        if not isinstance(i, (int, np.integer)) or not 0 <= i < len(self):
+            raise KeyError(i)
+        info = {
+            'instance_name': store.strings('instance_names')[i],
+            'cell_name': store.strings('cell_names')[store.column('cell_ids')[i]],
+        }
+        if store.column('placed')[i]:
+            info['placementInfo'] = (
+                int(store.column('x')[i]),
+                int(store.column('y')[i]),
+                store.strings('orientations')[store.column('orient_ids')[i]],
+            )
+        return info
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def __len__(self):
+        return len(self.store.column('cell_ids'))
+
+
+class _NetInfoView(Mapping):
+    '''{net id: {'net_name', 'connections': [{'instance_name', 'pin_name'}, ...]}} for the kept nets'''
+    def __init__(self, store):
+        self.store = store
+
+    def _position(self, net_id):
+        net_ids = self.store.column('net_ids')
+        if isinstance(net_id, (int, np.integer)):
+            position = int(np.searchsorted(net_ids, net_id))
+            if position < len(net_ids) and net_ids[position] == net_id:
+                return position
+        raise KeyError(net_id)
+
+    def _instance_name(self, inst_id):
+        instance_names = self.store.strings('instance_names')
+        if inst_id < len(instance_names):
+            return instance_names[inst_id]
+        return self.store.strings('extra_instance_names')[inst_id - len(instance_names)]
+
+    def __getitem__(self, net_id):
+        store = self.store
+        position = self._position(net_id)
+        start, end = store.column('conn_indptr')[position:position + 2].tolist()
+        pin_names = store.strings('pin_names')
+        return {
+            'net_name': store.strings('net_names')[net_id],
+            'connections': [
+                {'instance_name': self._instance_name(inst_id), 'pin_name': pin_names[pin_id]}
+                for inst_id, pin_id in zip(store.column('conn_instance_ids')[start:end].tolist(),
+                                           store.column('conn_pin_ids')[start:end].tolist())
+            ]
+        }
+
+    def __iter__(self):
+        return iter(self.store.column('net_ids').tolist())
+
+    def __len__(self):
+        return len(self.store.column('net_ids'))
+
+
+class DesignStore(Mapping):
+    '''
+    Read-only view of a design store file, see the module docstring.
+    column(name) / strings(name) give the raw arrays; the Mapping keys are those of def_outputs.pkl.
+    '''
+    keys_layout = ('instance2id', 'id2instanceInfo', 'net2id', 'id2NetInfo')
+
+    def __init__(self, path, verify=False):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.toc = self._read_header()
+        self._columns = {}
+        self._strings = {}
+        self._views = {}
+        if verify:
+            self.verify()
+
+    def _read_header(self):
+        if len(self._mm) < _HEADER.size:
+            raise DesignStoreError(f"{self.path} is too small to be a design store")
+        magic, version, toc_len, toc_crc = _HEADER.unpack_from(self._mm, 0)
+        if magic != STORE_MAGIC:
+            raise DesignStoreError(f"{self.path} is not a design store")
+        if version != STORE_VERSION:
+            raise DesignStoreError(f"{self.path} has store version {version}, expected {STORE_VERSION}")
+        toc_bytes = self._mm[_HEADER.size:_HEADER.size + toc_len]
+        if zlib.crc32(toc_bytes) != toc_crc:
+            raise DesignStoreError(f"{self.path}: header checksum mismatch")
+        self._data_start = -(-(_HEADER.size + toc_len) // ALIGNMENT) * ALIGNMENT
+        return json.loads(toc_bytes)
+
+    def column(self, name):
+        if name not in self._columns:
+            entry = self.toc[name]
+            if entry['dtype'] not in _DTYPES:
+                raise DesignStoreError(f"{self.path}: unsupported dtype {entry['dtype']} for {name}")
+            self._columns[name] = np.frombuffer(
+                self._mm, dtype=entry['dtype'], count=entry['count'], offset=self._data_start + entry['offset']
+            )
+        return self._columns[name]
+
+    def strings(self, name):
+        if name not in self._strings:
+            self._strings[name] = StringTable(self.column(f'{name}.offsets'), self.column(f'{name}.buffer'))
+        return self._strings[name]
+
+    def verify(self):
+        '''Check the crc32 of every column (reads the whole file)'''
+        for name, entry in self.toc.items():
+            if zlib.crc32(self.column(name)) != entry['crc']:
+                raise DesignStoreError(f"{self.path}: checksum mismatch in column {name}")
+
+    def instance_records(self):
+        '''All the values of id2instanceInfo, in id order, built column by column'''
+        names = self.strings('instance_names').tolist()
+        cell_names = self.strings('cell_names').tolist()
+        orientations = self.strings('orientations').tolist()
+        records = []
+        for name, cell_id, placed, x, y, orient_id in zip(
+                names, self.column('cell_ids').tolist(), self.column('placed').tolist(),
+                self.column('x').tolist(), self.column('y').tolist(), self.column('orient_ids').tolist()):
+            info = {'instance_name': name, 'cell_name': cell_names[cell_id]}
+            if placed:
+                info['placementInfo'] = (x, y, orientations[orient_id])
+            records.append(info)
+        return records
+
+    def net_records(self):
+        '''All the values of id2NetInfo, in net id order, built column by column'''
+        net_names = self.strings('net_names').tolist()
+        instance_names = self.strings('instance_names').tolist() + self.strings('extra_instance_names').tolist()
+        pin_names = self.strings('pin_names').tolist()
+        connections = [{'instance_name': instance_names[inst_id], 'pin_name': pin_names[pin_id]}
+                       for inst_id, pin_id in zip(self.column('conn_instance_ids').tolist(),
+                                                  self.column('conn_pin_ids').tolist())]
+        indptr = self.column('conn_indptr').tolist()
+        return [{'net_name': net_names[net_id], 'connections': connections[start:end]}
+                for net_id, start, end in zip(self.column('net_ids').tolist(), indptr[:-1], indptr[1:])]
+
+    def __getitem__(self, key):
+        if key not in self._views:
+            if key == 'instance2id':
+                self._views[key] = _NameIndexView(self.strings('instance_names'))
+            elif key == 'id2instanceInfo':
+                self._views[key] = _InstanceInfoView(self)
+            elif key == 'net2id':
+                self._views[key] = _NameIndexView(self.strings('net_names'))
+            elif key == 'id2NetInfo':
+                self._views[key] = _NetInfoView(self)
+            else:
+                raise KeyError(key)
+        return self._views[key]
+
+    def __iter__(self):
+        return iter(self.keys_layout)
+
+    def __len__(self):
+        return len(self.keys_layout)
+
+
+def is_design_store(path):
+    with open(path, 'rb') as f:
+        return f.read(len(STORE_MAGIC)) == STORE_MAGIC
+
+
+def open_design(path, verify=False):
+    '''Open a design store written by save_def_output; verify=True also checks every column checksum'''
+    return DesignStore(path, verify=verify)
@@ -6,11 +6,18 @@ This module provides a comprehensive parser for LEF files that can handle
 the hierarchical structure of LEF blocks like MACRO, PIN, TIMING, etc.
 """
 
+import io
 import re
 from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, field
 from enum import Enum
 
+# Handle both relative and absolute imports
+try:
+    from .parser.compression import open_input
+except ImportError:
+    from parser.compression import open_input
+
 class BlockType(Enum):
     """Enumeration of LEF block types"""
     # Blocks with END <name> pattern
@@ -62,7 +69,8 @@ class LEFParser:
         
     def parse_file(self, file_path: str) -> Dict[str, Any]:
         """Parse a LEF file and return hierarchical structure"""
-        with open(file_path, 'r') as f:
+        # gzip / bz2 / xz / zstd compressed files are decompressed on the fly
+        with io.TextIOWrapper(open_input(file_path)) as f:
             content = f.read()
         return self.parse_content(content)
         
@@ -601,6 +609,36 @@ def parse_lef_content(content: str) -> Dict[str, Any]:
     parser = LEFParser()
     return parser.parse_content(content)
 
+def let2format(result):
+    """Reduce a parse result to the cell_dict of lef_outputs.pkl: {cell: {'pins': {pin: {'direction': 1 / -1}}}}"""
+    cell_dict = {}
+    for block_name, block_list in result['blocks'].items():
+        block = block_list[0]
+
+        if block_name.startswith('MACRO_'):
+            cell_name = block_name.split('_')[1]
+            cell_dict[cell_name] = {'pins': {}}
+            if 'sub_blocks' not in block:
+                continue
+            if 'PIN' not in block['sub_blocks']:
+                continue
+
+            for pin_info in block['sub_blocks']['PIN']:
+                pin_name = pin_info['name']
+                if 'direction' in pin_info['attributes']:
+                    direction = pin_info['attributes']['direction']
+
+                    if direction == 'INPUT':
+                        cell_dict[cell_name]['pins'][pin_name] = { 'direction': -1}
+                    elif direction == 'OUTPUT':
+                        cell_dict[cell_name]['pins'][pin_name] = { 'direction': 1}
+                    else:
+                        cell_dict[cell_name]['pins'][pin_name] = {}
+                else:
+                    continue
+            
+    return cell_dict
+
 # Example usage
 if __name__ == "__main__":
     # Example of how to use the parser
@@ -0,0 +1,145 @@
+'''
+Content-hash keyed cache of parser outputs.
+
+A parse result is stored under a key made of
+    - the hash of the input file content (not its path or mtime),
+    - the parser version (bumped whenever the output of a parser changes),
+    - the options that change the output (used_prefix, output format, ...),
+so an unchanged DEF/LEF is never parsed twice, and any change to the input, the
+parser or the options misses the cache by construction.
+
+Entries are plain files in cache_dir; a hit refreshes the file mtime, and once the
+cache grows past max_bytes the least recently used entries are deleted. The content
+hash of every input path is remembered in its own small file under digests/, written
+with a temporary file + os.replace, so parallel batch workers never lose each other's
+hashes. The command line tools only use the cache with --cache.
+
+    cache = ParseCache()
+    key = cache.key(def_path, PARSER_VERSION, {'used_prefix': used_prefix})
+    if not cache.fetch(key, output_path):
+        ... parse and write output_path ...
+        cache.store(key, output_path)
+'''
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'DEF_LEF_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'def_lef_py')
+)
+DEFAULT_MAX_BYTES = 10 << 30
+
+HASH_CHUNK_SIZE = 8 << 20
+# Remembered content hashes, one file per input path holding its size + mtime and hash,
+# so unchanged files are not rehashed
+DIGEST_DIR = 'digests'
+
+
+def file_digest(file_path):
+    '''blake2b hex digest of the content of file_path'''
+    digest = hashlib.blake2b(digest_size=32)
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    '''
+    LRU cache of parser output files under a disk budget, see the module docstring.
+    '''
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, DIGEST_DIR), exist_ok=True)
+
+    def content_hash(self, file_path):
+        '''Content hash of file_path, reused while its size and mtime are unchanged'''
+        stat = os.stat(file_path)
+        stat_key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        # One file per path: a newer version of the file simply replaces the hash of the older one
+        path_hash = hashlib.blake2b(os.path.abspath(file_path).encode('utf-8'), digest_size=16).hexdigest()
+        digest_path = os.path.join(self.cache_dir, DIGEST_DIR, path_hash + '.json')
+        try:
+            with open(digest_path) as f:
+                remembered = json.load(f)
+            if remembered['stat_key'] == stat_key:
+                return remembered['digest']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        digest = file_digest(file_path)
+        self._write_atomic(digest_path, json.dumps({'stat_key': stat_key, 'digest': digest}).encode('utf-8'))
+        return digest
+
+    def key(self, file_path, parser_version, options=None):
+        '''Cache key of parsing file_path with the given parser version and options'''
+        material = json.dumps({
+            'content': self.content_hash(file_path),
+            'parser_version': parser_version,
+            'options': options or {},
+        }, sort_keys=True)
+        return hashlib.blake2b(material.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _entry_path(self, key, output_path):
+        # Keep the extension so the cache directory stays readable
+        return os.path.join(self.cache_dir, key + os.path.splitext(output_path)[1])
+
+    def fetch(self, key, output_path):
+        '''Copy the cached entry of key to output_path; return False on a miss'''
+        entry_path = self._entry_path(key, output_path)
+        if not os.path.exists(entry_path):
+            return False
+        shutil.copyfile(entry_path, output_path)
+        os.utime(entry_path)
+        return True
+
+    def store(self, key, output_path):
+        '''Add output_path to the cache under key, then evict down to max_bytes'''
+        entry_path = self._entry_path(key, output_path)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(output_path, tmp_path)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, entry_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+
+    def entries(self):
+        '''[(mtime, size, path)] of the cached entries, least recently used first'''
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith('.tmp') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
+
+    def _write_atomic(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,152 @@
+'''
+Transparent decompression of DEF / LEF inputs.
+
+The compression is detected from the magic bytes at the start of the file, not
+from the extension, so "design.def.gz", "design.def" (gzipped) and plain files
+all go through the same calls:
+
+    gzip   1f 8b
+    bz2    42 5a 68            "BZh"
+    xz     fd 37 7a 58 5a 00
+    zstd   28 b5 2f fd         (only if the zstandard package is installed)
+
+Decompression is streamed with large reads; the progress callback is given the
+number of compressed bytes consumed so far; decompressed_size() gives the
+decompressed total when the format records it. open_buffer() keeps the whole
+decompressed content in memory (a DecompressedBuffer); only plain files are mmapped.
+'''
+import bz2
+import gzip
+import io
+import lzma
+import os
+
+from .section_indexer import open_mmap
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC_BYTES = {
+    'gzip': b'\x1f\x8b',
+    'bz2': b'BZh',
+    'xz': b'\xfd7zXZ\x00',
+    'zstd': b'\x28\xb5\x2f\xfd',
+}
+
+# Size of the reads from the decompressed stream
+READ_CHUNK_SIZE = 8 << 20
+
+
+def detect_compression(file_path):
+    '''Return 'gzip', 'bz2', 'xz', 'zstd' or None for a plain file'''
+    with open(file_path, 'rb') as f:
+        head = f.read(6)
+    for compression, magic in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _decompressed_stream(raw, compression):
+    # raw stays the underlying file, so raw.tell() is the compressed position
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if compression == 'bz2':
+        return bz2.BZ2File(raw, mode='rb')
+    if compression == 'xz':
+        return lzma.LZMAFile(raw, mode='rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd compressed input needs the zstandard package: pip install zstandard")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw), buffer_size=READ_CHUNK_SIZE)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def open_input(file_path):
+    '''
+    Open file_path for binary reading, decompressing it on the fly if needed.
+    Wrap the result in io.TextIOWrapper to read text.
+    '''
+    compression = detect_compression(file_path)
+    if compression is None:
+        return open(file_path, 'rb')
+    raw = open(file_path, 'rb', buffering=READ_CHUNK_SIZE)
+    try:
+        return _decompressed_stream(raw, compression)
+    except Exception:
+        raw.close()
+        raise
+
+
+def decompressed_size(file_path, compression):
+    '''
+    Size of the decompressed content when the format records it, else None:
+    the gzip trailer (modulo 4 GiB, taken as at least the compressed size; the last
+    member only for a multi-member file) or the zstd frame header. bz2 and xz give None.
+    '''
+    if compression == 'gzip':
+        size = os.path.getsize(file_path)
+        if size < 18:
+            return None
+        with open(file_path, 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            total = int.from_bytes(f.read(4), 'little')
+        while total < size:
+            total += 1 << 32
+        return total
+    if compression == 'zstd' and zstandard is not None:
+        with open(file_path, 'rb') as f:
+            total = zstandard.frame_content_size(f.read(18))
+        return total if total >= 0 else None
+    return None
+
+
+class DecompressedBuffer(bytearray):
+    '''
+    Decompressed content of a file, kept in memory.
+    Offers what the section indexer and readers use from an mmap (len, find,
+    slicing, regex search) plus close(), which frees the memory.
+    '''
+    def close(self):
+        self.clear()
+
+
+def iter_decompressed(file_path, compression, progress=None):
+    '''
+    Yield the decompressed content of the file in chunks of up to READ_CHUNK_SIZE bytes.
+    progress(n) is called with the number of compressed bytes consumed since the last call.
+    '''
+    with open(file_path, 'rb', buffering=READ_CHUNK_SIZE) as raw:
+        with _decompressed_stream(raw, compression) as stream:
+            consumed = 0
+            while chunk := stream.read(READ_CHUNK_SIZE):
+                if progress is not None:
+                    position = raw.tell()
+                    progress(position - consumed)
+                    consumed = position
+                yield chunk
+
+
+def read_decompressed(file_path, compression, progress=None):
+    '''
+    Decompress the whole file into a DecompressedBuffer.
+    progress(n) is called with the number of compressed bytes consumed since the last call.
+    '''
+    buffer = DecompressedBuffer()
+    for chunk in iter_decompressed(file_path, compression, progress):
+        buffer += chunk
+    return buffer
+
+
+def open_buffer(file_path, progress=None):
+    '''
+    Random-access view of the (decompressed) content of file_path:
+    an mmap for plain files, a DecompressedBuffer for compressed ones,
+    None for an empty file.
+    '''
+    compression = detect_compression(file_path)
+    if compression is None:
+        return open_mmap(file_path)
+    return read_decompressed(file_path, compression, progress) or None
@@ -0,0 +1,119 @@
+'''
+Lazy view of the original lines of a parsed entry.
+
+MultiLineDashParser used to keep every entry twice: the joined head_section and a
+raw_content list with each stripped line. When the entry comes from a file, only
+its (start, end) byte range is kept instead; the lines are read back from the file
+when they are accessed, which is rare (debugging).
+
+    entry['raw_lines']            # EntryLines('design.def', 1234, 1301)
+    list(entry['raw_lines'])      # ['- n1 ( u1 A ) ( u2 Y )', '+ USE SIGNAL ;']
+
+Offsets are those of the decompressed content, like the SectionSpan offsets; the
+file is expected not to change after the parse.
+
+A source is opened once for all its entries: the buffer its parser shares, or else
+an mmap (plain file) / the decompressed content (compressed file) kept for the last
+MAX_OPEN_SOURCES sources, opened again only when the file changed. An entry decodes
+its lines on the first access and keeps them.
+'''
+import os
+import weakref
+from collections import OrderedDict
+
+from .compression import open_buffer
+
+# Decompressed content of the sources still held by their parser: path -> buffer
+_shared_buffers = weakref.WeakValueDictionary()
+# Sources opened for their entries, least recently used first: path -> ((size, mtime), buffer)
+_open_sources = OrderedDict()
+MAX_OPEN_SOURCES = 4
+
+
+def share_buffer(source, buffer):
+    '''Let the entries of source read from buffer, its content already decompressed by a parser'''
+    _shared_buffers[source] = buffer
+
+
+def release_source(source=None):
+    '''Drop the content kept for source (every source when None)'''
+    if source is None:
+        _open_sources.clear()
+    else:
+        _open_sources.pop(source, None)
+
+
+def source_buffer(source):
+    '''(Decompressed) content of the file source, opened once while it does not change'''
+    buffer = _shared_buffers.get(source)
+    if buffer is not None:
+        return buffer
+    stat = os.stat(source)
+    key = stat.st_size, stat.st_mtime_ns
+    opened = _open_sources.get(source)
+    if opened is not None and opened[0] == key:
+        _open_sources.move_to_end(source)
+        return opened[1]
+    buffer = open_buffer(source)
+    if buffer is None:
+        buffer = b''
+    _open_sources[source] = key, buffer
+    _open_sources.move_to_end(source)
+    while len(_open_sources) > MAX_OPEN_SOURCES:
+        _open_sources.popitem(last=False)
+    return buffer
+
+
+def read_range(source, start, end):
+    '''Bytes [start, end) of the (decompressed) content of the file source'''
+    return bytes(source_buffer(source)[start:end])
+
+
+class EntryLines:
+    '''Stripped lines of the byte range [start, end) of source, read on demand (sequence-like)'''
+    __slots__ = ('source', 'start', 'end', '_lines')
+
+    def __init__(self, source, start, end):
+        self.source = source
+        self.start = start
+        self.end = end
+        self._lines = None
+
+    @property
+    def span(self):
+        return self.start, self.end
+
+    def text(self):
+        return read_range(self.source, self.start, self.end).decode('utf-8', errors='ignore')
+
+    def lines(self):
+        # Read and decoded once; the list is shared by len(), [] and iteration
+        if self._lines is None:
+            self._lines = [line.strip() for line in self.text().splitlines()]
+        return self._lines
+
+    def __len__(self):
+        return len(self.lines())
+
+    def __getitem__(self, index):
+        return self.lines()[index]
+
+    def __iter__(self):
+        return iter(self.lines())
+
+    def __eq__(self, other):
+        if isinstance(other, EntryLines):
+            return (self.source, self.start, self.end) == (other.source, other.start, other.end)
+        if isinstance(other, list):
+            return self.lines() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"EntryLines({self.source!r}, {self.start}, {self.end})"
+
+    def __getstate__(self):
+        return self.source, self.start, self.end
+
+    def __setstate__(self, state):
+        self.source, self.start, self.end = state
+        self._lines = None
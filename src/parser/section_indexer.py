@@ -0,0 +1,228 @@
+'''
+First-pass section indexer for DEF files.
+
+The indexer memory-maps the file and records the byte range of every top-level
+section, so the block parsers can seek straight to the sections that are
+actually used instead of reading (and tokenizing) the whole file.
+
+    VERSION 5.8 ;                      -> header, single line
+    DIEAREA ( 0 0 ) ( 100 100 ) ;      -> no-end block, ends at ';'
+    NETS 8 ;                           -> with-end block, ends at "END NETS"
+    ...
+    END NETS
+'''
+import mmap
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass
+class SectionSpan:
+    '''Byte range of one top-level section'''
+    keyword: str
+    start: int       # offset of the opening line
+    body_start: int  # offset right after the opening line
+    end: int         # offset right after the closing line
+
+
+class SectionReader:
+    '''
+    File-like view over a byte range of a mmapped file.
+    Only implements what the block parsers need: readline() and tell().
+    readline() returns '' once the end of the range is reached.
+    With a progress reporter, the bytes and lines read are handed to it
+    every report_bytes bytes (and by report_progress()).
+    source is the path of the file mm holds (base: offset of mm[0] in it); with it,
+    the parsers keep the byte range of an entry instead of copies of its lines.
+    '''
+    def __init__(self, mm, start, end, encoding='utf-8', progress=None, report_bytes=1 << 20, source=None, base=0):
+        self.mm = mm
+        self.pos = start
+        self.end = end
+        self.source = source
+        self.base = base
+        # Offset of the line last returned by readline()
+        self.line_start = start
+        self.encoding = encoding
+        self.n_lines = 0
+        self.progress = progress
+        self.report_bytes = report_bytes
+        self._reported_pos = start
+        self._reported_lines = 0
+        self._next_report = start + report_bytes if progress is not None else end + 1
+
+    def readline(self):
+        if self.pos >= self.end:
+            return ''
+        eol = self.mm.find(b'\n', self.pos, self.end)
+        eol = self.end if eol == -1 else eol + 1
+        line = self.mm[self.pos:eol]
+        self.line_start = self.pos
+        self.pos = eol
+        self.n_lines += 1
+        if eol >= self._next_report:
+            self.report_progress()
+        return line.decode(self.encoding, errors='ignore')
+
+    def report_progress(self):
+        '''Hand the bytes and lines read since the last report to the progress reporter'''
+        if self.progress is None:
+            return
+        self.progress.advance(self.pos - self._reported_pos, self.n_lines - self._reported_lines)
+        self._reported_pos = self.pos
+        self._reported_lines = self.n_lines
+        self._next_report = self.pos + self.report_bytes
+
+    def tell(self):
+        return self.pos
+
+
+class DefSectionIndexer:
+    '''
+    Walk the top level of a DEF file and return {keyword: [SectionSpan, ...]}.
+
+    Only the opening line of each section is inspected in Python; the end of a
+    with-end block is located with a single regex search over the mmap, so the
+    body of big sections (SPECIALNETS, FILLS, ...) is never split into lines.
+    '''
+    def __init__(self, Header_list, NoEndBlockList, WithEndBlockList):
+        self.Header_list = Header_list
+        self.NoEndBlockList = NoEndBlockList
+        self.WithEndBlockList = WithEndBlockList
+        self._end_patterns = {}
+
+    def _end_pattern(self, keyward):
+        # Same rule as BlockParserWithEnd: line.strip() == f"END {keyward}"
+        if keyward not in self._end_patterns:
+            self._end_patterns[keyward] = re.compile(
+                rb'^[ \t]*END ' + re.escape(keyward.encode()) + rb'[ \t\r\f\v]*$',
+                re.MULTILINE
+            )
+        return self._end_patterns[keyward]
+
+    def index(self, mm) -> Dict[str, List[SectionSpan]]:
+        stream = self.stream()
+        stream.feed(mm, final=True)
+        return stream.sections
+
+    def stream(self):
+        '''StreamIndex of a buffer that is still being filled (a file being decompressed)'''
+        return StreamIndex(self)
+
+
+class StreamIndex:
+    '''
+    Index of a buffer that grows at its end, e.g. while a compressed DEF is decompressed.
+    Call feed(buffer) after every appended chunk: it returns the sections completed since
+    the previous call, in file order. A section whose end is not in the buffer yet waits
+    for the next chunks (the search for its END line resumes where it stopped);
+    feed(buffer, final=True) once the buffer is complete. sections holds everything
+    found so far, as DefSectionIndexer.index() returns it.
+    '''
+    def __init__(self, indexer):
+        self.indexer = indexer
+        self.sections = {}
+        self.pos = 0
+        # Where to resume the END search of the pending with-end block at pos
+        self._search_from = None
+
+    def feed(self, mm, final=False) -> List[SectionSpan]:
+        indexer = self.indexer
+        found = []
+        pos = self.pos
+        size = len(mm)
+
+        while pos < size:
+            eol = mm.find(b'\n', pos)
+            if eol == -1 and not final:
+                break
+            line_end = size if eol == -1 else eol + 1
+            parts = mm[pos:line_end].split(None, 1)
+            if not parts or parts[0].startswith(b'#'):
+                pos = line_end
+                continue
+
+            prefix = parts[0].decode('utf-8', errors='ignore')
+            if prefix in indexer.Header_list:
+                end = line_end
+            elif prefix in indexer.NoEndBlockList:
+                end = line_end
+                if mm.find(b';', pos, line_end) == -1:
+                    semicolon = mm.find(b';', line_end)
+                    next_eol = -1 if semicolon == -1 else mm.find(b'\n', semicolon)
+                    if next_eol == -1 and not final:
+                        break
+                    if semicolon == -1:
+                        end = size
+                    else:
+                        end = size if next_eol == -1 else next_eol + 1
+            elif prefix in indexer.WithEndBlockList:
+                search_from = line_end if self._search_from is None else self._search_from
+                match = indexer._end_pattern(prefix).search(mm, search_from)
+                if not final and (match is None or match.end() >= size):
+                    # The END line is not (completely) there yet: next time, search from the last line
+                    self._search_from = max(line_end, mm.rfind(b'\n', line_end, size) + 1)
+                    break
+                self._search_from = None
+                if match is None:
+                    end = size
+                else:
+                    end = size if match.end() >= size else match.end() + 1
+            else:
+                pos = line_end
+                continue
+
+            span = SectionSpan(prefix, pos, line_end, end)
+            self.sections.setdefault(prefix, []).append(span)
+            found.append(span)
+            pos = end
+
+        self.pos = pos
+        return found
+
+
+# A "- name" entry at the start of a line
+_ENTRY_START = re.compile(rb'\n[ \t]*- ')
+
+
+def _next_entry_start(mm, pos, end):
+    '''
+    Offset of the first entry start in [pos, end) that is not inside another entry,
+    i.e. the last non-blank byte before it is the ';' closing the previous entry.
+    '''
+    while (match := _ENTRY_START.search(mm, pos, end)) is not None:
+        candidate = match.start() + 1
+        i = match.start()
+        while i > 0 and mm[i:i + 1].isspace():
+            i -= 1
+        if mm[i:i + 1] == b';':
+            return candidate
+        pos = match.end()
+    return None
+
+
+def split_on_entries(mm, start, end, n_chunks):
+    '''
+    Split the byte range [start, end) of a with-end block into at most n_chunks
+    contiguous ranges. Every boundary falls on the first line of a "- name ... ;"
+    entry, so each range can be parsed on its own and the results concatenated
+    in order give the same entries as parsing the whole range.
+    '''
+    bounds = [start]
+    step = (end - start) // max(n_chunks, 1)
+    for k in range(1, n_chunks):
+        cut = _next_entry_start(mm, max(start + k * step, bounds[-1]), end)
+        if cut is None:
+            break
+        bounds.append(cut)
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def open_mmap(file_path):
+    '''Return a read-only mmap of file_path (None for an empty file)'''
+    with open(file_path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
@@ -1,4 +1,5 @@
 from src.parser.base import BaseParser
+from src.parser.entry_lines import EntryLines
 
 class HeaderParser(BaseParser):
     
@@ -39,15 +40,18 @@ class MultiLineBlockParserWithEnd(BaseParser):
         self.dash_parser = MultiLineDashParser()
 
     def parse(self, f, first_line, keyward):
-        self.record = []
+        self.record = list(self.iter_parse(f, first_line, keyward))
+        return self.record
+
+    def iter_parse(self, f, first_line, keyward):
+        """Yield the dash entries one at a time instead of collecting them"""
         while line := f.readline():
             if line.strip().startswith("- "):
-                self.record.append(self.dash_parser.parse(f, line, keyward))
+                yield self.dash_parser.parse(f, line, keyward)
             if line == '\n':
                 continue
             if line.strip() == f"END {keyward}":
                 break
-        return self.record
 
 class DashParser(BaseParser):
 
@@ -72,7 +76,14 @@ class MultiLineDashParser(BaseParser):
         """
         Parse a dash entry that may span multiple lines.
         Collects all content from the dash line until the semicolon.
+        raw_content is the list of stripped lines, or for a reader over a file
+        (SectionReader with a source) an EntryLines view of the entry bytes.
         """
+        # Entries read from a file only keep their byte range
+        source = getattr(f, 'source', None)
+        if source is not None:
+            start = f.line_start + f.base
+
         # Collect all lines for this dash entry
         all_content = [first_line.strip()]
         
@@ -86,7 +97,7 @@ class MultiLineDashParser(BaseParser):
             return {
                 'head_section': full_content,
                 'property_section': [],
-                'raw_content': [first_line.strip()]
+                'raw_content': EntryLines(source, start, f.tell() + f.base) if source is not None else all_content
             }
         
         # Otherwise, keep reading until we find the semicolon
@@ -103,7 +114,7 @@ class MultiLineDashParser(BaseParser):
         return {
             'head_section': full_content,
             'property_section': [],
-            'raw_content': all_content
+            'raw_content': EntryLines(source, start, f.tell() + f.base) if source is not None else all_content
         }
 
 class PBlockParserWithEnd(BaseParser):
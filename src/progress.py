@@ -0,0 +1,208 @@
+'''
+Progress reporting and instrumentation for the parsers.
+
+The parsers call advance(n_bytes, n_lines) as they go; a reporter only does real
+work (redrawing a bar, writing a log line) once every report_bytes bytes or
+report_interval seconds, so the hot loops never pay for it per line.
+Per-section lines/sec and bytes/sec are collected in SectionStats.
+
+    progress = make_progress('log')           # 'tqdm', 'log' or 'silent'
+    progress.begin("Parsing DEF file", total_bytes)
+    progress.begin_section('NETS')
+    progress.advance(n_bytes, n_lines)
+    progress.end_section()
+    progress.finish()
+    progress.section_stats                    # [SectionStats, ...]
+    progress.reset()                          # forget the stats, before the next parse
+
+advance(n_bytes, section_bytes=...) moves the overall counter and the section
+counter by different amounts: a compressed DEF advances the bar by decompressed
+chunks while every section counts its own decompressed byte range.
+note() writes a one-off message (nothing in 'silent').
+'''
+import time
+from dataclasses import dataclass
+from typing import List
+
+from loguru import logger
+from tqdm import tqdm
+
+REPORT_BYTES = 4 << 20
+REPORT_INTERVAL = 1.0
+
+
+@dataclass
+class SectionStats:
+    '''Throughput of one section'''
+    name: str
+    n_bytes: int
+    n_lines: int
+    seconds: float
+
+    @property
+    def bytes_per_sec(self):
+        return self.n_bytes / self.seconds if self.seconds > 0 else float('inf')
+
+    @property
+    def lines_per_sec(self):
+        return self.n_lines / self.seconds if self.seconds > 0 else float('inf')
+
+    def __str__(self):
+        return (f"{self.name}: {self.n_lines} lines, {self.n_bytes / 1e6:.1f} MB in {self.seconds:.2f}s "
+                f"({self.lines_per_sec:,.0f} lines/s, {self.bytes_per_sec / 1e6:.1f} MB/s)")
+
+
+class SilentProgress:
+    '''
+    Base reporter: keeps the counters and section stats, reports nothing.
+    Subclasses override the _on_* hooks.
+    '''
+    def __init__(self, report_bytes=REPORT_BYTES, report_interval=REPORT_INTERVAL):
+        self.report_bytes = report_bytes
+        self.report_interval = report_interval
+        self.section_stats: List[SectionStats] = []
+        self.desc = ''
+        self.total = None
+        self.done_bytes = 0
+        self._pending_bytes = 0
+        self._last_report = time.monotonic()
+        self._section = None
+
+    def begin(self, desc, total=None):
+        self.desc = desc
+        self.total = total
+        self.done_bytes = 0
+        self._pending_bytes = 0
+        self._last_report = time.monotonic()
+        self._on_begin()
+
+    def reset(self):
+        '''Drop the section stats of the previous calls'''
+        self.end_section()
+        self.section_stats = []
+
+    def begin_section(self, name):
+        self.end_section()
+        self._section = [name, 0, 0, time.perf_counter()]
+
+    def advance(self, n_bytes, n_lines=0, section_bytes=None):
+        self._pending_bytes += n_bytes
+        if self._section is not None:
+            self._section[1] += n_bytes if section_bytes is None else section_bytes
+            self._section[2] += n_lines
+        if self._pending_bytes >= self.report_bytes or time.monotonic() - self._last_report >= self.report_interval:
+            self._flush()
+
+    def end_section(self):
+        if self._section is None:
+            return
+        name, n_bytes, n_lines, start = self._section
+        self._section = None
+        self._flush()
+        stats = SectionStats(name, n_bytes, n_lines, time.perf_counter() - start)
+        self.section_stats.append(stats)
+        self._on_section_end(stats)
+
+    def finish(self):
+        self.end_section()
+        self._flush()
+        self._on_finish()
+
+    def note(self, message):
+        self._on_note(message)
+
+    def _flush(self):
+        if self._pending_bytes:
+            self.done_bytes += self._pending_bytes
+            self._on_update(self._pending_bytes)
+            self._pending_bytes = 0
+        self._last_report = time.monotonic()
+
+    def _on_begin(self):
+        pass
+
+    def _on_update(self, n_bytes):
+        pass
+
+    def _on_section_end(self, stats):
+        pass
+
+    def _on_finish(self):
+        pass
+
+    def _on_note(self, message):
+        pass
+
+
+class TqdmProgress(SilentProgress):
+    '''tqdm bar over the bytes, section stats written below the bar'''
+    def __init__(self, *args, show_sections=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.show_sections = show_sections
+        self.pbar = None
+
+    def _on_begin(self):
+        if self.pbar is not None:
+            self.pbar.close()
+        self.pbar = tqdm(total=self.total, unit='B', unit_scale=True, desc=self.desc)
+
+    def _on_update(self, n_bytes):
+        if self.pbar is not None:
+            self.pbar.update(n_bytes)
+
+    def _on_section_end(self, stats):
+        if self.show_sections:
+            tqdm.write(str(stats))
+
+    def _on_finish(self):
+        if self.pbar is not None:
+            self.pbar.close()
+            self.pbar = None
+
+    def _on_note(self, message):
+        logger.info(message)
+
+
+class LoggingProgress(SilentProgress):
+    '''Periodic log lines instead of a bar, suited to batch jobs and CI logs'''
+    def _on_begin(self):
+        self._begin_time = self._last_log = time.perf_counter()
+        logger.info(f"{self.desc}: started")
+
+    def _on_update(self, n_bytes):
+        # Section ends flush the counters too; keep to one progress line per interval
+        now = time.perf_counter()
+        if now - self._last_log < self.report_interval:
+            return
+        self._last_log = now
+        elapsed = now - self._begin_time
+        rate = self.done_bytes / elapsed / 1e6 if elapsed > 0 else 0.0
+        if self.total:
+            logger.info(f"{self.desc}: {self.done_bytes / self.total:6.1%} ({self.done_bytes / 1e6:.1f} MB, {rate:.1f} MB/s)")
+        else:
+            logger.info(f"{self.desc}: {self.done_bytes / 1e6:.1f} MB ({rate:.1f} MB/s)")
+
+    def _on_section_end(self, stats):
+        logger.info(f"{self.desc}: {stats}")
+
+    def _on_finish(self):
+        logger.info(f"{self.desc}: done in {time.perf_counter() - self._begin_time:.2f}s")
+
+    def _on_note(self, message):
+        logger.info(message)
+
+
+PROGRESS_REPORTERS = {
+    'tqdm': TqdmProgress,
+    'log': LoggingProgress,
+    'silent': SilentProgress,
+}
+
+
+def make_progress(progress='tqdm', **kwargs):
+    '''Return a reporter: progress is one of PROGRESS_REPORTERS or already a reporter'''
+    if isinstance(progress, SilentProgress):
+        return progress
+    if progress not in PROGRESS_REPORTERS:
+        raise ValueError(f"Unknown progress reporter {progress!r}, expected one of {sorted(PROGRESS_REPORTERS)}")
+    return PROGRESS_REPORTERS[progress](**kwargs)
@@ -9,8 +9,11 @@ Validates DEF file data structure including:
 
 from typing import Dict, List, Any, Optional
 from .models import QCIssue, QCReport, Severity
+import io
 import os
 
+from src.parser.compression import open_input
+
 
 class DefChecker:
     """Quality checker for DEF file data"""
@@ -66,7 +69,7 @@ class DefChecker:
             return self.report
         
         try:
-            with open(def_file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            with io.TextIOWrapper(open_input(def_file_path), encoding='utf-8', errors='ignore') as f:
                 lines = f.readlines()
             
             self._check_section_delimiters(lines, def_data, def_file_path)
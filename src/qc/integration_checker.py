@@ -7,11 +7,13 @@ Validates cross-references between DEF and LEF data including:
 - Cell type consistency between DEF and LEF
 """
 
-from typing import Dict, List, Any, Optional, Set
+from typing import Dict, Any, Optional
 import pandas as pd
 from pathlib import Path
 import os
+import numpy as np
 from .models import QCIssue, QCReport, Severity
+from src._def.design_db import DesignDB
 
 
 class IntegrationChecker:
@@ -25,7 +27,8 @@ class IntegrationChecker:
         Main entry point for DEF/LEF integration validation
         
         Args:
-            def_data: Dictionary containing parsed DEF data
+            def_data: Dictionary containing parsed DEF data; its DesignDB under 'DESIGN_DB'
+                      is used when present, otherwise one is built from COMPONENTS / NETS
             lef_data: Dictionary containing parsed LEF data
             
         Returns:
@@ -33,9 +36,10 @@ class IntegrationChecker:
         """
         self.report = QCReport()
         
-        # Extract components and nets from DEF
-        components = def_data.get('COMPONENTS', [])
-        nets = def_data.get('NETS', [])
+        # Instance -> cell and net -> instance indexes of the DEF, shared by all checks
+        design_db = def_data.get('DESIGN_DB')
+        if design_db is None:
+            design_db = DesignDB.from_records(def_data.get('COMPONENTS') or [], def_data.get('NETS') or [])
         
         
         # Extract cell dictionary from LEF
@@ -43,30 +47,20 @@ class IntegrationChecker:
         
         
         # Check cell type consistency
-        self._check_cell_type_consistency(components, cell_dict)
+        self._check_cell_type_consistency(design_db, cell_dict)
         
         # check all instance used in NETS are in COMPONENTS
-        component_instance_name_set = set([component['instance_name'] for component in components])
-        self._check_instance_in_components(nets, component_instance_name_set)
+        self._check_instance_in_components(design_db)
 
         # check all instance's celltype in NETS are in LEF
-        ins2cell_dict = {ele['instance_name']: ele['cell_name'] for ele in components}
-        self._check_instance_celltype_in_lef(nets, ins2cell_dict, cell_dict)
+        self._check_instance_celltype_in_lef(design_db, cell_dict)
         
         return self.report
     
-    def _check_cell_type_consistency(self, components: List[Dict[str, Any]], cell_dict: Dict[str, Any]):
+    def _check_cell_type_consistency(self, design_db: DesignDB, cell_dict: Dict[str, Any]):
         """Check if all cell types used in components exist in LEF"""
-        used_cell_types = set()
-        missing_cell_types = set()
-        
-        for component in components:
-            if 'cell_name' in component:
-                cell_name = component['cell_name']
-                used_cell_types.add(cell_name)
-                
-                if cell_name not in cell_dict:
-                    missing_cell_types.add(cell_name)
+        used_cell_types = set(design_db.cells[cell_id] for cell_id in np.flatnonzero(np.diff(design_db.cell_indptr)).tolist())
+        missing_cell_types = set(cell_name for cell_name in used_cell_types if cell_name not in cell_dict)
         
         # Report statistics
         self.report.add_issue(QCIssue(
@@ -109,23 +103,25 @@ class IntegrationChecker:
                 details={"unused_cell_types": len(unused_cell_types), "unused_cells": list(unused_cell_types)}
             ))
     
-    def _check_instance_in_components(self, nets: List[Dict[str, Any]], component_instance_name_set: Set[str]):
+    def _check_instance_in_components(self, design_db: DesignDB):
         """Check if all instance used in NETS are in COMPONENTS"""
-        for net in nets:
-            for ins_pin in net['connections']:
-                instance = ins_pin['instance_name']
-                if instance not in component_instance_name_set:
-                    self.report.add_issue(QCIssue(severity=Severity.ERROR, category="INTEGRATION", message=f"Instance {instance} used in NETS but not found in COMPONENTS", file_name="integration", details={"instance": instance}))
+        for conn in design_db.unknown_connections().tolist():
+            instance = design_db.instances[int(design_db.conn_instances[conn])]
+            self.report.add_issue(QCIssue(severity=Severity.ERROR, category="INTEGRATION", message=f"Instance {instance} used in NETS but not found in COMPONENTS", file_name="integration", details={"instance": instance}))
 
-    def _check_instance_celltype_in_lef(self, nets: List[Dict[str, Any]], ins2cell_dict: Dict[str, str], cell_dict: Dict[str, Any]):
+    def _check_instance_celltype_in_lef(self, design_db: DesignDB, cell_dict: Dict[str, Any]):
         """Check if all instance's celltype in NETS are in LEF"""
-        for net in nets:
-            for ins_pin in net['connections']:
-                ins_name = ins_pin['instance_name']
-                if ins_name not in ins2cell_dict:
-                    continue # since this error is reported by _check_instance_in_components
-                if ins2cell_dict[ins_name] not in cell_dict:
-                    self.report.add_issue(QCIssue(severity=Severity.ERROR, category="INTEGRATION", message=f"Instance {ins_name} with cellname {ins2cell_dict[ins_name]} used in NETS but not found in LEF", file_name="integration", details={"instance": ins_name}))
+        # One flag per cell, plus a False one for cell -1: instances not in COMPONENTS are
+        # reported by _check_instance_in_components
+        missing_cells = np.array([cell_name not in cell_dict for cell_name in design_db.cells] + [False], dtype=bool)
+        inst_ids = design_db.conn_instances
+        cell_ids = np.full(len(inst_ids), -1, dtype=np.int64)
+        known = inst_ids >= 0
+        cell_ids[known] = design_db.instance_cells[inst_ids[known]]
+        for conn in np.flatnonzero(missing_cells[cell_ids]).tolist():
+            ins_name = design_db.instances[int(inst_ids[conn])]
+            cell_name = design_db.cells[int(cell_ids[conn])]
+            self.report.add_issue(QCIssue(severity=Severity.ERROR, category="INTEGRATION", message=f"Instance {ins_name} with cellname {cell_name} used in NETS but not found in LEF", file_name="integration", details={"instance": ins_name}))
                
                 
     def check_lib_profiler_cells(self, def_data: Dict[str, Any], lib_profiler_path: Optional[str] = None) -> QCReport:
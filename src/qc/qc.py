@@ -11,11 +11,38 @@ Orchestrates all quality checks for DEF/LEF files including:
 import os
 import pickle
 from loguru import logger
+from collections.abc import Sequence
 from typing import Dict, List, Any, Optional
 from .models import QCIssue, QCReport, Severity
 from .def_checker import DefChecker
 from .lef_checker import LefChecker
 from .integration_checker import IntegrationChecker
+from src.design_store import DesignStore, is_design_store, open_design
+from src._def.design_db import DesignDB
+
+
+class LazyRecords(Sequence):
+    """Records of one DEF section, built once by load() when their content is first needed (len() does not load)"""
+
+    def __init__(self, count: int, load):
+        self._count = count
+        self._load = load
+        self._records = None
+
+    def _get(self) -> list:
+        if self._records is None:
+            self._records = self._load()
+            self._load = None
+        return self._records
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        return self._get()[i]
+
+    def __iter__(self):
+        return iter(self._get())
 
 
 class QualityController:
@@ -190,7 +217,7 @@ class QualityController:
         Load DEF and LEF data from pickle files
         
         Args:
-            def_pickle_path: Path to DEF pickle file
+            def_pickle_path: Path to DEF design store (def_outputs.design) or pickle file
             lef_pickle_path: Path to LEF pickle file
             
         Returns:
@@ -199,11 +226,14 @@ class QualityController:
         def_data = None
         lef_data = None
         
-        # Load DEF data
+        # Load DEF data (design store written by def_parser.py, or a legacy pickle)
         if os.path.exists(def_pickle_path):
             try:
-                with open(def_pickle_path, 'rb') as f:
-                    def_data = pickle.load(f)
+                if is_design_store(def_pickle_path):
+                    def_data = open_design(def_pickle_path)
+                else:
+                    with open(def_pickle_path, 'rb') as f:
+                        def_data = pickle.load(f)
                 print(f"Loaded DEF data from {def_pickle_path}")
             except Exception as e:
                 print(f"Error loading DEF data from {def_pickle_path}: {e}")
@@ -335,19 +365,22 @@ class QualityController:
         
         """
 
-        component_count = len([ele for ele in def_data['id2instanceInfo'].keys()])
-        net_count = len([ele for ele in def_data['id2NetInfo'].keys()])
+        id2instance_info = def_data['id2instanceInfo']
+        id2net_info = def_data['id2NetInfo']
+        if isinstance(def_data, DesignStore):
+            # Built from the store columns, not one view lookup per id
+            load_components, load_nets = def_data.instance_records, def_data.net_records
+        else:
+            load_components = lambda: [id2instance_info[i] for i in id2instance_info]
+            load_nets = lambda: [id2net_info[i] for i in id2net_info]
 
+        # The dict lists are only built for the checks that read them (DefChecker), once
         new_def_data = {}
-        if [def_data['id2instanceInfo'][ele] for ele in def_data['id2instanceInfo'].keys()]:
-            new_def_data['COMPONENTS'] = [def_data['id2instanceInfo'][ele] for ele in def_data['id2instanceInfo'].keys()]
-        else:
-            new_def_data['COMPONENTS'] = None
+        new_def_data['COMPONENTS'] = LazyRecords(len(id2instance_info), load_components) if len(id2instance_info) else None
+        new_def_data['NETS'] = LazyRecords(len(id2net_info), load_nets) if len(id2net_info) else None
 
-        if [def_data['id2NetInfo'][ele] for ele in def_data['id2NetInfo'].keys()]:
-            new_def_data['NETS'] = [def_data['id2NetInfo'][ele] for ele in def_data['id2NetInfo'].keys()]
-        else:
-            new_def_data['NETS'] = None
+        # Cross-indexes of the design, built once for the integration checks (from the columns of a store)
+        new_def_data['DESIGN_DB'] = DesignDB.from_def_output(def_data)
 
         new_lef_data = lef_data['cell_dict']
 
@@ -358,8 +391,8 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='DEF/LEF Quality Checker')
-    parser.add_argument('--def_pickle', type=str, default='./tmp/def_outputs.pkl', 
-                       help='Path to DEF pickle file')
+    parser.add_argument('--def_pickle', type=str, default='./tmp/def_outputs.design', 
+                       help='Path to DEF design store or pickle file')
     parser.add_argument('--lef_pickle', type=str, default='./tmp/lef_outputs.pkl',
                        help='Path to LEF pickle file')
     parser.add_argument('--output_report', type=str, default='./tmp/qc_report.txt',
@@ -0,0 +1,96 @@
+'''
+Shared fixtures: the bundled test DEF, a parser factory and a small synthetic design.
+
+The synthetic design is deterministic (seeded) and exercises what the bundled file
+does not: many entries, multi-line entries, routed nets, IO pins, hierarchical
+instance names and every placement status / orientation.
+'''
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import def_parser  # noqa: E402
+
+TEST_DEF = os.path.join(ROOT, 'test_data', 'complete.5.8.def')
+TEST_LEF = os.path.join(ROOT, 'test_data', 'complete.5.8.lef')
+
+CELLS = ('INV_X1', 'NAND2_X1', 'BUF_X2', 'DFF_X1')
+ORIENTS = ('N', 'S', 'E', 'W', 'FN', 'FS', 'FE', 'FW')
+
+
+def make_parser(path, **kwargs):
+    kwargs.setdefault('progress', 'silent')
+    return def_parser.DefParser(path, def_parser.Header_list, def_parser.NoEndBlockList,
+                                def_parser.WithEndBlockList, def_parser.used_prefix, **kwargs)
+
+
+def synthetic_def_text(n_components=300, n_nets=200, n_pins=6, seed=7):
+    '''DEF text of a small random design, the same for the same arguments'''
+    rng = random.Random(seed)
+    lines = [
+        'VERSION 5.8 ;', 'DIVIDERCHAR "/" ;', 'BUSBITCHARS "[]" ;', 'DESIGN synthetic ;',
+        'UNITS DISTANCE MICRONS 1000 ;', '',
+        'DIEAREA ( 0 0 ) ( 200000 100000 ) ;',
+        'ROW ROW_0 CORE 0 0 N DO 200 BY 1 STEP 1000 0 ;',
+        'ROW ROW_1 CORE 0 2000 FS DO 200 BY 1 STEP 1000 0 ;',
+        'TRACKS X 50 DO 2000 STEP 100 LAYER M1 ;',
+        'TRACKS Y 50 DO 1000 STEP 100 LAYER M1 ;',
+        'GCELLGRID X 0 DO 21 STEP 10000 ;',
+        'GCELLGRID Y 0 DO 11 STEP 10000 ;', '',
+        'VIAS 1 ;', '- V12', '  + RECT M1 ( -50 -50 ) ( 50 50 ) ;', 'END VIAS', '',
+        f'COMPONENTS {n_components} ;',
+    ]
+    for i in range(n_components):
+        name = f'top/u{i % 5}/g{i}'
+        cell = rng.choice(CELLS)
+        status = rng.choice(('PLACED', 'FIXED', 'UNPLACED', None))
+        if status is None:
+            lines.append(f'- {name} {cell} ;')
+        elif status == 'UNPLACED':
+            lines.append(f'- {name} {cell}')
+            lines.append('  + UNPLACED ;')
+        else:
+            lines.append(f'- {name} {cell}')
+            lines.append('  + SOURCE NETLIST')
+            lines.append(f'  + {status} ( {rng.randrange(0, 200000, 10)} {rng.randrange(0, 100000, 10)} ) '
+                         f'{rng.choice(ORIENTS)} ;')
+    lines += ['END COMPONENTS', '']
+    lines.append(f'PINS {n_pins} ;')
+    for p in range(n_pins):
+        lines.append(f'- p{p} + NET n{p} + DIRECTION {rng.choice(("INPUT", "OUTPUT"))} + USE SIGNAL')
+        lines.append('  + LAYER M1 ( -10 -10 ) ( 10 10 )')
+        lines.append(f'  + PLACED ( {p * 1000} 0 ) N ;')
+    lines += ['END PINS', '']
+    lines += ['SPECIALNETS 1 ;', '- VDD ( * VDD )', '  + ROUTED M1 200 + SHAPE STRIPE ( 0 0 ) ( 200000 0 )',
+              '  + USE POWER ;', 'END SPECIALNETS', '']
+    lines.append(f'NETS {n_nets} ;')
+    for j in range(n_nets):
+        picks = [rng.randrange(n_components) for _ in range(rng.randint(1, 5))]
+        connections = ' '.join(f'( top/u{k % 5}/g{k} {rng.choice("AZB")} )' for k in picks)
+        if j < n_pins:
+            connections = f'( PIN p{j} ) ' + connections
+        lines.append(f'- n{j} {connections}')
+        if j % 2:
+            lines.append(f'  + ROUTED M1 ( {j * 100} 0 ) ( * 1000 ) V12')
+            lines.append(f'    NEW M2 ( {j * 100} 1000 ) ( 5000 * )')
+        lines.append('  + USE SIGNAL ;')
+    lines += ['END NETS', '', 'END DESIGN', '']
+    return '\n'.join(lines)
+
+
+@pytest.fixture
+def test_def():
+    return TEST_DEF
+
+
+@pytest.fixture
+def synthetic_def(tmp_path):
+    path = tmp_path / 'synthetic.def'
+    path.write_text(synthetic_def_text())
+    return str(path)
@@ -0,0 +1,85 @@
+import os
+import pickle
+
+import batch_parser
+from batch_parser import DesignJob, read_manifest, run_batch, scan_design_dir, summarize
+
+import def_parser
+from conftest import TEST_DEF, TEST_LEF, make_parser, synthetic_def_text
+
+
+def _options(**overrides):
+    options = {
+        'output_format': 'pickle', 'min_degree': 2, 'max_degree': None, 'drop_io_only': False,
+        'drop_power_nets': False, 'cache': False, 'cache_dir': None, 'cache_max_bytes': 0,
+    }
+    options.update(overrides)
+    return options
+
+
+def test_read_manifest(tmp_path):
+    manifest = tmp_path / 'designs.txt'
+    manifest.write_text('# designs\n/a/top.def /lib/a.lef /lib/b.lef\n\n/b/core.def.gz  # compressed\n')
+    jobs = read_manifest(str(manifest))
+    assert [(job.name, job.def_path, job.lef_paths) for job in jobs] == [
+        ('top', '/a/top.def', ['/lib/a.lef', '/lib/b.lef']),
+        ('core', '/b/core.def.gz', []),
+    ]
+
+
+def test_scan_design_dir_pairs_lef_by_stem(tmp_path):
+    for name in ('a.def', 'a.lef', 'b.def.gz', 'notes.txt'):
+        (tmp_path / name).write_text('')
+    jobs = scan_design_dir(str(tmp_path), ['/lib/tech.lef'])
+    assert [(job.name, os.path.basename(job.def_path), job.lef_paths) for job in jobs] == [
+        ('a', 'a.def', [str(tmp_path / 'a.lef')]),
+        ('b', 'b.def.gz', ['/lib/tech.lef']),
+    ]
+
+
+def test_duplicate_names_get_distinct_directories():
+    jobs = batch_parser._unique_names([DesignJob('top', '/a/top.def'), DesignJob('top', '/b/top.def')])
+    assert [job.name for job in jobs] == ['top', 'top_1']
+
+
+def test_duplicate_names_never_take_an_existing_name():
+    for names, expected in [(['a', 'a', 'a_1'], ['a', 'a_2', 'a_1']),
+                            (['a_1', 'a', 'a'], ['a_1', 'a', 'a_2']),
+                            (['a', 'a', 'a', 'a_2'], ['a', 'a_1', 'a_3', 'a_2'])]:
+        jobs = batch_parser._unique_names([DesignJob(name, f'/{i}/{name}.def') for i, name in enumerate(names)])
+        assert [job.name for job in jobs] == expected
+
+
+def test_run_batch_matches_single_design_runs(tmp_path):
+    synthetic = tmp_path / 'synthetic.def'
+    synthetic.write_text(synthetic_def_text())
+    jobs = [DesignJob('complete', TEST_DEF, [TEST_LEF]), DesignJob('synthetic', str(synthetic), [TEST_LEF]),
+            DesignJob('missing', str(tmp_path / 'missing.def'))]
+    output_dir = tmp_path / 'batch'
+    results = run_batch(jobs, str(output_dir), 2, _options())
+
+    by_name = {result.name: result for result in results if result.kind == 'def'}
+    assert by_name['missing'].error is not None
+    for job in jobs[:2]:
+        result = by_name[job.name]
+        assert result.error is None
+        with open(output_dir / job.name / 'def_outputs.pkl', 'rb') as f:
+            output = pickle.load(f)
+        expected = def_parser.build_def_output(make_parser(job.def_path).parse(), show_progress=False)
+        assert output == expected
+        assert (result.n_instances, result.n_nets) == (len(expected['id2instanceInfo']), len(expected['id2NetInfo']))
+        # The LEF set is parsed once and shared by both designs
+        assert os.path.exists(output_dir / job.name / 'lef_outputs.pkl')
+    assert sum(1 for result in results if result.kind == 'lef') == 1
+
+    summary = summarize(results, 1.0)
+    assert (summary['designs'], summary['designs_ok'], summary['lef_sets']) == (3, 2, 1)
+    assert [failure['name'] for failure in summary['failed']] == ['missing']
+
+
+def test_failed_lef_fails_its_designs(tmp_path):
+    bad_lef = tmp_path / 'bad.lef'
+    jobs = [DesignJob('complete', TEST_DEF, [str(bad_lef)])]
+    results = run_batch(jobs, str(tmp_path / 'batch'), 1, _options())
+    design = next(result for result in results if result.kind == 'def')
+    assert design.error.startswith('LEF failed')
@@ -0,0 +1,76 @@
+import numpy as np
+
+from src._def.byte_engine import parse_component_table_bytes, parse_net_csr_bytes
+from src._def.component_table import ORIENT_CODE, STATUS_CODE
+from src.parser.section_indexer import DefSectionIndexer
+
+import def_parser
+from conftest import make_parser
+
+TABLE_COLUMNS = ('name_offsets', 'cell_ids', 'x', 'y', 'orient', 'status')
+CSR_COLUMNS = ('indptr', 'inst_ids', 'pin_ids', 'pin_cell_ids', 'name_offsets', 'pin_name_ids')
+
+
+def _assert_same_table(table, other):
+    for column in TABLE_COLUMNS:
+        assert np.array_equal(getattr(table, column), getattr(other, column)), column
+    assert table.name_buffer == other.name_buffer
+    assert list(table.cell_names) == list(other.cell_names)
+
+
+def _assert_same_csr(csr, other):
+    for column in CSR_COLUMNS:
+        assert np.array_equal(getattr(csr, column), getattr(other, column)), column
+    assert csr.name_buffer == other.name_buffer
+    assert list(csr.pin_names) == list(other.pin_names)
+
+
+def test_bytes_engine_matches_the_text_engine(test_def, synthetic_def):
+    for path in (test_def, synthetic_def):
+        text = make_parser(path)
+        table = text.parse_component_table()
+        csr = text.parse_net_csr(table)
+        raw = make_parser(path, engine='bytes')
+        raw_table = raw.parse_component_table()
+        raw_csr = raw.parse_net_csr(raw_table)
+        _assert_same_table(table, raw_table)
+        _assert_same_csr(csr, raw_csr)
+        assert raw_csr.net_names() == csr.net_names()
+
+
+def _index(data):
+    indexer = DefSectionIndexer(def_parser.Header_list, def_parser.NoEndBlockList, def_parser.WithEndBlockList)
+    return indexer.index(data)
+
+
+def test_entries_split_over_lines_and_repeated_placements():
+    data = b'''COMPONENTS 4 ;
+- a
+  INV_X1 + SOURCE NETLIST
+  + PLACED ( 10 -20 ) FS + FIXED ( 30 40 )
+    W ;
+- b BUF_X2 + UNPLACED ;
+- c ;
+- d INV_X1 + COVER ( 1 2 ) XX ;
+END COMPONENTS
+NETS 2 ;
+- n0 ( a A ) ( PIN p0 )
+  ( d Z ) + ROUTED M1 ( 0 0 ) ( 10 0 ) ;
+- n1 ( b A ) ( missing Z ) ;
+END NETS
+'''
+    sections = _index(data)
+    table = parse_component_table_bytes(data, sections['COMPONENTS'])
+    assert table.instance_names() == ['a', 'b', 'UNKNOWN', 'd']
+    assert [table.cell_name(i) for i in range(4)] == ['INV_X1', 'BUF_X2', 'UNKNOWN', 'INV_X1']
+    # The last placement statement wins
+    assert (table.x[0], table.y[0], table.orient[0], table.status[0]) == (30, 40, ORIENT_CODE['W'], STATUS_CODE['FIXED'])
+    assert table.status[1] == STATUS_CODE['UNPLACED']
+    assert (table.x[3], table.y[3], table.status[3]) == (1, 2, STATUS_CODE['COVER'])
+
+    csr = parse_net_csr_bytes(data, sections['NETS'], table)
+    assert csr.net_names() == ['n0', 'n1']
+    # The connections end at the first "+": the routing points are not connections
+    assert csr.degree().tolist() == [3, 2]
+    assert csr.degree(include_io=False).tolist() == [2, 2]
+    assert csr.inst_ids[:csr.indptr[1]].tolist().count(3) == 1
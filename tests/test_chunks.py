@@ -0,0 +1,49 @@
+import pytest
+
+from src.parser.section_indexer import open_mmap, split_on_entries
+from src._def.parallel import parse_chunk
+
+from conftest import make_parser
+
+
+def _section(path, keyword):
+    mm = open_mmap(path)
+    return mm, make_parser(path).section_indexer.index(mm)[keyword][0]
+
+
+@pytest.mark.parametrize('n_chunks', [1, 2, 5, 16])
+def test_chunks_cover_the_section_on_entry_starts(synthetic_def, n_chunks):
+    mm, span = _section(synthetic_def, 'NETS')
+    try:
+        chunks = split_on_entries(mm, span.body_start, span.end, n_chunks)
+        assert 1 <= len(chunks) <= n_chunks
+        assert chunks[0][0] == span.body_start and chunks[-1][1] == span.end
+        for (_, end), (start, _) in zip(chunks, chunks[1:]):
+            assert end == start
+            assert mm[start:start + 2] == b'- '
+    finally:
+        mm.close()
+
+
+@pytest.mark.parametrize('keyword, key', [('COMPONENTS', 'components'), ('NETS', 'nets')])
+def test_chunked_entries_equal_the_serial_ones(synthetic_def, keyword, key):
+    mm, span = _section(synthetic_def, keyword)
+    try:
+        chunks = split_on_entries(mm, span.body_start, span.end, 7)
+    finally:
+        mm.close()
+    merged = [entry for start, end in chunks for entry in parse_chunk(synthetic_def, keyword, start, end)]
+    assert merged == make_parser(synthetic_def).parse()[key]
+
+
+def test_a_dash_line_inside_an_entry_is_not_a_cut(tmp_path):
+    # The "- " line continues the entry above (no ';' before it): no chunk may start there
+    path = tmp_path / 'dash.def'
+    entries = ''.join(f'- n{i} ( u{i} A )\n- ( u{i} B ) ;\n' for i in range(50))
+    path.write_text(f'NETS 50 ;\n{entries}END NETS\n')
+    mm = open_mmap(str(path))
+    try:
+        for start, _ in split_on_entries(mm, 10, len(mm), 8)[1:]:
+            assert mm[start:start + 3] == b'- n'
+    finally:
+        mm.close()
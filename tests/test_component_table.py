@@ -0,0 +1,71 @@
+import numpy as np
+
+from src._def.component_table import (
+    ComponentTableBuilder, ORIENTATIONS, ORIENT_UNKNOWN, PLACEMENT_STATUS, STATUS_CODE,
+)
+
+from conftest import make_parser
+
+
+def _expected(component):
+    # The dict of parse() for one COMPONENTS entry -> (name, cell, status, x, y, orient)
+    features = component['features']
+    status = next((s for s in ('PLACED', 'FIXED', 'COVER') if s in features), 'UNPLACED')
+    if status == 'UNPLACED':
+        return component['ins_name'], component['cell_name'], status, None
+    point, orient = features[status]
+    x, y = point.strip('( )').split()
+    return component['ins_name'], component['cell_name'], status, (int(x), int(y), orient)
+
+
+def test_table_matches_the_parsed_dicts(test_def, synthetic_def):
+    for path in (test_def, synthetic_def):
+        components = make_parser(path).parse()['components']
+        table = make_parser(path).parse_component_table()
+        assert len(table) == len(components)
+        assert table.instance_names() == [component['ins_name'] for component in components]
+        for i, component in enumerate(components):
+            name, cell, status, placement = _expected(component)
+            assert table.instance_name(i) == name
+            assert table.cell_name(i) == cell
+            assert PLACEMENT_STATUS[table.status[i]] == status
+            if placement is not None:
+                assert (int(table.x[i]), int(table.y[i]), ORIENTATIONS[table.orient[i]]) == placement
+
+
+def test_columns_have_the_documented_dtypes(synthetic_def):
+    table = make_parser(synthetic_def).parse_component_table()
+    assert table.name_offsets.dtype == np.int64 and len(table.name_offsets) == len(table) + 1
+    assert table.cell_ids.dtype == np.int32
+    assert table.x.dtype == table.y.dtype == np.int64
+    assert table.orient.dtype == table.status.dtype == np.int8
+    assert isinstance(table.name_buffer, bytes)
+
+
+def test_cell_names_are_interned(synthetic_def):
+    table = make_parser(synthetic_def).parse_component_table()
+    assert sorted(table.cell_names) == ['BUF_X2', 'DFF_X1', 'INV_X1', 'NAND2_X1']
+    assert set(np.unique(table.cell_ids).tolist()) == set(range(4))
+
+
+def test_row_gives_placement_info_for_placed_instances_only(synthetic_def):
+    table = make_parser(synthetic_def).parse_component_table()
+    for i in range(len(table)):
+        row = table.row(i)
+        assert ('placementInfo' in row) == (table.status[i] == STATUS_CODE['PLACED'])
+    assert table.is_placed().tolist() == (table.status > 0).tolist()
+
+
+def test_builder_tokens_and_defaults():
+    builder = ComponentTableBuilder()
+    builder.add_tokens(['-', 'u1', 'INV', '+ FIXED', '( 10 20 )', 'FS'])
+    builder.add_tokens(['-', 'u2', 'INV'])
+    builder.add('u3', 'NAND', 5, 6, ORIENTATIONS.index('W'), STATUS_CODE['PLACED'])
+    table = builder.build()
+    assert table.instance_names() == ['u1', 'u2', 'u3']
+    assert list(table.cell_names) == ['INV', 'NAND']
+    assert table.cell_ids.tolist() == [0, 0, 1]
+    assert table.row(0) == {'instance_name': 'u1', 'cell_name': 'INV'}
+    assert table.status.tolist() == [STATUS_CODE['FIXED'], STATUS_CODE['UNPLACED'], STATUS_CODE['PLACED']]
+    assert table.orient[1] == ORIENT_UNKNOWN
+    assert table.row(2)['placementInfo'] == (5, 6, 'W')
@@ -0,0 +1,144 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+
+import pytest
+
+import def_parser
+from src.lef_parser import LEFParser
+from src.parser import compression
+from src.parser.compression import detect_compression, open_buffer, open_input
+from src.parser.section_indexer import open_mmap
+
+from conftest import TEST_DEF, TEST_LEF, make_parser
+
+COMPRESSORS = {'gzip': (gzip.open, '.gz'), 'bz2': (bz2.open, '.bz2'), 'xz': (lzma.open, '.xz')}
+
+
+def _compress(path, tmp_path, compression_name, name=None):
+    opener, suffix = COMPRESSORS[compression_name]
+    out = tmp_path / ((name or os.path.basename(path)) + suffix)
+    with open(path, 'rb') as src, opener(out, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    return str(out)
+
+
+def _without_raw_lines(entries):
+    return [{key: value for key, value in entry.items() if key != 'raw_lines'} for entry in entries]
+
+
+@pytest.mark.parametrize('compression_name', sorted(COMPRESSORS))
+def test_detect_compression_from_magic_bytes(tmp_path, compression_name):
+    compressed = _compress(TEST_DEF, tmp_path, compression_name)
+    assert detect_compression(compressed) == compression_name
+    # The extension does not matter
+    renamed = tmp_path / 'plain_name.def'
+    os.rename(compressed, renamed)
+    assert detect_compression(str(renamed)) == compression_name
+    assert detect_compression(TEST_DEF) is None
+
+
+@pytest.mark.parametrize('compression_name', sorted(COMPRESSORS))
+def test_compressed_content_matches_the_plain_file(tmp_path, compression_name):
+    compressed = _compress(TEST_DEF, tmp_path, compression_name)
+    with open(TEST_DEF, 'rb') as f:
+        plain = f.read()
+    assert bytes(open_buffer(compressed)) == plain
+    with open_input(compressed) as f:
+        assert f.read() == plain
+
+
+@pytest.mark.parametrize('compression_name', sorted(COMPRESSORS))
+def test_compressed_def_parses_like_the_plain_one(synthetic_def, tmp_path, compression_name):
+    expected = make_parser(synthetic_def).parse()
+    result = make_parser(_compress(synthetic_def, tmp_path, compression_name)).parse()
+    for key in ('components', 'nets'):
+        assert _without_raw_lines(result[key]) == _without_raw_lines(expected[key])
+        assert [list(entry['raw_lines']) for entry in result[key]] == [list(entry['raw_lines']) for entry in expected[key]]
+
+
+def test_compressed_lef_parses_like_the_plain_one(tmp_path):
+    assert LEFParser().parse_file(_compress(TEST_LEF, tmp_path, 'gzip')) == LEFParser().parse_file(TEST_LEF)
+
+
+def test_stream_index_matches_the_index_of_the_whole_file(synthetic_def):
+    indexer = make_parser(synthetic_def).section_indexer
+    mm = open_mmap(synthetic_def)
+    try:
+        expected = indexer.index(mm)
+        content = mm[:]
+    finally:
+        mm.close()
+    for chunk_size in (1, 7, 100, 4096):
+        stream = indexer.stream()
+        found = []
+        for start in range(0, len(content), chunk_size):
+            found += stream.feed(content[:start + chunk_size])
+        found += stream.feed(content, final=True)
+        assert stream.sections == expected
+        assert found == sorted((span for spans in expected.values() for span in spans), key=lambda span: span.start)
+
+
+@pytest.fixture
+def decompressions(monkeypatch):
+    # Count the decompressions of the whole file, streamed or not
+    calls = []
+    iter_decompressed = compression.iter_decompressed
+
+    def counting(*args, **kwargs):
+        calls.append(args[0])
+        return iter_decompressed(*args, **kwargs)
+    monkeypatch.setattr(compression, 'iter_decompressed', counting)
+    monkeypatch.setattr(def_parser, 'iter_decompressed', counting)
+    return calls
+
+
+def test_compressed_def_is_decompressed_once_per_parser(synthetic_def, tmp_path, decompressions):
+    compressed = _compress(synthetic_def, tmp_path, 'gzip')
+    parser = make_parser(compressed)
+    result = parser.parse()
+    table = parser.parse_component_table()
+    parser.parse_net_csr(table)
+    parser.parse_design_db()
+    parser.parse_hierarchy()
+    parser.parse_floorplan()
+    parser.parse_io_pins()
+    assert len(list(parser.iter_nets())) == len(result['nets'])
+    parser.writer().write(str(tmp_path / 'out.def'))
+    with open(synthetic_def, 'rb') as plain, open(tmp_path / 'out.def', 'rb') as out:
+        assert out.read() == plain.read()
+    # The entries read their lines from the buffer of the parser
+    assert [list(net['raw_lines']) for net in result['nets'][:5]]
+    assert decompressions == [compressed]
+    parser.close()
+    parser.parse_floorplan()
+    assert len(decompressions) == 2
+
+
+def test_parsing_keeps_pace_with_decompression(synthetic_def, tmp_path, monkeypatch):
+    monkeypatch.setattr(compression, 'READ_CHUNK_SIZE', 4096)
+    compressed = _compress(synthetic_def, tmp_path, 'gzip')
+    parser = make_parser(compressed)
+    sizes = []
+    parse_span = parser._parse_span
+
+    def recording(mm, span, *args, **kwargs):
+        sizes.append(len(mm))
+        return parse_span(mm, span, *args, **kwargs)
+    monkeypatch.setattr(parser, '_parse_span', recording)
+    parser.parse()
+    # The first sections are parsed while most of the file is still compressed
+    assert sizes[0] < os.path.getsize(synthetic_def) // 4
+    # The progress counts decompressed bytes, against the size recorded in the gzip trailer
+    assert parser.progress.total == os.path.getsize(synthetic_def)
+    assert parser.progress.done_bytes == os.path.getsize(synthetic_def)
+    # and every section its own decompressed byte range
+    nets = next(stats for stats in parser.progress.section_stats if stats.name == 'NETS')
+    assert nets.n_bytes == sum(span.end - span.start for span in parser.section_index['NETS'])
+
+
+def test_decompressed_size(synthetic_def, tmp_path):
+    assert compression.decompressed_size(_compress(synthetic_def, tmp_path, 'gzip'), 'gzip') == os.path.getsize(synthetic_def)
+    assert compression.decompressed_size(_compress(synthetic_def, tmp_path, 'bz2'), 'bz2') is None
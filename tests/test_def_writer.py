@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from src._def.component_table import ComponentTable, STATUS_CODE
+from src._def.def_writer import DefWriterError, format_components, format_nets, patch_component_entry
+
+from conftest import make_parser
+
+
+def _columns(table):
+    return (table.instance_names(), [table.cell_name(i) for i in range(len(table))],
+            table.x.tolist(), table.y.tolist(), table.orient.tolist(), table.status.tolist())
+
+
+def _connections(csr):
+    return [(csr.net_name(i), csr.inst_ids[csr.indptr[i]:csr.indptr[i + 1]].tolist(),
+             [csr.pin_names[pin_id] for pin_id in csr.pin_ids[csr.indptr[i]:csr.indptr[i + 1]].tolist()])
+            for i in range(len(csr))]
+
+
+def test_no_replacement_is_byte_identical(test_def, synthetic_def, tmp_path):
+    for path in (test_def, synthetic_def):
+        out = tmp_path / 'out.def'
+        make_parser(path).writer().write(str(out))
+        with open(path, 'rb') as f:
+            assert out.read_bytes() == f.read()
+
+
+def test_unedited_table_is_byte_identical(synthetic_def, tmp_path):
+    parser = make_parser(synthetic_def)
+    writer = parser.writer()
+    writer.update_components(parser.parse_component_table())
+    out = tmp_path / 'out.def'
+    writer.write(str(out))
+    with open(synthetic_def, 'rb') as f:
+        assert out.read_bytes() == f.read()
+
+
+def test_update_components_patches_only_the_edited_entries(synthetic_def, tmp_path):
+    parser = make_parser(synthetic_def)
+    table = parser.parse_component_table()
+    placed = np.flatnonzero(table.status == STATUS_CODE['PLACED'])
+    unplaced = np.flatnonzero(~table.is_placed())
+    moved, fixed, placed_now = int(placed[0]), int(placed[1]), int(unplaced[0])
+    table.x[moved] += 1000
+    table.status[fixed] = STATUS_CODE['FIXED']
+    table.status[placed_now] = STATUS_CODE['PLACED']
+    table.x[placed_now], table.y[placed_now], table.orient[placed_now] = 40, 60, 1
+
+    for changed in (None, [moved, fixed, placed_now]):
+        writer = parser.writer()
+        writer.update_components(table, changed=changed)
+        out = tmp_path / 'out.def'
+        writer.write(str(out))
+        written = make_parser(str(out))
+        assert _columns(written.parse_component_table()) == _columns(table)
+        # Everything but the three entries is as in the source
+        original, rewritten = parser.parse()['components'], written.parse()['components']
+        differ = [i for i, (a, b) in enumerate(zip(original, rewritten)) if list(a['raw_lines']) != list(b['raw_lines'])]
+        assert differ == sorted((moved, fixed, placed_now))
+        assert rewritten[moved]['features'].get('SOURCE') == original[moved]['features'].get('SOURCE')
+
+
+def test_row_count_mismatch_is_an_error(synthetic_def, tmp_path):
+    parser = make_parser(synthetic_def)
+    table = parser.parse_component_table()
+    writer = parser.writer()
+    # One instance less than there are entries
+    writer.update_components(ComponentTable(table.name_offsets[:-1], table.name_buffer, table.cell_ids[:-1],
+                                         table.cell_names, table.x[:-1], table.y[:-1], table.orient[:-1],
+                                         table.status[:-1]))
+    with pytest.raises(DefWriterError, match='format_components'):
+        writer.write(str(tmp_path / 'out.def'))
+
+
+def test_patch_component_entry():
+    entry = b'- u1 INV_X1 + SOURCE NETLIST + PLACED ( 10 20 ) N ;\n'
+    assert patch_component_entry(entry, STATUS_CODE['PLACED'], 10, 20, 0) is None
+    assert patch_component_entry(entry, STATUS_CODE['FIXED'], 30, 40, 1) == \
+        b'- u1 INV_X1 + SOURCE NETLIST + FIXED ( 30 40 ) S ;\n'
+    assert patch_component_entry(entry, STATUS_CODE['UNPLACED'], 0, 0, -1) == \
+        b'- u1 INV_X1 + SOURCE NETLIST + UNPLACED ;\n'
+    assert patch_component_entry(b'- u2 BUF_X2 ;\n', STATUS_CODE['UNPLACED'], 0, 0, -1) is None
+    assert patch_component_entry(b'- u2 BUF_X2 ;\n', STATUS_CODE['PLACED'], 5, 6, 4) == \
+        b'- u2 BUF_X2 + PLACED ( 5 6 ) FN ;\n'
+
+
+def test_regenerated_sections_round_trip(synthetic_def, tmp_path):
+    parser = make_parser(synthetic_def)
+    table = parser.parse_component_table()
+    csr = parser.parse_net_csr(table)
+    writer = parser.writer()
+    writer.replace_section('COMPONENTS', format_components(table))
+    writer.replace_section('NETS', format_nets(csr, table))
+    out = tmp_path / 'out.def'
+    writer.write(str(out))
+
+    written = make_parser(str(out))
+    written_table = written.parse_component_table()
+    assert _columns(written_table) == _columns(table)
+    assert _connections(written.parse_net_csr(written_table)) == _connections(csr)
+    # Sections that were not replaced are copied as they are
+    pins, written_pins = parser.parse_io_pins(), written.parse_io_pins()
+    assert [written_pins.pin_name(i) for i in range(len(written_pins))] == [pins.pin_name(i) for i in range(len(pins))]
+    assert written_pins.x.tolist() == pins.x.tolist()
+
+
+def test_missing_section_is_an_error(tmp_path):
+    path = tmp_path / 'no_nets.def'
+    path.write_text('VERSION 5.8 ;\nDESIGN d ;\nEND DESIGN\n')
+    writer = make_parser(str(path)).writer()
+    writer.replace_section('NETS', [b'NETS 0 ;\nEND NETS\n'])
+    with pytest.raises(DefWriterError, match='NETS'):
+        writer.write(str(tmp_path / 'out.def'))
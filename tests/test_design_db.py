@@ -0,0 +1,97 @@
+import numpy as np
+
+import def_parser
+from src._def.design_db import DesignDB
+from src._def.net_csr import IO_PIN
+from src.design_store import open_design, save_def_output
+
+from conftest import make_parser
+
+COMPONENTS = [
+    {'instance_name': 'u1', 'cell_name': 'INV_X1'},
+    {'instance_name': 'u2', 'cell_name': 'NAND2_X1'},
+    {'instance_name': 'u3', 'cell_name': 'INV_X1'},
+]
+NETS = [
+    {'net_name': 'n0', 'connections': [{'instance_name': 'u1', 'pin_name': 'Z'},
+                                       {'instance_name': 'u2', 'pin_name': 'A'},
+                                       {'instance_name': 'PIN', 'pin_name': 'in0'}]},
+    {'net_name': 'n1', 'connections': [{'instance_name': 'u2', 'pin_name': 'Z'},
+                                       {'instance_name': 'ghost', 'pin_name': 'A'}]},
+    {'net_name': 'n2', 'connections': [{'instance_name': 'u1', 'pin_name': 'A'},
+                                       {'instance_name': 'u2', 'pin_name': 'B'}]},
+]
+
+
+def _brute_pins(db, inst_id):
+    # (net id, pin name) of every connection of an instance, in net order
+    return [(net_id, pin) for net_id in range(db.n_nets)
+            for (name, pin), inst in zip(db.connections(net_id), db.net_pins(net_id)[0].tolist()) if inst == inst_id]
+
+
+def _assert_indexes_match_a_scan(db):
+    for inst_id in range(db.n_instances):
+        net_ids, pin_ids = db.instance_pins(inst_id)
+        assert list(zip(net_ids.tolist(), [db.pins[pin] for pin in pin_ids.tolist()])) == _brute_pins(db, inst_id)
+        assert db.nets_of_instance(inst_id).tolist() == sorted({net for net, _ in _brute_pins(db, inst_id)})
+    for cell_id, cell in enumerate(db.cells):
+        assert db.instances_of_cell(cell).tolist() == \
+            [i for i in range(db.n_instances) if db.instance_cells[i] == cell_id]
+
+
+def test_records_indexes():
+    db = DesignDB.from_records(COMPONENTS, NETS)
+    assert (db.n_components, db.n_instances, db.n_nets) == (3, 4, 3)
+    # ghost is only in NETS: an id after the components, no cell
+    ghost = db.instance_id('ghost')
+    assert ghost == 3 and not db.is_component(ghost) and db.cell_name(ghost) is None
+    assert db.cell_name(db.instance_id('u3')) == 'INV_X1'
+    assert db.instances_of_cell('INV_X1').tolist() == [0, 2]
+    assert db.instances_of_cell('DFF_X1').tolist() == []
+    assert db.connections(db.net_id('n0')) == [('u1', 'Z'), ('u2', 'A'), ('PIN', 'in0')]
+    assert db.net_pins(0)[0].tolist() == [0, 1, IO_PIN]
+    assert db.nets_of_instance(db.instance_id('u2')).tolist() == [0, 1, 2]
+    assert db.nets_of_instance(db.instance_id('u3')).tolist() == []
+    assert db.unknown_connections().tolist() == [4]
+    assert db.instance_id('missing') == -1 and db.net_id('missing') == -1
+    _assert_indexes_match_a_scan(db)
+
+
+def test_compact_keeps_the_lookups():
+    db = DesignDB.from_records(COMPONENTS, NETS)
+    before = [db.instance_id(name) for name in ('u1', 'u3', 'ghost', 'nope')], db.net_id('n2')
+    db.compact()
+    assert all(table.index is None for table in (db.instances, db.cells, db.nets, db.pins))
+    assert ([db.instance_id(name) for name in ('u1', 'u3', 'ghost', 'nope')], db.net_id('n2')) == before
+    assert db.instance_ids(['u2', 'ghost']).tolist() == [1, 3]
+
+
+def test_parsed_design_indexes(test_def, synthetic_def):
+    for path in (test_def, synthetic_def):
+        parser = make_parser(path)
+        table = parser.parse_component_table()
+        csr = parser.parse_net_csr(table)
+        db = parser.parse_design_db()
+        assert db.n_components == len(table) and db.n_nets == len(csr)
+        assert [db.cell_name(i) for i in range(len(table))] == [table.cell_name(i) for i in range(len(table))]
+        for net_id in range(len(csr)):
+            inst_ids, _ = csr.connections(net_id)
+            assert np.array_equal(db.net_pins(net_id)[0], inst_ids)
+        _assert_indexes_match_a_scan(db)
+
+
+def test_def_output_and_store_give_the_same_db(synthetic_def, tmp_path):
+    def_output = def_parser.build_def_output(make_parser(synthetic_def).parse(), show_progress=False)
+    path = tmp_path / 'def_outputs.design'
+    save_def_output(path, def_output)
+    from_dicts = DesignDB.from_def_output(def_output)
+    from_store = DesignDB.from_def_output(open_design(path))
+    for db in (from_dicts, from_store):
+        assert db.instances.names()[:db.n_components] == list(def_output['instance2id'])
+        for net_name, net_id in def_output['net2id'].items():
+            assert db.net_id(net_name) == net_id
+            expected = [(conn['instance_name'], conn['pin_name']) for conn in def_output['id2NetInfo'][net_id]['connections']]
+            assert db.connections(net_id) == expected
+    assert from_store.net_ids.tolist() == from_dicts.net_ids.tolist()
+    for column in ('instance_cells', 'net_indptr', 'cell_indptr', 'cell_instances', 'instance_indptr', 'instance_conns'):
+        assert np.array_equal(getattr(from_store, column), getattr(from_dicts, column)), column
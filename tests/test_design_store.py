@@ -0,0 +1,99 @@
+import pickle
+
+import pytest
+
+import def_parser
+from src.design_store import DesignStoreError, STORE_MAGIC, is_design_store, open_design, save_def_output
+
+from conftest import make_parser
+
+
+@pytest.fixture
+def def_output(test_def):
+    return def_parser.build_def_output(make_parser(test_def).parse(), show_progress=False)
+
+
+def _as_dicts(design):
+    return {
+        'instance2id': dict(design['instance2id'].items()),
+        'id2instanceInfo': {i: design['id2instanceInfo'][i] for i in design['id2instanceInfo']},
+        'net2id': dict(design['net2id'].items()),
+        'id2NetInfo': {i: design['id2NetInfo'][i] for i in design['id2NetInfo']},
+    }
+
+
+def test_round_trip_gives_back_the_def_outputs(def_output, tmp_path):
+    path = tmp_path / 'def_outputs.design'
+    save_def_output(path, def_output)
+    assert is_design_store(path)
+    design = open_design(path, verify=True)
+    restored = _as_dicts(design)
+    # A net name repeated in NETS (SCAN) is in net2id once, with its last id
+    assert restored['id2instanceInfo'] == def_output['id2instanceInfo']
+    assert restored['id2NetInfo'] == def_output['id2NetInfo']
+    assert restored['instance2id'] == def_output['instance2id']
+    assert restored['net2id'] == def_output['net2id']
+    assert set(design) == {'instance2id', 'id2instanceInfo', 'net2id', 'id2NetInfo'}
+
+
+def test_columns_are_loaded_lazily(def_output, tmp_path):
+    path = tmp_path / 'def_outputs.design'
+    save_def_output(path, def_output)
+    design = open_design(path)
+    assert design._columns == {}
+    design['id2instanceInfo'][0]
+    assert 'x' in design._columns and 'conn_indptr' not in design._columns
+
+
+def test_string_coordinates_are_stored_as_ints(def_output, tmp_path):
+    info = def_output['id2instanceInfo'][0]
+    x, y, orient = info['placementInfo']
+    info['placementInfo'] = (str(x), str(y), orient)
+    save_def_output(tmp_path / 'd.design', def_output)
+    assert open_design(tmp_path / 'd.design')['id2instanceInfo'][0]['placementInfo'] == (x, y, orient)
+
+
+def test_non_integer_coordinates_are_rejected(def_output, tmp_path):
+    def_output['id2instanceInfo'][3]['placementInfo'] = ('1.5', '2', 'N')
+    name = def_output['id2instanceInfo'][3]['instance_name']
+    with pytest.raises(ValueError, match=f"Instance {name}: placement coordinates"):
+        save_def_output(tmp_path / 'd.design', def_output)
+
+
+def test_corrupted_or_foreign_files_are_rejected(def_output, tmp_path):
+    path = tmp_path / 'd.design'
+    save_def_output(path, def_output)
+    data = bytearray(path.read_bytes())
+
+    header = bytearray(data)
+    header[30] ^= 0xff
+    (tmp_path / 'header.design').write_bytes(header)
+    with pytest.raises(DesignStoreError, match='header checksum'):
+        open_design(tmp_path / 'header.design')
+
+    version = bytearray(data)
+    version[len(STORE_MAGIC)] += 1
+    (tmp_path / 'version.design').write_bytes(version)
+    with pytest.raises(DesignStoreError, match='store version'):
+        open_design(tmp_path / 'version.design')
+
+    column = bytearray(data)
+    column[-1] ^= 0xff
+    (tmp_path / 'column.design').write_bytes(column)
+    open_design(tmp_path / 'column.design')
+    with pytest.raises(DesignStoreError, match='checksum mismatch in column'):
+        open_design(tmp_path / 'column.design', verify=True)
+
+    (tmp_path / 'd.pkl').write_bytes(pickle.dumps(def_output))
+    assert not is_design_store(tmp_path / 'd.pkl')
+    with pytest.raises(DesignStoreError, match='not a design store'):
+        open_design(tmp_path / 'd.pkl')
+
+
+def test_bulk_records_match_the_views(def_output, tmp_path):
+    # The bundled DEF has a net name repeated in NETS and connections to instances not in COMPONENTS
+    path = tmp_path / 'd.design'
+    save_def_output(path, def_output)
+    design = open_design(path)
+    assert design.instance_records() == [design['id2instanceInfo'][i] for i in design['id2instanceInfo']]
+    assert design.net_records() == [design['id2NetInfo'][i] for i in design['id2NetInfo']]
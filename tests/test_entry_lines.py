@@ -0,0 +1,84 @@
+import gzip
+import os
+import pickle
+
+import pytest
+
+from src.parser import entry_lines
+from src.parser.entry_lines import EntryLines, release_source
+
+from conftest import make_parser
+
+
+@pytest.fixture
+def counted_opens(monkeypatch):
+    # Number of times a source is opened (mmap / decompression) by the entries
+    opens = []
+    open_buffer = entry_lines.open_buffer
+
+    def counting(path):
+        opens.append(path)
+        return open_buffer(path)
+    monkeypatch.setattr(entry_lines, 'open_buffer', counting)
+    release_source()
+    yield opens
+    release_source()
+
+
+@pytest.fixture
+def gzipped_def(synthetic_def, tmp_path):
+    path = tmp_path / 'synthetic.def.gz'
+    with open(synthetic_def, 'rb') as src, gzip.open(path, 'wb') as dst:
+        dst.write(src.read())
+    return str(path)
+
+
+def test_entry_is_read_and_decoded_once(synthetic_def, monkeypatch):
+    nets = make_parser(synthetic_def).parse()['nets']
+    raw_lines = nets[1]['raw_lines']
+    reads = []
+    read_range = entry_lines.read_range
+    monkeypatch.setattr(entry_lines, 'read_range', lambda *args: reads.append(args) or read_range(*args))
+    assert len(raw_lines) == 4
+    assert raw_lines[0].startswith('- n1 ')
+    assert list(raw_lines)[-1] == '+ USE SIGNAL ;'
+    assert len(reads) == 1
+
+
+@pytest.mark.parametrize('fixture', ['synthetic_def', 'gzipped_def'])
+def test_entries_share_one_opened_source(request, counted_opens, fixture):
+    path = request.getfixturevalue(fixture)
+    parser = make_parser(path)
+    nets = parser.parse()['nets']
+    # Without the buffer of the parser, the entries open the file once for all of them
+    parser.close()
+    lines = [list(net['raw_lines']) for net in nets]
+    assert len(counted_opens) == 1
+    assert lines[0][0].startswith('- n0 ') and all(lines)
+
+
+def test_shared_parser_buffer_is_not_opened_again(gzipped_def, counted_opens):
+    parser = make_parser(gzipped_def)
+    nets = parser.parse()['nets']
+    assert [list(net['raw_lines']) for net in nets[:10]]
+    assert counted_opens == []
+
+
+def test_changed_file_is_opened_again(tmp_path, counted_opens):
+    path = tmp_path / 'entry.txt'
+    path.write_bytes(b'- a ( u1 A )\n  + USE SIGNAL ;\n')
+    assert list(EntryLines(str(path), 0, 30)) == ['- a ( u1 A )', '+ USE SIGNAL ;']
+    assert list(EntryLines(str(path), 0, 12)) == ['- a ( u1 A )']
+    path.write_bytes(b'- bb ( u2 Z ) ;\n')
+    os.utime(path, ns=(0, 0))
+    assert list(EntryLines(str(path), 0, 15)) == ['- bb ( u2 Z ) ;']
+    assert len(counted_opens) == 2
+
+
+def test_pickle_keeps_the_range_only(synthetic_def):
+    raw_lines = make_parser(synthetic_def).parse()['nets'][0]['raw_lines']
+    lines = list(raw_lines)
+    restored = pickle.loads(pickle.dumps(raw_lines))
+    assert restored == raw_lines and restored.span == raw_lines.span
+    assert restored.__getstate__() == (raw_lines.source, raw_lines.start, raw_lines.end)
+    assert list(restored) == lines
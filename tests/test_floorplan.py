@@ -0,0 +1,80 @@
+import numpy as np
+
+from src._def.component_table import ORIENT_CODE
+from src._def.floorplan import FloorplanBuilder
+
+from conftest import make_parser
+
+
+def _floorplan(*statements):
+    builder = FloorplanBuilder()
+    for statement in statements:
+        builder.add_statement(statement)
+    return builder.build()
+
+
+def test_parsed_floorplan(synthetic_def):
+    floorplan = make_parser(synthetic_def).parse_floorplan()
+    assert floorplan.die_bbox() == (0, 0, 200000, 100000)
+    assert floorplan.die.tolist() == [[0, 0], [0, 100000], [200000, 100000], [200000, 0]]
+    assert floorplan.row_names() == ['ROW_0', 'ROW_1'] and floorplan.site_names == ['CORE']
+    assert floorplan.row_y.tolist() == [0, 2000]
+    assert floorplan.row_orient.tolist() == [ORIENT_CODE['N'], ORIENT_CODE['FS']]
+    assert floorplan.row_num_x.tolist() == [200, 200] and floorplan.row_step_x.tolist() == [1000, 1000]
+    assert floorplan.layer_names == ['M1'] and floorplan.track_count.tolist() == [2000, 1000]
+    assert floorplan.gcell_lines('X').tolist() == list(range(0, 200001, 10000))
+
+
+def test_snap_to_sites_rounds_to_the_nearest_site_ties_down():
+    floorplan = _floorplan('ROW r0 CORE 100 0 N DO 10 BY 1 STEP 10 0 ;',
+                           'ROW r1 CORE 100 50 FS DO 10 BY 1 STEP 10 0 ;')
+    x = np.array([104, 105, 106, 115, 125, 0, 1000])
+    y = np.array([24, 25, 26, 0, 49, 0, 80])
+    rows, sx, sy = floorplan.snap_to_sites(x, y)
+    assert rows.tolist() == [0, 0, 1, 0, 1, 0, 1]
+    # 105 is halfway between the sites at 100 and 110: the lower one; outside the row: its end site
+    assert sx.tolist() == [100, 100, 110, 110, 120, 100, 190]
+    assert sy.tolist() == [0, 0, 50, 0, 50, 0, 50]
+    # Negative offsets round the same way
+    floorplan = _floorplan('ROW r0 CORE -100 0 N DO 10 BY 1 STEP 10 0 ;')
+    assert floorplan.snap_to_sites([-95, -94, -96], [0, 0, 0])[1].tolist() == [-100, -90, -100]
+
+
+def test_nearest_row_picks_the_closest_span_at_the_nearest_y():
+    floorplan = _floorplan('ROW left CORE 0 0 N DO 10 BY 1 STEP 10 0 ;',
+                           'ROW right CORE 200 0 N DO 10 BY 1 STEP 10 0 ;',
+                           'ROW up CORE 0 100 N DO 10 BY 1 STEP 10 0 ;',
+                           'ROW column CORE 500 0 N DO 1 BY 10 STEP 0 10 ;')
+    rows = floorplan.nearest_row([50, 150, 145, 400, 20, 20], [0, 0, 0, 0, 60, 50])
+    # 145 is 55 from the end of left (90) and 55 from right (200): the lower x wins;
+    # y 50 is halfway between the rows at 0 and 100: the lower y wins; the vertical row is ignored
+    assert [floorplan.row_name(row) for row in rows.tolist()] == ['left', 'right', 'left', 'right', 'up', 'left']
+
+
+def test_without_rows_points_are_unchanged():
+    floorplan = _floorplan('DIEAREA ( 0 0 ) ( 10 10 ) ;')
+    rows, x, y = floorplan.snap_to_sites([3, 7], [4, 9])
+    assert rows.tolist() == [-1, -1] and x.tolist() == [3, 7] and y.tolist() == [4, 9]
+
+
+def test_snap_to_tracks():
+    floorplan = _floorplan('TRACKS X 50 DO 10 STEP 100 LAYER M1 M2 ;',
+                           'TRACKS X 75 DO 3 STEP 200 MASK 2 LAYER M2 ;',
+                           'TRACKS Y 0 DO 5 STEP 40 ;')
+    values = np.array([0, 99, 100, 101, 2000])
+    assert floorplan.snap_to_tracks(values, 'M1', 'X').tolist() == [50, 50, 50, 150, 950]
+    # M2 also has the tracks at 75, 275, 475: the closest of both statements
+    assert floorplan.snap_to_tracks([60, 62, 63, 300], 'M2', 'X').tolist() == [50, 50, 75, 275]
+    # TRACKS without LAYER apply to every layer
+    assert floorplan.snap_to_tracks([19, 20, 21, 500], 'M7', 'Y').tolist() == [0, 0, 40, 160]
+    # No track of the layer in that direction: unchanged
+    assert floorplan.snap_to_tracks([33], 'M3', 'X').tolist() == [33]
+    assert floorplan.track_coordinates('M2', 'X')[:4].tolist() == [50, 75, 150, 250]
+    assert floorplan.track_mask.tolist() == [0, 0, 2, 0]
+
+
+def test_gcell_of():
+    floorplan = _floorplan('GCELLGRID X 0 DO 3 STEP 100 ;', 'GCELLGRID Y 10 DO 2 STEP 50 ;')
+    column, row = floorplan.gcell_of([0, 99, 100, 199, 200, -1], [10, 59, 30, 60, 10, 10])
+    assert column.tolist() == [0, 0, 1, 1, -1, -1]
+    assert row.tolist() == [0, 0, 0, -1, 0, 0]
@@ -0,0 +1,88 @@
+import numpy as np
+
+from src._def.hierarchy import HierarchyTrie, divider_char
+
+from conftest import make_parser
+
+NAMES = ['top/u_core/u_alu/U1', 'top/u_io/p0', 'top/u_core/U7', 'top/u_core/u_alu/U2', 'spare',
+         'top/u_core-x/U3', 'top/u_core/u_alu\\/bus/U4', 'top/u_io/p1']
+
+
+def _brute_instances(names, scope):
+    return sorted(i for i, name in enumerate(names) if name.startswith(scope + '/'))
+
+
+def test_scopes_hold_every_instance_below_them():
+    trie = HierarchyTrie.build(NAMES)
+    for scope in ('top', 'top/u_core', 'top/u_core/u_alu', 'top/u_io', 'top/u_core-x'):
+        assert sorted(trie.instances(scope).tolist()) == _brute_instances(NAMES, scope)
+        assert trie.count(scope) == len(_brute_instances(NAMES, scope))
+    assert sorted(trie.instances('').tolist()) == list(range(len(NAMES)))
+    assert trie.count('top/nothing') == 0 and trie.instances('top/nothing').tolist() == []
+    # An escaped divider is part of the name, not a scope
+    assert trie.node('top/u_core/u_alu\\/bus') is not None
+    assert trie.count('top/u_core/u_alu\\/bus') == 1
+    assert trie.node('top/u_core/u_alu\\') is None
+
+
+def test_tree_shape():
+    trie = HierarchyTrie.build(NAMES)
+    top = trie.node('top')
+    assert trie.node_parent[top] == 0 and trie.node_depth[top] == 1
+    assert sorted(trie.path(node) for node in trie.children(top).tolist()) == \
+        ['top/u_core', 'top/u_core-x', 'top/u_io']
+    assert trie.path(trie.node('/top/u_core/u_alu/')) == 'top/u_core/u_alu'
+    assert ('top/u_io', 2, 2) in trie.stats()
+    assert all(depth <= 1 for _, depth, _ in trie.stats(max_depth=1))
+
+
+def test_scope_of_is_the_deepest_scope():
+    trie = HierarchyTrie.build(NAMES)
+    scopes = [trie.path(node) for node in trie.scope_of(np.arange(len(NAMES))).tolist()]
+    assert scopes == ['top/u_core/u_alu', 'top/u_io', 'top/u_core', 'top/u_core/u_alu', '',
+                      'top/u_core-x', 'top/u_core/u_alu\\/bus', 'top/u_io']
+
+
+def test_scope_of_matches_the_deepest_containing_node():
+    rng = np.random.default_rng(0)
+    names = ['/'.join(f"m{d}" for d in rng.integers(0, 3, size=rng.integers(1, 6))) + f"/U{i}" for i in range(500)]
+    trie = HierarchyTrie.build(names)
+    ids = rng.permutation(len(names))
+    expected = []
+    for rank in trie.rank[ids].tolist():
+        inside = np.flatnonzero((trie.node_start <= rank) & (rank < trie.node_end))
+        expected.append(int(inside[np.argmax(trie.node_depth[inside])]))
+    assert trie.scope_of(ids).tolist() == expected
+    assert trie.scope_of([]).tolist() == []
+
+
+def test_aggregate_matches_a_loop():
+    trie = HierarchyTrie.build(NAMES)
+    values = np.arange(1, len(NAMES) + 1, dtype=np.int64) * 10
+    totals = trie.aggregate(values)
+    maxima = trie.aggregate(values, np.maximum)
+    for node in range(len(trie)):
+        members = trie.instances(trie.path(node))
+        assert totals[node] == values[members].sum()
+        assert maxima[node] == values[members].max()
+    assert HierarchyTrie.build([]).aggregate(np.zeros(0)).tolist() == [0.0]
+
+
+def test_other_divider_and_header():
+    assert divider_char('DIVIDERCHAR "." ;') == '.'
+    assert divider_char(None) == '/'
+    trie = HierarchyTrie.build(['a.b.c', 'a.d', 'a/b'], divider='.')
+    assert sorted(trie.instances('a').tolist()) == [0, 1]
+    assert trie.count('a.b') == 1
+
+
+def test_parsed_design(synthetic_def):
+    parser = make_parser(synthetic_def)
+    table = parser.parse_component_table()
+    trie = parser.parse_hierarchy(table)
+    names = table.instance_names()
+    for module in range(5):
+        scope = f'top/u{module}'
+        assert sorted(trie.instances(scope).tolist()) == _brute_instances(names, scope)
+    assert trie.count('top') == len(table)
+    assert sorted(trie.order.tolist()) == list(range(len(table)))
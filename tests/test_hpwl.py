@@ -0,0 +1,109 @@
+import numpy as np
+
+from src._def.component_table import ComponentTableBuilder, ORIENTATIONS, ORIENT_CODE, STATUS_CODE
+from src._def.hpwl import HPWLEngine, pin_offsets_from_lef
+from src._def.net_csr import NetPinCSRBuilder
+from src.lef_parser import parse_lef_file
+
+from conftest import TEST_LEF, make_parser
+
+# Pin (2, 3) of a 10 x 20 cell in every orientation, from the DEF orientation rules
+EXPECTED_OFFSETS = {
+    'N': (2, 3), 'S': (8, 17), 'E': (3, 8), 'W': (17, 2),
+    'FN': (8, 3), 'FS': (2, 17), 'FE': (17, 8), 'FW': (3, 2),
+}
+
+
+def test_pin_positions_follow_the_orientation():
+    builder = ComponentTableBuilder()
+    for orient in ORIENTATIONS:
+        builder.add(f'u_{orient}', 'C', 1000, 2000, ORIENT_CODE[orient], STATUS_CODE['PLACED'])
+    table = builder.build()
+    csr_builder = NetPinCSRBuilder(table)
+    csr_builder.add('n', [(f'u_{orient}', 'A') for orient in ORIENTATIONS])
+    csr = csr_builder.build()
+    assert len(csr.pin_names) == 1
+
+    engine = HPWLEngine(csr, table, (np.array([2.0]), np.array([3.0])), (np.array([10.0]), np.array([20.0])))
+    x, y, valid = engine.pin_positions(np.arange(len(ORIENTATIONS)))
+    assert valid.all()
+    for orient, px, py in zip(ORIENTATIONS, x.tolist(), y.tolist()):
+        assert (px - 1000, py - 2000) == EXPECTED_OFFSETS[orient]
+    assert engine.total() == (17 - 2) + (17 - 2)
+
+
+def _brute_hpwl(parser, table, pins):
+    '''HPWL of every net from the parse() dicts: instance locations and IO pin centers'''
+    location = {table.instance_name(i): (int(table.x[i]), int(table.y[i]))
+                for i in np.flatnonzero(table.is_placed()).tolist()}
+    io_x, io_y = pins.center()
+    io_location = {pins.pin_name(i): (io_x[i], io_y[i]) for i in range(len(pins))}
+    hpwl = []
+    for net in parser.parse()['nets']:
+        points = [io_location.get(conn['pin_name']) if conn['ins_name'] == 'PIN' else location.get(conn['ins_name'])
+                  for conn in net['connections']]
+        points = [point for point in points if point is not None]
+        if len(points) < 2:
+            hpwl.append(0.0)
+            continue
+        xs, ys = zip(*points)
+        hpwl.append(float(max(xs) - min(xs) + max(ys) - min(ys)))
+    return hpwl
+
+
+def test_net_hpwl_matches_a_per_net_loop(synthetic_def):
+    parser = make_parser(synthetic_def)
+    table = parser.parse_component_table()
+    csr = parser.parse_net_csr(table)
+    pins = parser.parse_io_pins()
+    engine = HPWLEngine(csr, table, io_pins=pins)
+    assert np.allclose(engine.hpwl, _brute_hpwl(parser, table, pins))
+    assert np.isclose(engine.total(), sum(_brute_hpwl(parser, table, pins)))
+    # Without the IO pin table the "( PIN name )" connections do not count
+    assert (HPWLEngine(csr, table).hpwl <= engine.hpwl + 1e-9).all()
+
+
+def test_update_after_a_move_equals_a_full_evaluation(synthetic_def):
+    parser = make_parser(synthetic_def)
+    table = parser.parse_component_table()
+    csr = parser.parse_net_csr(table)
+    engine = HPWLEngine(csr, table)
+    moved = np.flatnonzero(table.is_placed())[:5]
+    nets = engine.nets_of_instances(moved)
+    expected_nets = sorted({i for i in range(len(csr)) if np.isin(csr.connections(i)[0], moved).any()})
+    assert nets.tolist() == expected_nets
+
+    table.x[moved] += 5000
+    table.y[moved] -= 700
+    total = engine.update(nets)
+    fresh = HPWLEngine(csr, table)
+    assert np.allclose(engine.hpwl, fresh.hpwl)
+    assert np.isclose(total, fresh.total())
+
+
+def test_unplaced_and_unknown_instances_are_left_out():
+    builder = ComponentTableBuilder()
+    builder.add('a', 'C', 0, 0, ORIENT_CODE['N'], STATUS_CODE['PLACED'])
+    builder.add('b', 'C', 100, 100, ORIENT_CODE['N'], STATUS_CODE['FIXED'])
+    builder.add('c', 'C', 9000, 9000, status=STATUS_CODE['UNPLACED'])
+    table = builder.build()
+    csr_builder = NetPinCSRBuilder(table)
+    csr_builder.add('n0', [('a', 'A'), ('b', 'A'), ('c', 'A'), ('missing', 'A')])
+    csr_builder.add('n1', [('a', 'A'), ('c', 'A')])
+    csr_builder.add('n2', [])
+    engine = HPWLEngine(csr_builder.build(), table)
+    assert engine.hpwl.tolist() == [200.0, 0.0, 0.0]
+
+
+def test_pin_offsets_from_lef():
+    builder = ComponentTableBuilder()
+    builder.add('u0', 'INV', 0, 0, ORIENT_CODE['N'], STATUS_CODE['PLACED'])
+    builder.add('u1', 'NOT_IN_LEF', 0, 0, ORIENT_CODE['N'], STATUS_CODE['PLACED'])
+    table = builder.build()
+    csr_builder = NetPinCSRBuilder(table)
+    csr_builder.add('n', [('u0', 'Z'), ('u0', 'NOPIN'), ('u1', 'Z')])
+    csr = csr_builder.build()
+    dx, dy = pin_offsets_from_lef(parse_lef_file(TEST_LEF), csr, table.cell_names, 1000)
+    # Z: PATH 30.8 9 42 9; a pin missing from the macro sits at the center of the 67.2 x 24 cell
+    assert np.allclose(dx, [36400, 33600, 0])
+    assert np.allclose(dy, [9000, 12000, 0])
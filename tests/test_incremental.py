@@ -0,0 +1,156 @@
+import re
+
+import numpy as np
+import pytest
+
+from src._def.def_writer import DefWriterError
+from src._def.design_db import DesignDB
+from src._def.incremental import load_state, save_state, update_section
+from src._def.transformer.specific import component_block_transformer
+from src.parser.section_indexer import open_mmap
+
+from conftest import make_parser, synthetic_def_text
+
+_PLACED = re.compile(r'(- (\S+) \S+\n  \+ SOURCE NETLIST\n  \+ PLACED \( )(\d+) (\d+)')
+
+
+def _move_first_placed(text, dx):
+    '''text with the first PLACED instance moved by dx, and the name of that instance'''
+    match = _PLACED.search(text)
+    moved = f'{match.group(1)}{int(match.group(3)) + dx} {match.group(4)}'
+    return text[:match.start()] + moved + text[match.end():], match.group(2)
+
+
+def _columns(table):
+    return (table.instance_names(), [table.cell_name(i) for i in range(len(table))],
+            table.x.tolist(), table.y.tolist(), table.orient.tolist(), table.status.tolist())
+
+
+def test_unchanged_file_reuses_every_entry(synthetic_def):
+    parser = make_parser(synthetic_def)
+    result, state = parser.parse_incremental()
+    again, state_again = parser.parse_incremental(state)
+    assert again == result == {key: value for key, value in parser.parse().items() if key in result}
+    assert state_again['COMPONENTS'] is state['COMPONENTS']
+
+
+def _update_components(parser, previous):
+    mm = open_mmap(parser.def_file_path)
+    try:
+        spans = parser.section_indexer.index(mm)['COMPONENTS']
+        _, snapshot, stats = update_section(mm, spans, 'COMPONENTS', component_block_transformer, previous,
+                                            source=parser.def_file_path)
+    finally:
+        mm.close()
+    return snapshot, stats
+
+
+def test_edited_entry_is_the_only_one_reparsed(tmp_path):
+    path = tmp_path / 'eco.def'
+    text = synthetic_def_text()
+    path.write_text(text)
+    _, state = make_parser(str(path)).parse_incremental()
+
+    edited, _ = _move_first_placed(text, 10)
+    path.write_text(edited)
+    parser = make_parser(str(path))
+    _, stats = _update_components(parser, state['COMPONENTS'])
+    assert (stats.total, stats.reparsed, stats.reused) == (300, 1, 299)
+    result, state = parser.parse_incremental(state)
+    full = parser.parse()
+    assert result['components'] == full['components']
+    assert result['nets'] == full['nets']
+
+
+def test_inserted_entry_and_saved_state(tmp_path):
+    path = tmp_path / 'eco.def'
+    text = synthetic_def_text()
+    path.write_text(text)
+    _, state = make_parser(str(path)).parse_incremental()
+    save_state(str(tmp_path / 'state.pkl'), state)
+
+    inserted = text.replace('COMPONENTS 300 ;\n', 'COMPONENTS 301 ;\n- top/new INV_X1 + PLACED ( 10 20 ) N ;\n')
+    path.write_text(inserted)
+    parser = make_parser(str(path))
+    result, _ = parser.parse_incremental(load_state(str(tmp_path / 'state.pkl')))
+    assert result['components'] == parser.parse()['components']
+    assert result['components'][0]['ins_name'] == 'top/new'
+
+
+def test_component_table_is_patched_in_place(tmp_path):
+    path = tmp_path / 'eco.def'
+    text = synthetic_def_text()
+    path.write_text(text)
+    table, state, changed = make_parser(str(path)).parse_component_table_incremental()
+    assert len(changed) == len(table) == 300
+
+    edited, name = _move_first_placed(text.replace('DFF_X1', 'DFF_X2', 1), 10)
+    path.write_text(edited)
+    parser = make_parser(str(path))
+    patched, state, changed = parser.parse_component_table_incremental(state)
+    assert patched is table
+    assert {table.instance_name(i) for i in changed.tolist()} >= {name}
+    assert len(changed) <= 2
+    assert _columns(patched) == _columns(parser.parse_component_table())
+
+    again, _, changed = parser.parse_component_table_incremental(state)
+    assert again is table and len(changed) == 0
+
+
+def test_component_table_is_rebuilt_when_instances_change(tmp_path):
+    path = tmp_path / 'eco.def'
+    text = synthetic_def_text()
+    path.write_text(text)
+    table, state, _ = make_parser(str(path)).parse_component_table_incremental()
+
+    path.write_text(text.replace('COMPONENTS 300 ;\n', 'COMPONENTS 301 ;\n- top/new INV_X1 + PLACED ( 10 20 ) N ;\n'))
+    parser = make_parser(str(path))
+    rebuilt, _, changed = parser.parse_component_table_incremental(state)
+    assert rebuilt is not table
+    assert changed.tolist() == [0]
+    assert _columns(rebuilt) == _columns(parser.parse_component_table())
+
+
+def test_writer_emits_an_eco_of_the_incremental_table(tmp_path):
+    path = tmp_path / 'eco.def'
+    path.write_text(synthetic_def_text())
+    parser = make_parser(str(path))
+    table, _, _ = parser.parse_component_table_incremental()
+    row = int(np.flatnonzero(table.is_placed())[0])
+    table.x[row] += 500
+
+    writer = parser.writer()
+    writer.update_components(table, changed=[row])
+    out = tmp_path / 'out.def'
+    writer.write(str(out))
+    written = make_parser(str(out)).parse_component_table()
+    assert _columns(written) == _columns(table)
+
+
+def test_writer_rejects_what_is_not_a_component_table(synthetic_def):
+    parser = make_parser(synthetic_def)
+    writer = parser.writer()
+    with pytest.raises(DefWriterError, match='ComponentTable'):
+        writer.update_components(parser.parse()['components'])
+
+
+def test_design_db_cell_index_follows_the_patched_table(tmp_path):
+    path = tmp_path / 'eco.def'
+    text = synthetic_def_text()
+    path.write_text(text)
+    parser = make_parser(str(path))
+    table, state, _ = parser.parse_component_table_incremental()
+    db = DesignDB.from_tables(table, parser.parse_net_csr(table))
+    old_cell = table.cell_name(0)
+    new_cell = 'NEW_CELL_X1'
+
+    first = text.index('- top/u0/g0 ')
+    path.write_text(text[:first] + text[first:].replace(old_cell, new_cell, 1))
+    patched, _, changed = make_parser(str(path)).parse_component_table_incremental(state)
+    assert patched is table and changed.tolist() == [0]
+    assert db.cell_name(0) == new_cell
+    db.refresh_cells()
+    assert 0 not in db.instances_of_cell(old_cell).tolist()
+    assert db.instances_of_cell(new_cell).tolist() == [0]
+    assert db.instances_of_cell(old_cell).tolist() == \
+        [i for i in range(len(table)) if table.cell_name(i) == old_cell]
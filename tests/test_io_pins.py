@@ -0,0 +1,69 @@
+import numpy as np
+
+from src._def.component_table import ORIENT_CODE, STATUS_CODE
+from src._def.design_db import DesignDB
+from src._def.io_pins import DIRECTION_CODE, IOPinTableBuilder
+
+from conftest import make_parser
+
+
+def test_synthetic_pins(synthetic_def):
+    pins = make_parser(synthetic_def).parse_io_pins()
+    assert pins.pin_names() == [f'p{p}' for p in range(6)]
+    assert [pins.net_name(i) for i in range(len(pins))] == [f'n{p}' for p in range(6)]
+    row = pins.row(2)
+    assert row['layer'] == 'M1' and row['shape'] == (-10, -10, 10, 10)
+    assert row['placementInfo'] == (2000, 0, 'N', 'PLACED')
+    assert row['direction'] in ('INPUT', 'OUTPUT') and row['use'] == 'SIGNAL'
+    x, y = pins.center()
+    assert x.tolist() == [p * 1000 for p in range(6)] and y.tolist() == [0] * 6
+
+
+def test_net_ids_are_the_net_csr_and_design_db_ids(test_def, synthetic_def):
+    for path in (test_def, synthetic_def):
+        for kwargs in ({}, {'engine': 'bytes'}, {'workers': 2}):
+            parser = make_parser(path, **kwargs)
+            table = parser.parse_component_table()
+            csr = parser.parse_net_csr(table)
+            db = DesignDB.from_tables(table, csr)
+            pins = parser.parse_io_pins(csr)
+            assert pins.net_names is csr.names.nets
+            for i in range(len(pins)):
+                net_id = int(pins.net_ids[i])
+                if net_id < len(csr):
+                    assert csr.net_name(net_id) == db.nets[net_id] == pins.net_name(i)
+                else:
+                    # Not a NETS net: numbered after them, still named
+                    assert pins.net_name(i) not in csr.net_names()
+            # Without the shared names the ids are found by name: the same ids
+            assert pins.net_ids_in(csr).tolist() == make_parser(path).parse_io_pins().net_ids_in(csr).tolist()
+
+
+def test_nets_outside_nets_are_numbered_after_them(test_def):
+    parser = make_parser(test_def)
+    table = parser.parse_component_table()
+    csr = parser.parse_net_csr(table)
+    pins = parser.parse_io_pins(csr)
+    extra = pins.net_ids >= len(csr)
+    assert extra.any()
+    assert sorted(set(pins.net_ids[extra].tolist())) == list(range(len(csr), len(csr) + len(pins.extra_net_names)))
+    assert (pins.net_ids_in(csr)[extra] == -1).all()
+    # The shared table is only looked up, never extended
+    assert len(csr.names.nets) == len(csr)
+
+
+def test_builder_without_names_interns_its_own_nets():
+    builder = IOPinTableBuilder()
+    builder.add_tokens(['-', 'a', '+ NET', 'n1', '+ DIRECTION', 'OUTPUT', '+ LAYER', 'M2', '( 0 0 )', '( 20 40 )',
+                        '+ FIXED', '( 100 200 )', 'E'])
+    builder.add_tokens(['-', 'b', '+ NET', 'n1', '+ PLACED', '( 5 5 )', 'N'])
+    builder.add_tokens(['-', 'c'])
+    pins = builder.build()
+    assert pins.net_ids.tolist() == [0, 0, -1]
+    assert pins.net_names == ['n1'] and pins.net_name(2) is None
+    assert pins.direction[0] == DIRECTION_CODE['OUTPUT']
+    assert (pins.status[0], pins.orient[0]) == (STATUS_CODE['FIXED'], ORIENT_CODE['E'])
+    # E turns the (10, 20) box center into (20, -10) around the location
+    x, y = pins.center([0])
+    assert (x[0], y[0]) == (120, 190)
+    assert np.array_equal(pins.is_placed(), [True, True, False])
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from src._def.design_db import DesignDB
+from src._def.name_table import DesignNames, FrozenNameTableError, NameList, NameTable
+
+from conftest import make_parser
+
+# Two names with the same crc32
+COLLIDING = ('plumless', 'buckeroo')
+
+
+def _table(names):
+    table = NameTable()
+    for name in names:
+        table.intern(name)
+    return table
+
+
+def test_intern_gives_first_seen_ids():
+    table = NameTable()
+    assert [table.intern(name) for name in ('INV_X1', 'A', 'INV_X1', 'Ω', 'A')] == [0, 1, 0, 2, 1]
+    assert table.names() == ['INV_X1', 'A', 'Ω'] and table == ['INV_X1', 'A', 'Ω']
+    assert table.raw(2) == 'Ω'.encode() and table[-1] == 'Ω'
+    assert list(table.offsets) == [0, 6, 7, 9]
+    # append() always adds; lookups keep the first id
+    assert table.append('A') == 3 and len(table) == 4
+    assert table.get('A') == 1 and table.get('missing') == -1 and 'missing' not in table
+
+
+def test_freeze_keeps_ids_and_lookups():
+    table = _table(['u1', 'u2', 'u3']).freeze()
+    assert table.frozen and isinstance(table.buffer, bytes)
+    assert table.offsets.dtype == np.int64 and table.offsets.tolist() == [0, 2, 4, 6]
+    assert table.get('u2') == 1 and table.freeze() is table
+
+
+def test_compact_lookups_match_the_dict():
+    names = [f'top/u{i % 7}/g{i}' for i in range(500)] + list(COLLIDING) + ['g1', 'top/u1/g1']
+    table = NameTable()
+    expected = {}
+    for name in names:
+        expected.setdefault(name, table.append(name))
+    queries = names + ['nothing', 'top/u0', '']
+    by_dict = [table.get(name) for name in queries]
+    table.compact()
+    assert table.index is None
+    assert [table.get(name) for name in queries] == by_dict
+    assert table.ids(queries).tolist() == by_dict
+    # The repeated name keeps its first id, the colliding names are told apart
+    assert table.get('top/u1/g1') == expected['top/u1/g1'] == 1
+    assert table.ids(list(COLLIDING)).tolist() == [expected[name] for name in COLLIDING]
+
+
+def test_empty_and_buffer_tables():
+    assert NameTable().compact().ids(['a']).tolist() == [-1]
+    table = NameTable.from_buffer([0, 1, 3], b'abc')
+    assert table.frozen and table.names() == ['a', 'bc'] and table.get('bc') == 1
+    assert NameList(table, np.array([1, 1, 0])) == ['bc', 'bc', 'a']
+
+
+def test_fork_shares_all_but_the_fresh_tables():
+    names = DesignNames()
+    names.cells.intern('INV_X1')
+    names.nets.intern('n0')
+    fork = names.fork('nets')
+    assert fork.cells is names.cells and fork.instances is names.instances and fork.pins is names.pins
+    assert fork.nets is not names.nets and len(fork.nets) == 0
+    assert all(table.index is None for table in names.compact().tables().values())
+
+
+def test_parsed_tables_share_the_design_names(synthetic_def):
+    parser = make_parser(synthetic_def)
+    table = parser.parse_component_table()
+    csr = parser.parse_net_csr(table)
+    names = table.names
+    assert csr.names.instances is names.instances and csr.names.cells is names.cells
+    assert names.instances.ids(table.instance_names()).tolist() == list(range(len(table)))
+    assert [names.cells[cell_id] for cell_id in table.cell_ids[:20].tolist()] == \
+        [table.cell_name(i) for i in range(20)]
+    assert csr.names.nets.ids(['n0', 'n199', 'nx']).tolist() == [0, 199, -1]
+    assert list(csr.pin_names) == [csr.names.pins[pin_id] for pin_id in csr.pin_name_ids.tolist()]
+
+
+def test_frozen_tables_only_look_names_up():
+    for finish in (NameTable.freeze, NameTable.compact):
+        table = finish(_table(['a', 'b']))
+        assert table.intern('b') == 1 and table.intern_raw(b'a') == 0
+        with pytest.raises(FrozenNameTableError, match="'c'"):
+            table.intern('c')
+        with pytest.raises(FrozenNameTableError):
+            table.append('a')
+        assert table.names() == ['a', 'b']
+
+
+def test_writable_forks_the_frozen_tables_only():
+    names = DesignNames()
+    names.pins.intern('A')
+    assert names.writable('pins', 'nets') is names
+    names.pins.compact()
+    writable = names.writable('pins', 'nets')
+    assert writable.nets is names.nets and len(writable.pins) == 0
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'engine': 'bytes'}, {'workers': 2}])
+def test_compact_before_parsing_the_nets(test_def, kwargs):
+    # The README sequence: compact the names of the table, then parse the NETS against it
+    parser = make_parser(test_def, **kwargs)
+    table = parser.parse_component_table()
+    expected = parser.parse_net_csr(table).net_names()
+    table.names.compact()
+    csr = parser.parse_net_csr(table)
+    assert csr.net_names() == expected and csr.names.instances is table.names.instances
+    # DesignDB.compact() compacts the same shared tables
+    table = parser.parse_component_table()
+    DesignDB.from_tables(table, parser.parse_net_csr(table)).compact()
+    assert parser.parse_net_csr(table).net_names() == expected
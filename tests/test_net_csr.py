@@ -0,0 +1,66 @@
+import numpy as np
+
+from src._def.component_table import ComponentTableBuilder
+from src._def.net_csr import IO_PIN, UNKNOWN_INSTANCE, NetPinCSRBuilder
+
+from conftest import make_parser
+
+
+def _tables(path):
+    parser = make_parser(path)
+    table = parser.parse_component_table()
+    return table, parser.parse_net_csr(table)
+
+
+def test_csr_matches_the_parsed_net_dicts(test_def, synthetic_def):
+    for path in (test_def, synthetic_def):
+        nets = make_parser(path).parse()['nets']
+        table, csr = _tables(path)
+        assert csr.net_names() == [net['net_name'] for net in nets]
+        for i, net in enumerate(nets):
+            inst_ids, pin_ids = csr.connections(i)
+            got = [('PIN' if inst_id == IO_PIN else table.instance_name(inst_id) if inst_id >= 0 else None,
+                    csr.pin_names[pin_id]) for inst_id, pin_id in zip(inst_ids.tolist(), pin_ids.tolist())]
+            known = [(conn['ins_name'] if conn['ins_name'] == 'PIN' or conn['ins_name'] in table.names.instances
+                      else None, conn['pin_name']) for conn in net['connections']]
+            assert got == known
+
+
+def test_io_and_unknown_instances_get_sentinels(test_def):
+    table, csr = _tables(test_def)
+    assert (csr.inst_ids == IO_PIN).sum() > 0
+    # Instances used in NETS but missing from COMPONENTS (e.g. 'dfsdfsd')
+    nets = make_parser(test_def).parse()['nets']
+    unknown = [conn for net in nets for conn in net['connections']
+               if conn['ins_name'] != 'PIN' and conn['ins_name'] not in table.names.instances]
+    assert (csr.inst_ids == UNKNOWN_INSTANCE).sum() == len(unknown) > 0
+    assert csr.row(0, table)['connections'] == [{'instance_name': 'I1', 'pin_name': 'A'},
+                                                {'instance_name': 'I3', 'pin_name': 'A'}]
+
+
+def test_pins_are_interned_per_cell():
+    components = ComponentTableBuilder()
+    for name, cell in (('u1', 'INV'), ('u2', 'INV'), ('u3', 'NAND')):
+        components.add(name, cell)
+    table = components.build()
+    builder = NetPinCSRBuilder(table)
+    builder.add('n1', [('u1', 'A'), ('u2', 'A'), ('u3', 'A'), ('PIN', 'in')])
+    builder.add('n2', [('u2', 'Z'), ('u1', 'A')])
+    csr = builder.build()
+    assert csr.indptr.tolist() == [0, 4, 6]
+    assert csr.inst_ids.tolist() == [0, 1, 2, IO_PIN, 1, 0]
+    # u1/A and u2/A share a pin (same cell), u3/A does not
+    assert csr.pin_ids.tolist() == [0, 0, 1, 2, 3, 0]
+    assert csr.pin_cell_ids.tolist() == [0, 1, -1, 0]
+    assert list(csr.pin_names) == ['A', 'A', 'in', 'Z']
+
+
+def test_degree_and_fanout_are_vectorized(synthetic_def):
+    table, csr = _tables(synthetic_def)
+    degree = csr.degree()
+    assert degree.tolist() == [len(csr.connections(i)[0]) for i in range(len(csr))]
+    io_nets = csr.net_of_connection()[csr.inst_ids == IO_PIN]
+    assert (csr.degree(include_io=False) == degree - np.bincount(io_nets, minlength=len(csr))).all()
+    fanout = csr.fanout(len(table))
+    assert fanout.sum() == (csr.inst_ids >= 0).sum()
+    assert len(fanout) == len(table)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import def_parser
+from src._def.net_filter import NetFilter
+
+from conftest import make_parser
+
+
+def _legacy_kept(nets):
+    '''Net ids kept by the old pruning loop of def_parser.py: nets with exactly one instance pin are deleted'''
+    return [i for i, net in enumerate(nets)
+            if sum(1 for conn in net['connections'] if conn['ins_name'] != 'PIN') != 1]
+
+
+def test_keep_mask_predicates():
+    degree = np.array([0, 1, 2, 5, 9, 0])
+    names = ['io_only', 'single', 'VDD_core', 'n3', 'n4', 'empty']
+    assert NetFilter().keep_mask(degree).tolist() == [True] * 6
+    # Nets without instances are not affected by the degree bounds
+    assert NetFilter(min_degree=2).keep_mask(degree).tolist() == [True, False, True, True, True, True]
+    assert NetFilter(max_degree=5).keep_mask(degree).tolist() == [True, True, True, True, False, True]
+    assert NetFilter(drop_io_only=True).keep_mask(degree).tolist() == [False, True, True, True, True, False]
+    assert NetFilter(drop_power=True).keep_mask(degree, names).tolist() == [True, True, False, True, True, True]
+    with pytest.raises(ValueError):
+        NetFilter(drop_power=True).keep_mask(degree)
+
+
+def test_renumber_keeps_the_order():
+    kept, new_ids = NetFilter().renumber(np.array([True, False, True, True, False]))
+    assert kept.tolist() == [0, 2, 3]
+    assert new_ids.tolist() == [0, -1, 1, 2, -1]
+
+
+def test_default_filter_is_the_single_pin_pruning(test_def, synthetic_def):
+    for path in (test_def, synthetic_def):
+        nets = make_parser(path).parse()['nets']
+        kept, new_ids = NetFilter(min_degree=2).filter_nets(nets)
+        assert kept.tolist() == _legacy_kept(nets)
+        assert new_ids[kept].tolist() == list(range(len(kept)))
+
+
+def test_filter_csr_matches_filter_nets(synthetic_def):
+    parser = make_parser(synthetic_def)
+    nets = parser.parse()['nets']
+    table = parser.parse_component_table()
+    csr = parser.parse_net_csr(table)
+    for net_filter in (NetFilter(min_degree=2), NetFilter(min_degree=2, max_degree=3, drop_io_only=True),
+                       NetFilter(drop_power=True)):
+        kept, new_ids = net_filter.filter_nets(nets)
+        filtered, csr_new_ids = net_filter.filter_csr(csr)
+        assert csr_new_ids.tolist() == new_ids.tolist()
+        assert filtered.net_names() == [nets[i]['net_name'] for i in kept.tolist()]
+        for new_id, old_id in enumerate(kept.tolist()):
+            assert [x.tolist() for x in filtered.connections(new_id)] == [x.tolist() for x in csr.connections(old_id)]
+
+
+def test_build_def_output_renumbers_the_kept_nets(synthetic_def):
+    content = make_parser(synthetic_def).parse()
+    output = def_parser.build_def_output(content, show_progress=False)
+    kept = _legacy_kept(content['nets'])
+    assert sorted(output['id2NetInfo']) == list(range(len(kept)))
+    assert [output['id2NetInfo'][i]['net_name'] for i in range(len(kept))] == \
+        [content['nets'][i]['net_name'] for i in kept]
+    assert all(output['net2id'][info['net_name']] == i for i, info in output['id2NetInfo'].items())
+
+    everything = def_parser.build_def_output(content, net_filter=NetFilter(), show_progress=False)
+    assert len(everything['id2NetInfo']) == len(content['nets'])
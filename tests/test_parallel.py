@@ -0,0 +1,93 @@
+import gc
+
+import numpy as np
+import pytest
+
+from src._def import parallel
+
+from conftest import make_parser, synthetic_def_text
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Split even the small test sections into one chunk per worker
+    monkeypatch.setattr(parallel, 'MIN_CHUNK_BYTES', 1)
+
+
+@pytest.fixture
+def split_nets_def(tmp_path):
+    text = synthetic_def_text().replace('END DESIGN', 'NETS 1 ;\n- extra ( top/u0/g0 A ) ;\nEND NETS\n\nEND DESIGN')
+    path = tmp_path / 'split.def'
+    path.write_text(text)
+    return str(path)
+
+
+def test_parallel_parse_matches_serial(synthetic_def, small_chunks):
+    serial = make_parser(synthetic_def).parse()
+    result = make_parser(synthetic_def, workers=3).parse()
+    assert result == serial
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_repeated_sections_are_all_kept(split_nets_def, small_chunks, workers):
+    nets = make_parser(split_nets_def, workers=workers).parse()['nets']
+    assert len(nets) == 201
+    assert nets[0]['net_name'] == 'n0'
+    assert nets[-1]['net_name'] == 'extra'
+
+
+@pytest.mark.parametrize('engine', ['text', 'bytes'])
+def test_parallel_columns_match_serial(synthetic_def, small_chunks, engine):
+    serial = make_parser(synthetic_def, engine=engine)
+    table = serial.parse_component_table()
+    csr = serial.parse_net_csr(table)
+    parallel_parser = make_parser(synthetic_def, engine=engine, workers=3)
+    parallel_table = parallel_parser.parse_component_table()
+    parallel_csr = parallel_parser.parse_net_csr(parallel_table)
+
+    for column in ('name_offsets', 'cell_ids', 'x', 'y', 'orient', 'status'):
+        assert np.array_equal(getattr(table, column), getattr(parallel_table, column))
+    assert table.name_buffer == parallel_table.name_buffer
+    assert list(table.cell_names) == list(parallel_table.cell_names)
+    for column in ('indptr', 'inst_ids', 'pin_ids', 'pin_cell_ids', 'name_offsets', 'pin_name_ids'):
+        assert np.array_equal(getattr(csr, column), getattr(parallel_csr, column))
+    assert csr.name_buffer == parallel_csr.name_buffer
+    assert list(csr.pin_names) == list(parallel_csr.pin_names)
+
+
+def test_column_chunks_are_compact(synthetic_def):
+    # What a worker sends back for NETS: arrays and the small pin table, no per-net objects
+    parser = make_parser(synthetic_def)
+    table = parser.parse_component_table()
+    span = parser.section_index['NETS'][0]
+    columns = parallel.parse_columns_chunk(
+        synthetic_def, 'NETS', span.body_start, span.end,
+        instances=(table.name_offsets, table.name_buffer, table.cell_ids))
+    indptr, inst_ids, pin_ids, pin_cells, pin_names, net_offsets, net_buffer = columns
+    assert len(indptr) == 201
+    assert isinstance(net_buffer, bytes) and all(isinstance(name, str) for name in pin_names)
+    assert inst_ids.dtype == np.int32 and len(inst_ids) == len(pin_ids) == indptr[-1]
+
+
+def test_nets_workers_get_the_instances_from_the_initializer(synthetic_def, small_chunks):
+    parser = make_parser(synthetic_def)
+    table = parser.parse_component_table()
+    span = parser.section_index['NETS'][0]
+    instances = (table.name_offsets, table.name_buffer, table.cell_ids)
+    with parallel.ParallelSectionParser(synthetic_def, 2, instances=instances) as section_parser:
+        with open(synthetic_def, 'rb') as f:
+            section_parser.submit_columns(f.read(), span)
+        parts = section_parser.column_results('NETS')
+    csr = parallel.merge_net_columns(parts, table)
+    serial = parser.parse_net_csr(table)
+    assert np.array_equal(csr.inst_ids, serial.inst_ids) and csr.net_names() == serial.net_names()
+    with parallel.ParallelSectionParser(synthetic_def, 2) as section_parser:
+        with pytest.raises(ValueError, match='instances'):
+            section_parser.submit_columns(b'', span)
+
+
+def test_gc_is_paused_while_the_pool_is_open(synthetic_def):
+    assert gc.isenabled()
+    with parallel.ParallelSectionParser(synthetic_def, 2):
+        assert not gc.isenabled()
+    assert gc.isenabled()
@@ -0,0 +1,93 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import def_parser
+from src import parse_cache
+from src.parse_cache import DIGEST_DIR, ParseCache
+
+from conftest import TEST_DEF
+
+
+def test_key_follows_content_version_and_options(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache'))
+    copy = tmp_path / 'copy.def'
+    shutil.copyfile(TEST_DEF, copy)
+    key = cache.key(TEST_DEF, 1, {'used_prefix': ['COMPONENTS', 'NETS']})
+    # Same content elsewhere: same key
+    assert cache.key(str(copy), 1, {'used_prefix': ['COMPONENTS', 'NETS']}) == key
+    assert cache.key(TEST_DEF, 2, {'used_prefix': ['COMPONENTS', 'NETS']}) != key
+    assert cache.key(TEST_DEF, 1, {'used_prefix': ['NETS']}) != key
+    with open(copy, 'a') as f:
+        f.write('\n')
+    os.utime(copy, ns=(1, 1))
+    assert cache.key(str(copy), 1, {'used_prefix': ['COMPONENTS', 'NETS']}) != key
+
+
+def test_fetch_misses_then_hits(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache'))
+    output = tmp_path / 'out.design'
+    assert not cache.fetch('k', str(output))
+    output.write_bytes(b'result')
+    cache.store('k', str(output))
+    output.unlink()
+    assert cache.fetch('k', str(output))
+    assert output.read_bytes() == b'result'
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache'), max_bytes=250)
+    output = tmp_path / 'out.bin'
+    for i, key in enumerate(('a', 'b')):
+        output.write_bytes(b'x' * 100)
+        cache.store(key, str(output))
+        os.utime(cache._entry_path(key, str(output)), (1000 + i, 1000 + i))
+    # A hit makes 'a' the most recently used entry
+    assert cache.fetch('a', str(output))
+    cache.store('c', str(output))
+    names = sorted(os.path.basename(path) for _, _, path in cache.entries())
+    assert names == ['a.bin', 'c.bin']
+    assert sum(size for _, size, _ in cache.entries()) <= 250
+    cache.clear()
+    assert cache.entries() == []
+
+
+def test_parse_def_file_is_skipped_on_a_cache_hit(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache'))
+    first = tmp_path / 'first.design'
+    second = tmp_path / 'second.design'
+    assert def_parser.parse_def_file(TEST_DEF, str(first), progress='silent', cache=cache) is not None
+    assert def_parser.parse_def_file(TEST_DEF, str(second), progress='silent', cache=cache) is None
+    assert first.read_bytes() == second.read_bytes()
+    # Another output format is another entry
+    assert def_parser.parse_def_file(TEST_DEF, str(tmp_path / 'out.pkl'), 'pickle', progress='silent', cache=cache)
+
+
+def _content_hash(cache_dir, file_path):
+    return ParseCache(cache_dir).content_hash(file_path)
+
+
+def test_content_hashes_of_parallel_workers_are_all_kept(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    paths = []
+    for i in range(8):
+        path = tmp_path / f'design{i}.def'
+        path.write_text(f'DESIGN d{i} ;\n')
+        paths.append(str(path))
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        digests = list(pool.map(_content_hash, [cache_dir] * len(paths), paths))
+    assert len(os.listdir(os.path.join(cache_dir, DIGEST_DIR))) == len(paths)
+    # Every hash is remembered: none of the files is read again
+    monkeypatch.setattr(parse_cache, 'file_digest', lambda file_path: 'rehashed')
+    cache = ParseCache(cache_dir)
+    assert [cache.content_hash(path) for path in paths] == digests
+    # A changed file is hashed again and replaces its own record only
+    os.utime(paths[0], ns=(1, 1))
+    assert cache.content_hash(paths[0]) == 'rehashed'
+    assert len(os.listdir(os.path.join(cache_dir, DIGEST_DIR))) == len(paths)
+    assert cache.entries() == []
+
+
+def test_command_line_cache_is_opt_in():
+    assert not def_parser.parser.parse_args(['--def_path', TEST_DEF]).cache
+    assert def_parser.parser.parse_args(['--def_path', TEST_DEF, '--cache']).cache
@@ -0,0 +1,95 @@
+import pytest
+
+from src.progress import LoggingProgress, SilentProgress, TqdmProgress, make_progress
+
+from conftest import make_parser
+
+
+class RecordingProgress(SilentProgress):
+    '''Silent reporter that records its updates'''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updates = []
+
+    def _on_update(self, n_bytes):
+        self.updates.append(n_bytes)
+
+
+def test_make_progress():
+    assert isinstance(make_progress('tqdm'), TqdmProgress)
+    assert isinstance(make_progress('log'), LoggingProgress)
+    assert type(make_progress('silent')) is SilentProgress
+    reporter = RecordingProgress()
+    assert make_progress(reporter) is reporter
+    with pytest.raises(ValueError):
+        make_progress('bar')
+
+
+def test_updates_are_sampled_every_report_bytes():
+    progress = RecordingProgress(report_bytes=100, report_interval=1e9)
+    progress.begin('test', 1000)
+    for _ in range(250):
+        progress.advance(2, 1)
+    assert progress.updates == [100] * 5
+    progress.finish()
+    assert progress.done_bytes == 500
+    assert progress.updates == [100] * 5
+
+
+def test_section_stats():
+    progress = SilentProgress()
+    progress.begin('test')
+    progress.begin_section('A')
+    progress.advance(10, 2)
+    progress.begin_section('B')
+    progress.advance(5, 1)
+    progress.advance(5, 1)
+    progress.finish()
+    assert [(s.name, s.n_bytes, s.n_lines) for s in progress.section_stats] == [('A', 10, 2), ('B', 10, 2)]
+    assert all(s.bytes_per_sec > 0 and s.lines_per_sec > 0 for s in progress.section_stats)
+    assert 'B: 2 lines' in str(progress.section_stats[1])
+
+
+def test_parse_reports_every_byte_of_the_parsed_sections(synthetic_def):
+    progress = RecordingProgress()
+    parser = make_parser(synthetic_def, progress=progress)
+    parser.parse()
+    assert progress.done_bytes == progress.total
+    names = [stats.name for stats in progress.section_stats]
+    assert {'COMPONENTS', 'NETS', 'ROW'} <= set(names)
+    # Skipped sections are not reported
+    assert 'SPECIALNETS' not in names
+    with open(synthetic_def) as f:
+        lines = f.read().splitlines()
+    nets = next(stats for stats in progress.section_stats if stats.name == 'NETS')
+    assert nets.n_lines == lines.index('END NETS') - lines.index('NETS 200 ;') + 1
+    # Updates come from the section ends, not from the lines
+    assert len(progress.updates) <= len(progress.section_stats) + 1
+
+
+def test_section_stats_are_reset_by_every_parse_call(synthetic_def):
+    progress = RecordingProgress()
+    parser = make_parser(synthetic_def, progress=progress)
+    parser.parse()
+    first = [stats.name for stats in progress.section_stats]
+    parser.parse()
+    assert [stats.name for stats in progress.section_stats] == first
+    parser.parse_component_table()
+    assert progress.section_stats == []
+
+
+def test_incremental_summaries_go_through_the_reporter(synthetic_def):
+    class NotingProgress(SilentProgress):
+        def __init__(self):
+            super().__init__()
+            self.notes = []
+
+        def _on_note(self, message):
+            self.notes.append(message)
+    progress = NotingProgress()
+    parser = make_parser(synthetic_def, progress=progress)
+    parser.parse_component_table_incremental()
+    parser.parse_incremental()
+    assert progress.notes == ['COMPONENTS: 300 entries, 300 reparsed, 0 reused',
+                              'COMPONENTS: 300 entries, 300 reparsed, 0 reused',
+                              'NETS: 200 entries, 200 reparsed, 0 reused']
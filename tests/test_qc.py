@@ -0,0 +1,27 @@
+import def_parser
+from src.design_store import open_design, save_def_output
+from src.qc.qc import QualityController
+
+from conftest import make_parser
+
+
+def test_store_and_dicts_give_the_same_qc_input(synthetic_def, tmp_path):
+    def_output = def_parser.build_def_output(make_parser(synthetic_def).parse(), show_progress=False)
+    path = tmp_path / 'def_outputs.design'
+    save_def_output(path, def_output)
+    qc = QualityController()
+    from_dicts, _ = qc.transform_def_lef_data(def_output, {'cell_dict': {}})
+    from_store, _ = qc.transform_def_lef_data(open_design(path), {'cell_dict': {}})
+
+    # len() does not build the records
+    assert len(from_store['COMPONENTS']) == len(def_output['id2instanceInfo'])
+    assert len(from_store['NETS']) == len(def_output['id2NetInfo'])
+    assert from_store['COMPONENTS']._records is None and from_store['NETS']._records is None
+    assert list(from_store['COMPONENTS']) == list(from_dicts['COMPONENTS'])
+    assert list(from_store['NETS']) == list(from_dicts['NETS'])
+    # Built once
+    assert from_store['NETS']._get() is from_store['NETS']._get()
+    assert from_store['DESIGN_DB'].connections(3) == from_dicts['DESIGN_DB'].connections(3)
+
+    reports = [qc.run_def_unit_tests(data) for data in (from_dicts, from_store)]
+    assert [issue.message for issue in reports[0].issues] == [issue.message for issue in reports[1].issues]
@@ -0,0 +1,99 @@
+import numpy as np
+
+from src._def.routing import RoutingGeometryBuilder, parse_routing
+from src.parser.section_indexer import open_mmap
+
+from conftest import make_parser
+
+NETS_TEXT = '''- n0 ( u1 A ) ( u2 B )
+  + ROUTED M1 ( 0 0 ) ( 100 * ) M1_M2 ( * 200 ) # comment ( 7 7 )
+  NEW M3 ( 5 5 ) ( 5 50 ) VIRTUAL ( 70 50 ) ( 70 80 ) RECT ( -1 -2 3 4 ) ;
+- n1 ( u3 Z ) ;
+- n2 + ROUTED M2 ( 0 0 ) M1_M2 DO 2 BY 3 STEP 10 20 ;
+'''
+
+SPECIALNETS_TEXT = '''- VDD ( * VDD )
+  + ROUTED M1 200 + SHAPE STRIPE ( 0 0 ) ( 2000 0 ) ( 2000 500 )
+  + RECT M2 ( 0 0 ) ( 10 20 ) + POLYGON M3 ( 0 0 ) ( 5 9 ) ( -3 4 )
+  + VIA V12 N ( 1 1 ) ( 2 2 ) + USE POWER ;
+'''
+
+
+def _build(section, text, **kwargs):
+    builder = RoutingGeometryBuilder(section, **kwargs)
+    builder.add_text(text)
+    return builder.build()
+
+
+def _columns(columns):
+    return {name: values.tolist() for name, values in columns.items()}
+
+
+def test_paths_expand_stars_vias_and_virtual_points():
+    routing = _build('NETS', NETS_TEXT, via_layers={'M1_M2': ('M1', 'M2')})
+    assert routing.net_names() == ['n0', 'n1', 'n2']
+    assert routing.layer_names == ['M1', 'M2', 'M3'] and routing.via_names == ['M1_M2']
+    segments = _columns(routing.segments)
+    # The via moves the path from M1 to M2; VIRTUAL starts a new stretch; the comment is dropped
+    assert list(zip(segments['layer_ids'], segments['x1'], segments['y1'], segments['x2'], segments['y2'])) == [
+        (0, 0, 0, 100, 0), (1, 100, 0, 100, 200), (2, 5, 5, 5, 50), (2, 70, 50, 70, 80)]
+    assert set(segments['net_ids']) == {0} and set(segments['width']) == {0}
+    vias = _columns(routing.vias)
+    # n2: the DO 2 BY 3 STEP 10 20 array is expanded
+    assert list(zip(vias['net_ids'], vias['x'], vias['y'])) == [
+        (0, 100, 0), (2, 0, 0), (2, 10, 0), (2, 0, 20), (2, 10, 20), (2, 0, 40), (2, 10, 40)]
+    assert _columns(routing.rects) == {'net_ids': [0], 'layer_ids': [2], 'xlo': [69], 'ylo': [78],
+                                       'xhi': [73], 'yhi': [84]}
+    assert routing.net_wirelength().tolist() == [100 + 200 + 45 + 30, 0, 0]
+    assert routing.via_count().tolist() == [1, 0, 6]
+    assert routing.net_segments(0) == (0, 4) and routing.net_segments(1) == (4, 4)
+
+
+def test_without_via_layers_the_path_keeps_its_layer():
+    routing = _build('NETS', NETS_TEXT)
+    assert routing.layer_names[routing.segments['layer_ids'][1]] == 'M1'
+
+
+def test_special_wiring_widths_shapes_and_via_lists():
+    routing = _build('SPECIALNETS', SPECIALNETS_TEXT)
+    segments = _columns(routing.segments)
+    assert segments['width'] == [200, 200]
+    assert list(zip(segments['x1'], segments['y1'], segments['x2'], segments['y2'])) == [
+        (0, 0, 2000, 0), (2000, 0, 2000, 500)]
+    # A polygon is its bounding box
+    rects = _columns(routing.rects)
+    assert [routing.layer_names[layer] for layer in rects['layer_ids']] == ['M2', 'M3']
+    assert list(zip(rects['xlo'], rects['ylo'], rects['xhi'], rects['yhi'])) == [(0, 0, 10, 20), (-3, 0, 5, 9)]
+    vias = _columns(routing.vias)
+    assert list(zip(vias['x'], vias['y'], vias['orient'])) == [(1, 1, 0), (2, 2, 0)]
+    assert routing.layer_wirelength().tolist() == [2500, 0, 0]
+
+
+def test_parsed_design_matches_the_net_csr(synthetic_def):
+    parser = make_parser(synthetic_def)
+    csr = parser.parse_net_csr()
+    routing = parser.parse_routing('NETS', via_layers={'V12': ('M1', 'M2')})
+    assert routing.net_names() == csr.net_names()
+    # Odd nets: ( j*100 0 ) ( * 1000 ) V12 then NEW M2 ( j*100 1000 ) ( 5000 * )
+    expected = [1000 + abs(5000 - j * 100) if j % 2 else 0 for j in range(len(csr))]
+    assert routing.net_wirelength().tolist() == expected
+    assert routing.via_count().tolist() == [j % 2 for j in range(len(csr))]
+
+    special = parser.parse_routing('SPECIALNETS')
+    assert special.net_names() == ['VDD'] and special.segments['width'].tolist() == [200]
+
+
+def test_chunking_does_not_change_the_result(synthetic_def):
+    parser = make_parser(synthetic_def)
+    mm = open_mmap(synthetic_def)
+    try:
+        spans = parser.section_indexer.index(mm)['NETS']
+        whole = parse_routing(mm, spans)
+        chunked = parse_routing(mm, spans, chunk_bytes=512)
+    finally:
+        mm.close()
+    assert chunked.net_names() == whole.net_names()
+    for name in whole.segments:
+        assert np.array_equal(chunked.segments[name], whole.segments[name])
+    for name in whole.vias:
+        assert np.array_equal(chunked.vias[name], whole.vias[name])
@@ -0,0 +1,70 @@
+from src.parser.section_indexer import DefSectionIndexer, SectionReader, open_mmap
+
+import def_parser
+from conftest import make_parser
+
+
+def _indexer():
+    return DefSectionIndexer(def_parser.Header_list, def_parser.NoEndBlockList, def_parser.WithEndBlockList)
+
+
+def test_index_records_every_top_level_section(synthetic_def):
+    mm = open_mmap(synthetic_def)
+    try:
+        index = _indexer().index(mm)
+        assert {'VERSION', 'DESIGN', 'DIEAREA', 'ROW', 'TRACKS', 'GCELLGRID', 'VIAS', 'COMPONENTS',
+                'PINS', 'SPECIALNETS', 'NETS'} <= set(index)
+        assert len(index['ROW']) == 2
+        components = index['COMPONENTS'][0]
+        assert mm[components.start:components.body_start] == b'COMPONENTS 300 ;\n'
+        assert mm[:components.end].endswith(b'END COMPONENTS\n')
+        nets = index['NETS'][0]
+        assert mm[nets.start:nets.end].rstrip().endswith(b'END NETS')
+    finally:
+        mm.close()
+
+
+def test_spans_do_not_overlap_and_are_in_file_order(synthetic_def):
+    mm = open_mmap(synthetic_def)
+    try:
+        spans = sorted((span for spans in _indexer().index(mm).values() for span in spans), key=lambda span: span.start)
+    finally:
+        mm.close()
+    for previous, span in zip(spans, spans[1:]):
+        assert previous.end <= span.start
+        assert span.start < span.body_start <= span.end
+
+
+def test_end_line_must_stand_alone(tmp_path):
+    path = tmp_path / 'end.def'
+    path.write_text('NETS 1 ;\n- n1 ( u1 A ) + PROPERTY x "END NETS" ;\nEND NETS\nEND DESIGN\n')
+    mm = open_mmap(str(path))
+    try:
+        span = _indexer().index(mm)['NETS'][0]
+        assert mm[span.start:span.end].endswith(b'END NETS\n')
+        assert b'PROPERTY' in mm[span.body_start:span.end]
+    finally:
+        mm.close()
+
+
+def test_section_reader_stays_in_its_range(synthetic_def):
+    mm = open_mmap(synthetic_def)
+    try:
+        span = _indexer().index(mm)['COMPONENTS'][0]
+        f = SectionReader(mm, span.body_start, span.end)
+        lines = list(iter(f.readline, ''))
+        assert lines[-1].strip() == 'END COMPONENTS'
+        assert f.tell() == span.end
+        assert f.readline() == ''
+    finally:
+        mm.close()
+
+
+def test_parse_only_reads_the_used_sections(test_def):
+    parser = make_parser(test_def)
+    result = parser.parse()
+    assert len(result['components']) == 43
+    assert len(result['nets']) == 14
+    # Indexed but never parsed
+    assert 'SPECIALNETS' in parser.section_index
+    assert 'SPECIALNETS' not in parser.block_collector
@@ -0,0 +1,96 @@
+import numpy as np
+
+from src._def.component_table import ComponentTableBuilder, ORIENT_CODE, STATUS_CODE
+from src._def.spatial_index import SpatialIndex, cell_sizes_from_lef
+from src.lef_parser import parse_lef_file
+
+from conftest import TEST_LEF, make_parser
+
+
+def _random_boxes(n, seed=3):
+    rng = np.random.default_rng(seed)
+    xlo = rng.integers(0, 10000, n).astype(np.float64)
+    ylo = rng.integers(0, 10000, n).astype(np.float64)
+    return xlo, ylo, xlo + rng.integers(0, 800, n), ylo + rng.integers(0, 800, n)
+
+
+def _brute_rect(boxes, rect):
+    xlo, ylo, xhi, yhi = boxes
+    return np.flatnonzero((xlo <= rect[2]) & (xhi >= rect[0]) & (ylo <= rect[3]) & (yhi >= rect[1])).tolist()
+
+
+def _distance(boxes, x, y):
+    xlo, ylo, xhi, yhi = boxes
+    return np.hypot(np.maximum(np.maximum(xlo - x, x - xhi), 0), np.maximum(np.maximum(ylo - y, y - yhi), 0))
+
+
+def test_window_queries_match_a_linear_scan():
+    boxes = _random_boxes(2000)
+    rng = np.random.default_rng(5)
+    corner = rng.integers(-500, 10500, (300, 2))
+    rects = np.hstack([corner, corner + rng.integers(0, 3000, (300, 2))])
+    for bin_size in (None, 250, 5000):
+        index = SpatialIndex(*boxes, bin_size=bin_size)
+        indptr, ids = index.query_rects(rects)
+        assert len(indptr) == len(rects) + 1
+        for i, rect in enumerate(rects):
+            assert ids[indptr[i]:indptr[i + 1]].tolist() == _brute_rect(boxes, rect)
+        assert index.query_rect(*rects[0]).tolist() == _brute_rect(boxes, rects[0])
+
+
+def test_point_queries_count_touching_boxes():
+    index = SpatialIndex([0, 10, 20], [0, 0, 0], [10, 20, 30], [10, 10, 10])
+    assert index.query_point(10, 5).tolist() == [0, 1]
+    assert index.query_point(25, 10).tolist() == [2]
+    assert index.query_point(31, 0).tolist() == []
+    indptr, ids = index.query_points([[5, 5], [20, 0]])
+    assert indptr.tolist() == [0, 1, 3] and ids.tolist() == [0, 1, 2]
+
+
+def test_nearest_matches_a_linear_scan():
+    boxes = _random_boxes(1500, seed=11)
+    index = SpatialIndex(*boxes)
+    points = np.random.default_rng(13).integers(-2000, 12000, (200, 2)).astype(np.float64)
+    ids, distances = index.nearest_many(points, k=5)
+    assert ids.shape == distances.shape == (200, 5)
+    for point, point_ids, point_distances in zip(points, ids, distances):
+        distance = _distance(boxes, *point)
+        expected = np.lexsort((np.arange(len(distance)), distance))[:5]
+        assert np.allclose(point_distances, distance[expected])
+        assert np.allclose(distance[point_ids], point_distances)
+
+
+def test_nearest_pads_when_there_are_fewer_boxes_than_k():
+    index = SpatialIndex([0, 100], [0, 0], [10, 110], [10, 10], ids=[7, 9])
+    ids, distances = index.nearest(50, 5, k=4)
+    assert ids.tolist() == [7, 9] and np.allclose(distances, [40, 50])
+    all_ids, all_distances = index.nearest_many([[50, 5]], k=4)
+    assert all_ids[0, 2:].tolist() == [-1, -1] and np.isinf(all_distances[0, 2:]).all()
+    assert SpatialIndex([], [], [], []).nearest(0, 0)[0].tolist() == []
+
+
+def test_component_table_boxes_use_cell_sizes_and_orientation():
+    builder = ComponentTableBuilder()
+    builder.add('u0', 'INV', 100, 200, ORIENT_CODE['N'], STATUS_CODE['PLACED'])
+    builder.add('u1', 'INV', 1000, 2000, ORIENT_CODE['E'], STATUS_CODE['FIXED'])
+    builder.add('u2', 'DFF3', 0, 0, status=STATUS_CODE['UNPLACED'])
+    table = builder.build()
+    width, height = cell_sizes_from_lef(parse_lef_file(TEST_LEF), table.cell_names, 1000)
+    assert np.allclose(width, [67200, 67200]) and np.allclose(height, [24000, 210000])
+
+    index = SpatialIndex.from_component_table(table, (width, height))
+    # Unplaced instances are left out, ids are table rows
+    assert index.ids.tolist() == [0, 1]
+    assert (index.xhi[0], index.yhi[0]) == (100 + 67200, 200 + 24000)
+    # Rotated: width and height swapped
+    assert (index.xhi[1], index.yhi[1]) == (1000 + 24000, 2000 + 67200)
+    assert index.query_point(1000 + 20000, 2000 + 60000).tolist() == [1]
+
+
+def test_parsed_design_without_sizes_indexes_points(synthetic_def):
+    table = make_parser(synthetic_def).parse_component_table()
+    index = SpatialIndex.from_component_table(table)
+    placed = np.flatnonzero(table.is_placed())
+    assert index.ids.tolist() == placed.tolist()
+    row = int(placed[0])
+    assert row in index.query_point(int(table.x[row]), int(table.y[row])).tolist()
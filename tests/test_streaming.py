@@ -0,0 +1,31 @@
+import types
+
+from conftest import make_parser
+
+
+def test_iter_components_equals_parse(synthetic_def):
+    components = make_parser(synthetic_def).parse()['components']
+    assert list(make_parser(synthetic_def).iter_components()) == components
+
+
+def test_iter_nets_equals_parse(test_def, synthetic_def):
+    for path in (test_def, synthetic_def):
+        assert list(make_parser(path).iter_nets()) == make_parser(path).parse()['nets']
+
+
+def test_iterators_are_lazy(synthetic_def):
+    parser = make_parser(synthetic_def)
+    components = parser.iter_components()
+    assert isinstance(components, types.GeneratorType)
+    first = next(components)
+    assert first['ins_name'] == 'top/u0/g0'
+    components.close()
+    # Nothing is collected on the way
+    assert parser.block_collector == {}
+    assert parser.transformed_collector == {}
+
+
+def test_iter_components_of_missing_section(tmp_path):
+    path = tmp_path / 'empty.def'
+    path.write_text('VERSION 5.8 ;\nDESIGN empty ;\nEND DESIGN\n')
+    assert list(make_parser(str(path)).iter_components()) == []
@@ -0,0 +1,72 @@
+import pytest
+
+from src.parser.section_indexer import DefSectionIndexer, SectionReader, open_mmap
+from src.parser.specifig_parser import MultiLineBlockParserWithEnd
+from src._def.transformer.specific import (
+    BulkLineSeperator, CommonLineSeperator, ComponentHeadFormatter, EnhancedBlockTransformer,
+    MultiLineLineClearer, RegexLineSeperator, component_block_transformer,
+)
+
+from conftest import TEST_DEF
+
+
+def head_lines(path):
+    mm = open_mmap(path)
+    try:
+        index = DefSectionIndexer(set(), set(), {'COMPONENTS', 'NETS'}).index(mm)
+        lines = []
+        for prefix in ('COMPONENTS', 'NETS'):
+            for span in index.get(prefix, []):
+                f = SectionReader(mm, span.body_start, span.end)
+                lines.extend(raw['head_section'] for raw in MultiLineBlockParserWithEnd().iter_parse(f, '', prefix))
+        return lines
+    finally:
+        mm.close()
+
+
+EDGE_LINES = [
+    '- c1 INV + PLACED ( 100 200 ) N',
+    '- n1 ( u1 A ) ( PIN p1 ) + USE SIGNAL',
+    '- a  +  b ( 1  2 )   c',
+    '- a + b  "x"   ( 1 )',
+    '- p + PROPERTY strprop "a string" + PROPERTY x ""',
+    '- x "esc\\"aped" y',
+    '- w x(y) ( a ( b ) c ) z(',
+    '- t\tINV\t+ PLACED ( 1 2 ) N',
+    '- a +  ( 1 )',
+    '- trailing +',
+    '- u ( 1 2 )x',
+    '- nonascii é ( 1 )',
+    '  - padded ;  ',
+    '- cmt ( * * )           # case : pt via ( * * ) NEW M2',
+]
+
+
+@pytest.mark.parametrize('seperator', [RegexLineSeperator(), BulkLineSeperator()], ids=lambda s: type(s).__name__)
+def test_seperators_match_common_on_edge_lines(seperator):
+    common = CommonLineSeperator()
+    for line in EDGE_LINES:
+        assert seperator.seperate(line) == common.seperate(line), line
+    assert seperator.seperate_many(EDGE_LINES) == [common.seperate(line) for line in EDGE_LINES]
+
+
+@pytest.mark.parametrize('path', ['test_def', 'synthetic_def'])
+def test_bulk_and_regex_match_common_on_def_entries(path, request):
+    lines = head_lines(request.getfixturevalue(path))
+    expected = CommonLineSeperator().seperate_many(lines)
+    assert RegexLineSeperator().seperate_many(lines) == expected
+    # Small batches: irregular lines end up on the per-line fallback in some of them
+    assert BulkLineSeperator(batch_size=7, min_batch_size=2).seperate_many(lines) == expected
+    assert BulkLineSeperator().seperate_many(lines * 50) == expected * 50
+
+
+def test_bulk_keeps_the_regular_lines_of_the_test_def_on_the_bulk_path():
+    seperator = BulkLineSeperator()
+    lines = head_lines(TEST_DEF)
+    assert all(seperator._bulk_seperate([line]) is not None for line in lines)
+
+
+def test_seperator_is_selectable_through_the_transformer():
+    raw_sections = [{'head_section': line} for line in head_lines(TEST_DEF)[:5]]
+    common = EnhancedBlockTransformer(MultiLineLineClearer(), CommonLineSeperator(), ComponentHeadFormatter())
+    assert common.transform(raw_sections) == component_block_transformer.transform(raw_sections)